@@ -1,6 +1,9 @@
+import hashlib
 import logging
 from collections.abc import Iterable
 
+import orjson
+
 from autosweep.data_types import filereader
 from autosweep.utils import io, typing_ext
 
@@ -29,6 +32,28 @@ class Recipe(filereader.FileWRer):
         """
         return tuple(self.recipe["instruments"])
 
+    @property
+    def digest(self) -> str:
+        """
+        A hash of the contents of the recipe, identical for identical recipes whatever the order of their keys.
+
+        :return: The SHA-256 hex digest
+        :rtype: str
+        """
+        data = orjson.dumps(self.recipe, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(data).hexdigest()
+
+    @property
+    def raw_data_format(self) -> dict:
+        """
+        The format of the raw data saved by the tests of this recipe, it overrides the one of the station. Each recipe
+        step can also override it with its own 'raw_data' entry.
+
+        :return: The raw data format
+        :rtype: dict
+        """
+        return dict(self.recipe.get("raw_data", {}))
+
     def to_json(self, path: typing_ext.PathLike):
         io.write_json(data=self.recipe, path=path)
 
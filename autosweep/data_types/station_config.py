@@ -1,10 +1,14 @@
 import logging
 import types
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from autosweep.data_types import filereader
 from autosweep.utils import generics, io, typing_ext
 
+if TYPE_CHECKING:
+    from autosweep.data_types import metadata
+
 
 class StationConfig(filereader.FileWRer):
     """
@@ -38,6 +42,46 @@ class StationConfig(filereader.FileWRer):
         """
         return self.base_path / self.station_config["paths"]["data"]
 
+    @property
+    def staging_path(self) -> Path | None:
+        """
+        The local folder where the runs are written before being migrated to the data path, from the optional
+        'staging' entry of the paths. It is None when the runs are written directly to the data path.
+
+        :return: The path
+        :rtype: pathlib.Path or None
+        """
+        staging = self.station_config["paths"].get("staging")
+        return None if staging is None else self.base_path / staging
+
+    def run_path(
+        self,
+        run_name: str,
+        dut_info: "metadata.DUTInfo",
+        timestamp: "metadata.TimeStamp",
+    ) -> Path:
+        """
+        The folder of a run within the data path. With the 'flat' layout (the default), every run is directly in the
+        data path. With the 'sharded' layout, set with the optional 'layout' entry of the paths, the runs are in
+        '<part number>/<YYYYMM>' subfolders, so no folder holds too many runs.
+
+        :param run_name: The name of the run folder
+        :type run_name: str
+        :param dut_info: The DUT of the run
+        :type dut_info: autosweep.data_types.metadata.DUTInfo
+        :param timestamp: The start of the run
+        :type timestamp: autosweep.data_types.metadata.TimeStamp
+        :return: The path
+        :rtype: pathlib.Path
+        """
+        layout = self.station_config["paths"].get("layout", "flat")
+        if layout == "flat":
+            return self.data_path / run_name
+        if layout == "sharded":
+            month = timestamp.timestamp.strftime("%Y%m")
+            return self.data_path / dut_info.part_num / month / run_name
+        raise ValueError("The 'layout' of the paths must be 'flat' or 'sharded'.")
+
     @property
     def instruments(self) -> types.MappingProxyType:
         """
@@ -48,6 +92,17 @@ class StationConfig(filereader.FileWRer):
         """
         return self.station_config["instruments"]
 
+    @property
+    def raw_data_format(self) -> dict:
+        """
+        The default format of the raw data saved by the tests, e.g. {"layout": "npy", "dtype": "float32"}, see
+        autosweep.tests.AbsTest.save_data(). It is empty when not defined.
+
+        :return: The raw data format
+        :rtype: dict
+        """
+        return dict(self.station_config.get("raw_data", {}))
+
     def to_json(self, path: typing_ext.PathLike):
         io.write_json(data=self.to_dict(), path=path)
 
@@ -0,0 +1,245 @@
+import hashlib
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from autosweep.utils import io, typing_ext
+
+# written in a staged run once it is complete, it holds where the run must be migrated to. A migrator claims a run by
+# renaming its marker to a name of its own (CLAIM_FNAME), so a run is never migrated by two migrators at once.
+MARKER_FNAME = ".migrate.json"
+CLAIM_FNAME = ".migrate.{owner}.json"
+_MARKERS = ".migrate*.json"
+
+# a claim is refreshed for every file copied, a claim older than CLAIM_TIMEOUT (in s) was left by a process which died
+CLAIM_TIMEOUT = 600
+
+
+def stage(
+    run_path: typing_ext.PathLike,
+    dst_path: typing_ext.PathLike,
+    extras: tuple[typing_ext.PathLike, ...] = (),
+) -> None:
+    """
+    Marks a run written in the staging folder as complete and ready to be migrated.
+
+    :param run_path: The folder of the run, in the staging folder
+    :type run_path: str or pathlib.Path
+    :param dst_path: The folder the run must be migrated to
+    :type dst_path: str or pathlib.Path
+    :param extras: Other files of the run, next to its folder, to migrate next to the destination, e.g. its archive
+    :type extras: tuple[str or pathlib.Path, ...], optional
+    :return: None
+    """
+    marker = {"dst": str(dst_path), "extras": [Path(p).name for p in extras]}
+    io.write_json(data=marker, path=Path(run_path) / MARKER_FNAME, atomic=True)
+
+
+class Migrator:
+    """
+    Moves the runs written in a local staging folder to the data path, which is usually on slow network storage, in
+    background threads. Every file is copied into a temporary folder next to the destination, verified against the
+    staged file (size and hash), then the folder is renamed to its final name and the staged run is deleted. A failed
+    migration is retried, and a run which still could not be migrated stays in the staging folder, where it is picked up
+    by the next call to 'migrate_pending()'.
+
+    Every migrator claims the runs it migrates, so several migrators, e.g. the one of a run still migrating and the one
+    of the next run picking up the pending runs, can share a staging folder. A run claimed by another migrator, or
+    already migrated, is skipped. The stale claims, left by a process which died, are released by 'migrate_pending()'.
+
+    :param retries: The number of attempts to migrate a run
+    :type retries: int, default 3
+    :param delay: The time to wait before the first retry, doubled for every retry, in s
+    :type delay: float, default 1
+    """
+
+    def __init__(self, retries: int = 3, delay: float = 1.0):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        if retries < 1:
+            raise ValueError("The argument 'retries' must be at least 1.")
+
+        self.retries = retries
+        self.delay = delay
+
+        self._threads = []
+        # the staged runs which could not be migrated
+        self.failed = []
+
+        # the owner of the claims of this migrator
+        self.owner = f"{socket.gethostname()}_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+
+    def start(self, run_path: typing_ext.PathLike) -> threading.Thread:
+        """
+        Migrates a staged run in a background thread. The thread is not a daemon, so the process does not exit
+        before the migration is done.
+
+        :param run_path: The folder of the run, in the staging folder, marked with stage()
+        :type run_path: str or pathlib.Path
+        :return: The thread
+        :rtype: threading.Thread
+        """
+        thread = threading.Thread(
+            target=self.migrate,
+            kwargs={"run_path": Path(run_path)},
+            name=f"{self.__class__.__name__}-{Path(run_path).name}",
+        )
+        thread.start()
+        self._threads.append(thread)
+        return thread
+
+    def migrate_pending(
+        self, staging_path: typing_ext.PathLike
+    ) -> list[threading.Thread]:
+        """
+        Starts migrating every complete run left in a staging folder, e.g. after a network outage
+
+        :param staging_path: The staging folder
+        :type staging_path: str or pathlib.Path
+        :return: The threads
+        :rtype: list[threading.Thread]
+        """
+        staging_path = Path(staging_path)
+        if not staging_path.is_dir():
+            return []
+        for claim in staging_path.glob(f"*/{CLAIM_FNAME.format(owner='*')}"):
+            self._release_stale(claim=claim)
+        runs = sorted(p.parent for p in staging_path.glob(f"*/{MARKER_FNAME}"))
+        return [self.start(run_path=p) for p in runs]
+
+    def wait(self) -> bool:
+        """
+        Waits for every started migration
+
+        :return: True if every run was migrated
+        :rtype: bool
+        """
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        return not self.failed
+
+    def migrate(self, run_path: typing_ext.PathLike) -> bool:
+        """
+        Migrates a staged run, with retries
+
+        :param run_path: The folder of the run, in the staging folder, marked with stage()
+        :type run_path: str or pathlib.Path
+        :return: True if the run was migrated
+        :rtype: bool
+        """
+        run_path = Path(run_path)
+        claim = run_path / CLAIM_FNAME.format(owner=self.owner)
+        try:
+            os.rename(run_path / MARKER_FNAME, claim)
+        except FileNotFoundError:
+            # the run was migrated, or is being migrated by another migrator
+            self.logger.info(f"'{run_path.name}' is already migrated or claimed")
+            return True
+        marker = io.read_json(path=claim)
+        dst_path = Path(marker["dst"])
+
+        delay = self.delay
+        for attempt in range(1, self.retries + 1):
+            try:
+                self._copy(src=run_path, dst=dst_path, claim=claim)
+                for name in marker["extras"]:
+                    self._copy_file(
+                        src=run_path.parent / name, dst=dst_path.parent / name
+                    )
+            except OSError as e:
+                self.logger.warning(
+                    f"Attempt {attempt} to migrate '{run_path}' to '{dst_path}' failed: {e}"
+                )
+                if attempt < self.retries:
+                    time.sleep(delay)
+                    delay *= 2
+                continue
+
+            try:
+                shutil.rmtree(run_path)
+            except FileNotFoundError:
+                # removed meanwhile, e.g. by hand
+                pass
+            for name in marker["extras"]:
+                (run_path.parent / name).unlink(missing_ok=True)
+            self.logger.info(f"Migrated '{run_path.name}' to '{dst_path}'")
+            return True
+
+        # the claim is released, so the run is picked up by the next call to 'migrate_pending()'
+        os.replace(claim, run_path / MARKER_FNAME)
+        self.logger.error(
+            f"Could not migrate '{run_path}', it stays in the staging folder"
+        )
+        self.failed.append(run_path)
+        return False
+
+    def _release_stale(self, claim: Path) -> None:
+        try:
+            if time.time() - claim.stat().st_mtime < CLAIM_TIMEOUT:
+                return
+            os.rename(claim, claim.parent / MARKER_FNAME)
+        except FileNotFoundError:
+            return
+        self.logger.warning(
+            f"Released the stale claim '{claim.name}' of '{claim.parent}'"
+        )
+
+    def _copy(self, src: Path, dst: Path, claim: Path) -> None:
+        # a run migrated by an interrupted attempt, before the staged run was deleted, is only verified
+        if dst.exists():
+            self._verify(src=src, dst=dst)
+            return
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        # the copies left by the earlier attempts, of any migrator, are removed, the run is only claimed by this one
+        for tmp in dst.parent.glob(f"{dst.name}.*.partial"):
+            shutil.rmtree(tmp)
+        tmp = dst.with_name(f"{dst.name}.{self.owner}.partial")
+
+        def copy_function(file_src, file_dst):
+            claim.touch()
+            return shutil.copy2(file_src, file_dst)
+
+        shutil.copytree(
+            src,
+            tmp,
+            ignore=shutil.ignore_patterns(_MARKERS),
+            copy_function=copy_function,
+        )
+        self._verify(src=src, dst=tmp)
+        os.replace(tmp, dst)
+
+    def _copy_file(self, src: Path, dst: Path) -> None:
+        if not (dst.exists() and _same_file(src=src, dst=dst)):
+            tmp = dst.with_name(f"{dst.name}.{self.owner}.partial")
+            shutil.copy2(src, tmp)
+            if not _same_file(src=src, dst=tmp):
+                raise OSError(f"The copy of '{src}' does not match it")
+            os.replace(tmp, dst)
+
+    @staticmethod
+    def _verify(src: Path, dst: Path) -> None:
+        for p in src.rglob("*"):
+            if p.is_file() and not p.match(_MARKERS):
+                if not _same_file(src=p, dst=dst / p.relative_to(src)):
+                    raise OSError(f"The copy of '{p}' does not match it")
+
+
+def _same_file(src: Path, dst: Path) -> bool:
+    if not dst.is_file() or src.stat().st_size != dst.stat().st_size:
+        return False
+    return _digest(path=src) == _digest(path=dst)
+
+
+def _digest(path: Path) -> bytes:
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.digest()
@@ -0,0 +1,298 @@
+import argparse
+import contextlib
+import logging
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import orjson
+
+from autosweep.data_types import metadata
+from autosweep.exec_helpers import status_writer
+from autosweep.utils import generics, io, typing_ext
+
+if TYPE_CHECKING:
+    from autosweep.test_exec import TestExec
+
+# the name of the index file, in the folder holding the runs
+INDEX_FNAME = "run_index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    name TEXT PRIMARY KEY,
+    part_num TEXT,
+    ser_num TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    recipe_hash TEXT,
+    status TEXT,
+    steps TEXT,
+    specs TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_dut ON runs (part_num, ser_num, start_time);
+CREATE INDEX IF NOT EXISTS runs_start ON runs (start_time);
+"""
+
+_COLS = (
+    "name",
+    "part_num",
+    "ser_num",
+    "start_time",
+    "end_time",
+    "recipe_hash",
+    "status",
+    "steps",
+    "specs",
+)
+
+
+class RunIndex:
+    """
+    An SQLite index of the runs saved in a data folder, so finding runs does not need to read the status file of every
+    run. The TestExec adds every run to the index of its data folder when it finishes (see index_run()), and the index
+    can be rebuilt from the status files at any time.
+
+    The runs are keyed by their path relative to the data folder, so both layouts of the data path are supported (see
+    autosweep.utils.generics.find_run_dirs()). The timestamps are stored in the TimeStamp format, which sorts
+    chronologically. The runs are returned as dicts with the path of the run ('path'), 'part_num', 'ser_num', 'start'
+    and 'end' (TimeStamp), 'recipe_hash', 'status', 'steps' and 'specs'. Entries missing from older status files are
+    None.
+
+    :param path: The folder holding the runs, the index file is created in it
+    :type path: str or pathlib.Path
+    """
+
+    def __init__(self, path: typing_ext.PathLike):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.path = Path(path)
+        self.index_path = self.path / INDEX_FNAME
+
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # a connection per operation, committed on success, so the index can be used from any thread
+        con = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def upsert(self, run_path: typing_ext.PathLike, status: dict) -> None:
+        """
+        Adds a run to the index, or updates it
+
+        :param run_path: The folder of the run, within the indexed folder
+        :type run_path: str or pathlib.Path
+        :param status: The contents of the status file of the run
+        :type status: dict
+        :return: None
+        """
+        with self._connect() as con:
+            self._upsert(con=con, rows=[self._to_row(run_path=run_path, status=status)])
+
+    def rebuild(self, workers: int = 8) -> int:
+        """
+        Rebuilds the whole index from the status files of the runs in the indexed folder, which are read in parallel.
+        Runs without a status file are not indexed.
+
+        :param workers: The number of threads reading the status files
+        :type workers: int, default 8
+        :return: The number of indexed runs
+        :rtype: int
+        """
+        paths = [p / "status.json" for p in generics.find_run_dirs(path=self.path)]
+
+        rows = []
+        for path, status, error in io.load_many(paths=paths, workers=workers):
+            if isinstance(error, FileNotFoundError):
+                continue
+            if error is not None:
+                self.logger.warning(f"Could not read '{path}': {error}")
+                continue
+            rows.append(self._to_row(run_path=path.parent, status=status))
+
+        with self._connect() as con:
+            con.execute("DELETE FROM runs")
+            self._upsert(con=con, rows=rows)
+
+        self.logger.info(f"Indexed {len(rows)} runs in '{self.index_path}'")
+        return len(rows)
+
+    def last_run(
+        self, part_num: str | None = None, ser_num: str | None = None
+    ) -> Path | None:
+        """
+        The latest run, optionally of a DUT
+
+        :param part_num: The full part number, e.g. 'ABC-R1'
+        :type part_num: str, optional
+        :param ser_num: The serial number
+        :type ser_num: str, optional
+        :return: The path to the latest run, None if there is no matching run
+        :rtype: pathlib.Path or None
+        """
+        runs = self.runs_for_dut(part_num=part_num, ser_num=ser_num, limit=1)
+        return runs[0]["path"] if runs else None
+
+    def runs_for_dut(
+        self,
+        part_num: str | None = None,
+        ser_num: str | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """
+        The runs of a DUT, or of every DUT with a part number or a serial number, latest first
+
+        :param part_num: The full part number, e.g. 'ABC-R1'
+        :type part_num: str, optional
+        :param ser_num: The serial number
+        :type ser_num: str, optional
+        :param limit: The maximum number of runs to return
+        :type limit: int, optional
+        :return: The runs
+        :rtype: list[dict]
+        """
+        where, args = [], []
+        for col, val in (("part_num", part_num), ("ser_num", ser_num)):
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(str(val))
+        return self._select(where=where, args=args, limit=limit)
+
+    def runs_between(
+        self,
+        start: "str | metadata.TimeStamp | None" = None,
+        end: "str | metadata.TimeStamp | None" = None,
+    ) -> list[dict]:
+        """
+        The runs which started within a time window, latest first
+
+        :param start: The start of the window, included, by default the first run
+        :type start: str or autosweep.data_types.metadata.TimeStamp, optional
+        :param end: The end of the window, excluded, by default the last run
+        :type end: str or autosweep.data_types.metadata.TimeStamp, optional
+        :return: The runs
+        :rtype: list[dict]
+        """
+        where, args = [], []
+        if start is not None:
+            where.append("start_time >= ?")
+            args.append(str(metadata.TimeStamp(timestamp=start)))
+        if end is not None:
+            where.append("start_time < ?")
+            args.append(str(metadata.TimeStamp(timestamp=end)))
+        return self._select(where=where, args=args)
+
+    def _select(
+        self, where: list[str], args: list, limit: int | None = None
+    ) -> list[dict]:
+        query = f"SELECT {', '.join(_COLS)} FROM runs"
+        if where:
+            query += f" WHERE {' AND '.join(where)}"
+        query += " ORDER BY start_time DESC, name DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            args = [*args, limit]
+
+        with self._connect() as con:
+            rows = con.execute(query, args).fetchall()
+        return [self._from_row(row=r) for r in rows]
+
+    @staticmethod
+    def _upsert(con: sqlite3.Connection, rows: list[tuple]) -> None:
+        con.executemany(
+            f"INSERT OR REPLACE INTO runs ({', '.join(_COLS)}) VALUES ({', '.join('?' * len(_COLS))})",
+            rows,
+        )
+
+    def _to_row(self, run_path: typing_ext.PathLike, status: dict) -> tuple:
+        dut = status["dut_info"]
+        if not isinstance(dut, metadata.DUTInfo):
+            dut = metadata.DUTInfo.from_dict(data=dut)
+        timestamp = status.get("timestamp") or {}
+
+        def dumps(key):
+            if status.get(key) is None:
+                return None
+            return orjson.dumps(
+                status[key],
+                default=io.json_serializer,
+                option=orjson.OPT_SERIALIZE_NUMPY,
+            )
+
+        return (
+            generics.relative_run_path(path=self.path, run_path=run_path),
+            dut.part_num,
+            dut.ser_num,
+            *(
+                None if timestamp.get(k) is None else str(timestamp[k])
+                for k in ("start", "end")
+            ),
+            status.get("recipe_hash"),
+            status.get("status"),
+            dumps("steps"),
+            dumps("specs"),
+        )
+
+    def _from_row(self, row: tuple) -> dict:
+        name, part_num, ser_num, start, end, recipe_hash, status, steps, specs = row
+        return {
+            "path": self.path / name,
+            "part_num": part_num,
+            "ser_num": ser_num,
+            "start": None if start is None else metadata.TimeStamp(timestamp=start),
+            "end": None if end is None else metadata.TimeStamp(timestamp=end),
+            "recipe_hash": recipe_hash,
+            "status": status,
+            "steps": None if steps is None else orjson.loads(steps),
+            "specs": None if specs is None else orjson.loads(specs),
+        }
+
+
+def index_run(test_exec: "TestExec") -> None:
+    """
+    Adds a finished run to the index of the data path, at its final location. Used by the TestExec once the report
+    and the status file are written.
+
+    :param test_exec: The test exec
+    :type test_exec: autosweep.test_exec.TestExec
+    :return: None
+    """
+    RunIndex(path=test_exec.data_path).upsert(
+        run_path=test_exec.dst_path,
+        status=status_writer.gen_status(test_exec=test_exec),
+    )
+
+
+def main(args: list[str] | None = None) -> None:
+    """
+    The command line interface, e.g. 'python -m autosweep.exec_helpers.run_index rebuild <data folder>'
+
+    :param args: The command line arguments, by default those of the process
+    :type args: list[str], optional
+    :return: None
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m autosweep.exec_helpers.run_index",
+        description="Maintains the SQLite index of the runs in a data folder.",
+    )
+    parser.add_argument("command", choices=("rebuild", "last"))
+    parser.add_argument("path", help="The folder holding the runs")
+    parser.add_argument("--part-num", help="The part number, for 'last'")
+    parser.add_argument("--ser-num", help="The serial number, for 'last'")
+    parsed = parser.parse_args(args)
+
+    index = RunIndex(path=parsed.path)
+    if parsed.command == "rebuild":
+        print(f"Indexed {index.rebuild()} runs")
+    else:
+        print(index.last_run(part_num=parsed.part_num, ser_num=parsed.ser_num))
+
+
+if __name__ == "__main__":
+    main()
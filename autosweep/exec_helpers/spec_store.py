@@ -0,0 +1,325 @@
+import logging
+import os
+import socket
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import orjson
+
+from autosweep.data_types import metadata
+from autosweep.utils import generics, typing_ext
+
+if TYPE_CHECKING:
+    from autosweep.test_exec import TestExec
+
+# the name of the store folder, in the folder holding the runs
+STORE_DNAME = generics.STORE_DNAME
+
+# the columns of the store, one row per spec of every run
+COLS = ("run", "part_num", "ser_num", "start", "heading", "spec", "unit", "value")
+
+# the lock held while compacting, a lock older than LOCK_TIMEOUT (in s) was left by a process which died
+LOCK_FNAME = ".compact.lock"
+LOCK_TIMEOUT = 600
+
+
+class SpecStore:
+    """
+    A station-wide, columnar store of the specs of every run, so trend and yield queries are a single read of a few
+    files instead of opening the 'specs.csv' file of every run. Every run appends a small chunk file with one row per
+    spec, and the chunks are periodically merged (compacted) into larger parts. Each file holds one numpy array per
+    column (see COLS): the start of the runs is a 'datetime64[s]' array and the values a float array (booleans are 0 or
+    1), all others are string arrays.
+
+    The parts are tiered: a compaction merges the chunks into a part of tier 0, and 'parts_per_tier' parts of a tier
+    are merged into a part of the next tier. Every row is therefore only rewritten once per tier, whatever the size of
+    the store.
+
+    :param path: The folder holding the runs, the store folder is created in it
+    :type path: str or pathlib.Path
+    :param compact_every: The number of chunks which triggers a compaction when appending
+    :type compact_every: int, default 64
+    :param parts_per_tier: The number of parts of a tier which are merged into a part of the next tier
+    :type parts_per_tier: int, default 8
+    """
+
+    def __init__(
+        self,
+        path: typing_ext.PathLike,
+        compact_every: int = 64,
+        parts_per_tier: int = 8,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        if parts_per_tier < 2:
+            raise ValueError("The argument 'parts_per_tier' must be at least 2.")
+
+        self.path = Path(path) / STORE_DNAME
+        self.path.mkdir(exist_ok=True)
+        self.compact_every = compact_every
+        self.parts_per_tier = parts_per_tier
+
+    def append(
+        self,
+        run_path: typing_ext.PathLike,
+        dut_info: metadata.DUTInfo,
+        start: metadata.TimeStamp,
+        specs: dict[str, list[dict]],
+    ) -> None:
+        """
+        Appends the specs of a run as a new chunk, then compacts the store if there are too many chunks
+
+        :param run_path: The folder of the run, stored relative to the folder holding the runs
+        :type run_path: str or pathlib.Path
+        :param dut_info: The DUT of the run
+        :type dut_info: autosweep.data_types.metadata.DUTInfo
+        :param start: The start of the run
+        :type start: autosweep.data_types.metadata.TimeStamp
+        :param specs: The specs, as held by autosweep.exec_helpers.reporter.ResultsHold.specs
+        :type specs: dict[str, list[dict]]
+        :return: None
+        """
+        rows = [
+            (h, s["spec"], s["unit"], s["value"]) for h, ss in specs.items() for s in ss
+        ]
+        if not rows:
+            return
+
+        headings, names, units, values = zip(*rows)
+        n = len(rows)
+        data = {
+            "run": np.full(
+                n, generics.relative_run_path(path=self.path.parent, run_path=run_path)
+            ),
+            "part_num": np.full(n, dut_info.part_num),
+            "ser_num": np.full(n, dut_info.ser_num),
+            "start": np.full(n, np.datetime64(start.timestamp, "s")),
+            "heading": np.array(headings, dtype=str),
+            "spec": np.array(names, dtype=str),
+            "unit": np.array(units, dtype=str),
+            "value": np.array(values, dtype=float),
+        }
+        self._write(name=f"chunk_{start}_{uuid.uuid4().hex}.npz", data=data)
+
+        if len(self._files(prefix="chunk_")) >= self.compact_every:
+            self.compact()
+
+    def compact(self, full: bool = False) -> None:
+        """
+        Merges the chunks into a new part, then the parts of every tier which has 'parts_per_tier' parts into a part of
+        the next tier. With 'full=True', every chunk and part is merged into a single part instead. A part lists the
+        files it holds, so a reader never counts a row twice, even if it lists the files while they are being deleted.
+        Only one process compacts the store at a time, the others skip it.
+
+        :param full: Merge the whole store into a single part
+        :type full: bool, default False
+        :return: None
+        """
+        lock = self._lock()
+        if lock is None:
+            self.logger.info("The spec store is already being compacted")
+            return
+
+        try:
+            self._clean()
+            if full:
+                files = self._files(prefix="")
+                tier = max((self._tier(path=p) for p in files), default=0)
+                self._merge(files=files, tier=tier)
+                return
+
+            self._merge(files=self._files(prefix="chunk_"), tier=0)
+            tier = 0
+            while (
+                len(parts := self._files(prefix=f"part_{tier}_")) >= self.parts_per_tier
+            ):
+                self._merge(files=parts, tier=tier + 1)
+                tier += 1
+        finally:
+            os.close(lock)
+            (self.path / LOCK_FNAME).unlink(missing_ok=True)
+
+    def query(
+        self,
+        spec: str | None = None,
+        heading: str | None = None,
+        part_num: str | None = None,
+        ser_num: str | None = None,
+        start: str | metadata.TimeStamp | None = None,
+        end: str | metadata.TimeStamp | None = None,
+    ) -> dict[str, dict[str, np.ndarray]]:
+        """
+        Reads the specs of every matching run, sorted by start time
+
+        :param spec: The name of a spec
+        :type spec: str, optional
+        :param heading: The report heading of the specs
+        :type heading: str, optional
+        :param part_num: The full part number of the DUTs, e.g. 'ABC-R1'
+        :type part_num: str, optional
+        :param ser_num: The serial number of the DUTs
+        :type ser_num: str, optional
+        :param start: The start of the time window, included
+        :type start: str or autosweep.data_types.metadata.TimeStamp, optional
+        :param end: The end of the time window, excluded
+        :type end: str or autosweep.data_types.metadata.TimeStamp, optional
+        :return: In spec name (key) - columns (value) pairs, where the columns are a dict of arrays, see COLS
+        :rtype: dict[str, dict[str, np.ndarray]]
+        """
+        data = self.read()
+
+        mask = np.ones(len(data["value"]), dtype=bool)
+        for col, val in (
+            ("spec", spec),
+            ("heading", heading),
+            ("part_num", part_num),
+            ("ser_num", ser_num),
+        ):
+            if val is not None:
+                mask &= data[col] == str(val)
+        if start is not None:
+            mask &= data["start"] >= np.datetime64(
+                metadata.TimeStamp(timestamp=start).timestamp, "s"
+            )
+        if end is not None:
+            mask &= data["start"] < np.datetime64(
+                metadata.TimeStamp(timestamp=end).timestamp, "s"
+            )
+
+        data = {k: v[mask] for k, v in data.items()}
+        order = np.argsort(data["start"], kind="stable")
+        data = {k: v[order] for k, v in data.items()}
+
+        return {
+            str(s): {k: v[data["spec"] == s] for k, v in data.items()}
+            for s in np.unique(data["spec"])
+        }
+
+    def read(self) -> dict[str, np.ndarray]:
+        """
+        Reads the whole store
+
+        :return: The columns, see COLS
+        :rtype: dict[str, np.ndarray]
+        """
+        # the files merged by a compaction are deleted once their part is written, a file listed before being deleted
+        # is not read, but the new part is, so the files are listed again
+        for attempt in range(10):
+            try:
+                return self._read(files=self._files(prefix=""))
+            except FileNotFoundError:
+                if attempt == 9:
+                    raise
+
+    @staticmethod
+    def _tier(path: Path) -> int:
+        # the chunks count as tier 0, as do the parts written before the parts were tiered ('part_<id>.npz')
+        tier = path.name.split("_")[1]
+        return int(tier) if path.name.startswith("part_") and tier.isdigit() else 0
+
+    def _merge(self, files: list[Path], tier: int) -> None:
+        # merges some files into a new part of a tier
+        if len(files) < 2:
+            return
+        # the lock is refreshed, so a long compaction is not taken for a dead one
+        (self.path / LOCK_FNAME).touch()
+
+        data = self._read(files=files)
+        data["sources"] = np.array([p.name for p in files], dtype=str)
+        self._write(name=f"part_{tier}_{uuid.uuid4().hex}.npz", data=data)
+
+        for p in files:
+            p.unlink()
+        self.logger.info(
+            f"Merged {len(files)} files of the spec store into tier {tier}"
+        )
+
+    def _clean(self) -> None:
+        # deletes the files already merged into a part by a compaction which was interrupted before deleting them
+        for p in self._files(prefix="part_"):
+            with np.load(p, allow_pickle=False) as f:
+                sources = f["sources"] if "sources" in f.files else ()
+            for name in sources:
+                (self.path / str(name)).unlink(missing_ok=True)
+
+    def _lock(self) -> int | None:
+        # the lock file is created exclusively, it holds who took it and when. A lock left by a process which died
+        # while compacting is broken once it is older than LOCK_TIMEOUT.
+        lock_path = self.path / LOCK_FNAME
+        for _ in range(2):
+            try:
+                lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    age = time.time() - lock_path.stat().st_mtime
+                    owner = lock_path.read_bytes().decode(errors="replace")
+                except FileNotFoundError:
+                    continue
+                if age < LOCK_TIMEOUT:
+                    return None
+                self.logger.warning(
+                    f"Breaking the stale lock of the spec store: {owner}"
+                )
+                lock_path.unlink(missing_ok=True)
+                continue
+
+            owner = {
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "time": time.time(),
+            }
+            os.write(lock, orjson.dumps(owner))
+            return lock
+        return None
+
+    def _read(self, files: list[Path]) -> dict[str, np.ndarray]:
+        tables = {p.name: self._load(path=p) for p in files}
+
+        # the files already merged into a part are skipped
+        merged = {str(s) for t in tables.values() for s in t.pop("sources", ())}
+        return self._concat([t for name, t in tables.items() if name not in merged])
+
+    def _files(self, prefix: str) -> list[Path]:
+        return sorted(self.path.glob(f"{prefix}*.npz"))
+
+    def _write(self, name: str, data: dict[str, np.ndarray]) -> None:
+        # written under a temporary name first, so the readers never see a partial file
+        tmp_path = self.path / f".{name}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **data)
+        os.replace(tmp_path, self.path / name)
+
+    @staticmethod
+    def _load(path: Path) -> dict[str, np.ndarray]:
+        with np.load(path, allow_pickle=False) as f:
+            return {k: f[k] for k in f.files}
+
+    @staticmethod
+    def _concat(tables: list[dict[str, np.ndarray]]) -> dict[str, np.ndarray]:
+        if not tables:
+            empty = {c: np.array([], dtype=str) for c in COLS}
+            empty.update(
+                start=np.array([], dtype="datetime64[s]"),
+                value=np.array([], dtype=float),
+            )
+            return empty
+        return {c: np.concatenate([t[c] for t in tables]) for c in COLS}
+
+
+def record_specs(test_exec: "TestExec") -> None:
+    """
+    Appends the specs of a finished run to the spec store of the data path. Used by the TestExec.
+
+    :param test_exec: The test exec
+    :type test_exec: autosweep.test_exec.TestExec
+    :return: None
+    """
+    SpecStore(path=test_exec.data_path).append(
+        run_path=test_exec.dst_path,
+        dut_info=test_exec.dut_info,
+        start=test_exec.timestamp["start"],
+        specs=test_exec.test_results.specs,
+    )
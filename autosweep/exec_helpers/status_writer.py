@@ -7,9 +7,30 @@ if TYPE_CHECKING:
     from autosweep.test_exec import TestExec
 
 
+def gen_status(test_exec: "TestExec") -> dict:
+    """
+    Collects the status of a run: the DUT info, the timestamps, the overall status ('complete', or 'error' when the
+    run raised an exception), the hash of the recipe, the recipe steps which were completed and the specs.
+
+    :param test_exec: The test exec
+    :type test_exec: autosweep.test_exec.TestExec
+    :return: The status
+    :rtype: dict
+    """
+    return {
+        "dut_info": test_exec.dut_info,
+        "timestamp": test_exec.timestamp,
+        "status": test_exec.status,
+        "recipe_hash": test_exec.recipe.digest,
+        "steps": list(test_exec.test_instances),
+        "specs": test_exec.test_results.specs,
+    }
+
+
 def write_status(test_exec: "TestExec", path: PathLike) -> None:
     """
-    Used to write the status file
+    Used to write the status file. It is always written as plain JSON, whatever the compression of the raw data: it is
+    only a few kB, and it is opened by people and other tools as well as by the run scans.
 
     :param test_exec: The test exec
     :type test_exec: autosweep.test_exec.TestExec
@@ -17,6 +38,4 @@ def write_status(test_exec: "TestExec", path: PathLike) -> None:
     :type path: str or pathlib.Path
     :return: None
     """
-    out = {"dut_info": test_exec.dut_info, "timestamp": test_exec.timestamp}
-
-    io.write_json(data=out, path=path)
+    io.write_json(data=gen_status(test_exec=test_exec), path=path)
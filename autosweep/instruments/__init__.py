@@ -8,10 +8,20 @@ from autosweep.instruments.instrument_manager import (
 from autosweep.instruments.virt_instr import (
     VirtualInstr,
 )
+from autosweep.instruments.virt_optical import (
+    VirtualLaser,
+    VirtualPolarimeter,
+    VirtualPowerMeter,
+    VirtualSwitch,
+)
 
 __all__ = [
     "AbsInstrument",
     "InstrumentManager",
     "VirtualInstr",
+    "VirtualLaser",
+    "VirtualPolarimeter",
+    "VirtualPowerMeter",
+    "VirtualSwitch",
     "VisaCOM",
 ]
@@ -10,6 +10,10 @@ class InstrumentManager:
     """
     The instrument manager is used by the TestExec to initialize instruments before passing them onto each test step.
     The manager can also be used independently as part of a script, usually within it's context manager.
+
+    The instruments which take a 'shared' argument are passed the 'shared' dict of the manager, which holds the state
+    shared by the instruments of a station, e.g. the optical bench of the virtual optical instruments. It is never set
+    in the station configuration.
     """
 
     def __init__(self, station_config: StationConfig):
@@ -20,6 +24,8 @@ class InstrumentManager:
         self.instr_classes = registrar.INSTR_CLASSES
 
         self._instrs = {}
+        # the state shared by the instruments loaded by this manager
+        self.shared = {}
 
     def __enter__(self):
         return self
@@ -53,7 +59,7 @@ class InstrumentManager:
 
         sig = inspect.signature(obj)
         for par in instr_params:
-            if par not in sig.parameters:
+            if par not in sig.parameters or par == "shared":
                 msg = (
                     f"For the instrument instance name '{instr_name}', the key '{par}' is not defined and "
                     f"should be removed"
@@ -69,6 +75,8 @@ class InstrumentManager:
                     )
                     raise ValueError(msg)
 
+        if "shared" in sig.parameters:
+            instr_params["shared"] = self.shared
         instr = obj(**instr_params)
         self.logger.info(f"[{instr_name}] {instr.idn}")
         self._instrs[instr_name] = instr
@@ -2,6 +2,7 @@ import numpy as np
 
 from autosweep.instruments import abs_instr
 from autosweep.instruments.coms import visa_coms
+from autosweep.utils import ta_math
 
 
 class KeysightN7745C(abs_instr.AbsInstrument):
@@ -108,6 +109,31 @@ class KeysightN7745C(abs_instr.AbsInstrument):
         self.assert_n(n)
         return float(self.com.query(f":READ{n}:POW?"))
 
+    def read_power_to_confidence(
+        self, n, target, confidence=0.95, min_samples=5, max_samples=100
+    ):
+        """
+        Repeats :READ[n]:POW? until the confidence interval of the mean power is narrower than the target, instead of
+        averaging over a fixed time. Strong signals stop after a few readings, weak and noisy ones average for longer.
+        The readings are averaged in linear scale (mW) even when the unit is dBm, then converted back.
+
+        :param n: The power meter channel
+        :param target: The wanted half-width of the confidence interval, in the current power unit (dB or W)
+        :param confidence: The confidence level of the interval, between 0 and 1
+        :param min_samples: The minimum number of readings, at least 2
+        :param max_samples: The maximum number of readings
+        :return: The mean power, the achieved half-width of the confidence interval and the number of readings.
+        """
+        self.assert_n(n)
+        return ta_math.average_to_confidence(
+            sample=lambda: self.read_power(n),
+            target=target,
+            confidence=confidence,
+            min_samples=min_samples,
+            max_samples=max_samples,
+            db=self.sense_power_unit_ask(n) == 0,
+        )
+
     def read_power_all(self):
         """
         Reads all available power channels. It provides its own software triggering and does not need a triggering command.
@@ -185,9 +211,13 @@ class KeysightN7745C(abs_instr.AbsInstrument):
         pyvisa.errors.VisaIOError: VI_ERROR_TMO (-1073807339): Timeout expired before operation completed.
         This can happen when the measurement isn't ready / never triggered
         """
+        # kept in single precision, as sent by the instrument
         result = np.array(
             self.com.com.query_binary_values(
-                ":SENSE:FUNCTION:RESULT?", datatype="f", is_big_endian=False
+                ":SENSE:FUNCTION:RESULT?",
+                datatype="f",
+                is_big_endian=False,
+                container=np.array,
             )
         )
         self.com.read()
@@ -354,7 +354,10 @@ class KeysightN778C(abs_instr.AbsInstrument):
         if val is None:
             return np.array(
                 self.com.com.query_binary_values(
-                    ":POL:SWE:GET?", datatype="f", is_big_endian=False
+                    ":POL:SWE:GET?",
+                    datatype="f",
+                    is_big_endian=False,
+                    container=np.array,
                 )
                 .reshape((-1, 4))
                 .T
@@ -364,7 +367,10 @@ class KeysightN778C(abs_instr.AbsInstrument):
         if val == "SOP":
             return np.array(
                 self.com.com.query_binary_values(
-                    ":POL:SWE:GET? SOP", datatype="f", is_big_endian=False
+                    ":POL:SWE:GET? SOP",
+                    datatype="f",
+                    is_big_endian=False,
+                    container=np.array,
                 )
                 .reshape((-1, 4))
                 .T
@@ -372,7 +378,10 @@ class KeysightN778C(abs_instr.AbsInstrument):
         else:
             return np.array(
                 self.com.com.query_binary_values(
-                    ":POL:SWE:GET? NORM", datatype="f", is_big_endian=False
+                    ":POL:SWE:GET? NORM",
+                    datatype="f",
+                    is_big_endian=False,
+                    container=np.array,
                 )
                 .reshape((-1, 3))
                 .T
@@ -383,11 +392,11 @@ class KeysightN778C(abs_instr.AbsInstrument):
         Returns the logged measured power.
 
         Returns:
-            Numpy array of power [Watt]
+            Numpy array of power [Watt], in single precision like the instrument data
         """
         return np.array(
             self.com.com.query_binary_values(
-                ":POL:FUNC:RES?", datatype="f", is_big_endian=False
+                ":POL:FUNC:RES?", datatype="f", is_big_endian=False, container=np.array
             )
         )
 
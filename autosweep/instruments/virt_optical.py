@@ -0,0 +1,1217 @@
+import functools
+import time
+
+import numpy as np
+
+from autosweep.instruments import abs_instr
+from autosweep.utils import ta_math
+
+
+class VirtualBench:
+    """
+    The optical state shared by the virtual optical instruments of a station: the laser settings, the switch routes and
+    the input polarization state. It also holds the loggers armed by the virtual detectors, which record one sample for
+    every step trigger of a virtual laser sweep. The instruments loaded by an InstrumentManager share a bench, see
+    VirtualOpticalInstr.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Resets the bench to the state after power-on.
+
+        :return: None
+        """
+        self.wvl = 1550.0
+        self.power_mw = 1.0
+        self.laser_on = False
+        self.routes = {}
+        self.input_sop = (1.0, 0.0, 0.0)
+        self._loggers = []
+
+    @property
+    def route(self) -> int:
+        """
+        The switch route, used to change the synthetic DUT with the switch
+
+        :return: The output port connected to the first switch input, 0 if disconnected
+        :rtype: int
+        """
+        return self.routes.get(1, 0)
+
+    def input_power_w(self) -> float:
+        """
+        :return: The laser power reaching the DUT
+        :rtype: float
+        """
+        return 1e-3 * self.power_mw if self.laser_on else 0.0
+
+    def arm(self, callback) -> None:
+        """
+        Arms a logger, which is called once with the wavelengths of the next trigger sequence.
+
+        :param callback: A function taking the array of wavelengths (nm)
+        :return: None
+        """
+        self._loggers.append(callback)
+
+    def disarm(self, callback) -> None:
+        """
+        Removes an armed logger, if it was armed.
+
+        :param callback: The function passed to 'arm()'
+        :return: None
+        """
+        if callback in self._loggers:
+            self._loggers.remove(callback)
+
+    def fire(self, wvls: np.ndarray) -> None:
+        """
+        Sends a sequence of triggers, one per wavelength, to every armed logger.
+
+        :param wvls: The wavelength of the laser at each trigger (nm)
+        :type wvls: np.ndarray
+        :return: None
+        """
+        loggers, self._loggers = self._loggers, []
+        for callback in loggers:
+            callback(wvls)
+
+
+def ring_transmission(
+    wvl: np.ndarray,
+    wvl_0: float = 1550.0,
+    fsr: float = 10.0,
+    finesse: float = 20.0,
+    depth: float = 0.9,
+) -> np.ndarray:
+    """
+    The synthetic through-port transmission of a ring resonator, with notches every FSR.
+
+    :param wvl: The wavelengths (nm)
+    :type wvl: np.ndarray
+    :param wvl_0: The wavelength of one resonance (nm)
+    :type wvl_0: float, default 1550
+    :param fsr: The free spectral range (nm)
+    :type fsr: float, default 10
+    :param finesse: The finesse, the ratio of the FSR to the resonance linewidth
+    :type finesse: float, default 20
+    :param depth: The depth of the notches, between 0 and 1
+    :type depth: float, default 0.9
+    :return: The linear transmission
+    :rtype: np.ndarray
+    """
+    coeff = (2 * finesse / np.pi) ** 2
+    phase = np.sin(np.pi * (np.asarray(wvl) - wvl_0) / fsr)
+    return 1 - depth / (1 + coeff * np.square(phase))
+
+
+class VirtualOpticalInstr(abs_instr.AbsInstrument):
+    """
+    The base class of the virtual optical instruments. Every public method defined by an inheriting class waits for a
+    modelled call latency before it runs, which is 'latency' plus a uniformly distributed random extra time of up to
+    'jitter'. Calls made from within another call do not wait again. Methods listed in '_host_side' run on the
+    computer, not on the instrument, so they only wait for the calls they make.
+
+    The instruments loaded by the same InstrumentManager with the same 'bench' name share a VirtualBench, so a station
+    can hold several independent benches, and the benches of two stations never interact. An instrument created without
+    a manager has a bench of its own.
+
+    :param latency: The fixed time taken by every call (s)
+    :type latency: float, default 0
+    :param jitter: The maximum random extra time taken by every call (s)
+    :type jitter: float, default 0
+    :param seed: The seed of the random generator used for the jitter and the noise
+    :type seed: int, optional
+    :param bench: The name of the bench of the instrument
+    :type bench: str, default 'default'
+    :param shared: The objects shared by the instruments of a manager, passed by the InstrumentManager
+    :type shared: dict, optional
+    """
+
+    _model = "Virtual"
+    _host_side = ("close",)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, attr in list(vars(cls).items()):
+            if (
+                callable(attr)
+                and not name.startswith("_")
+                and name not in cls._host_side
+            ):
+                setattr(cls, name, cls._with_latency(attr))
+
+    @staticmethod
+    def _with_latency(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            # calls made from within another call are part of the same exchange with the instrument
+            if not self._depth:
+                self._wait()
+            self._depth += 1
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self._depth -= 1
+
+        return wrapper
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int | None = None,
+        bench: str = "default",
+        shared: dict | None = None,
+    ):
+        if latency < 0 or jitter < 0:
+            raise ValueError("The arguments 'latency' and 'jitter' must be positive.")
+
+        self.latency = latency
+        self.jitter = jitter
+        self._depth = 0
+        self.rng = np.random.default_rng(seed)
+        if shared is None:
+            self.bench = VirtualBench()
+        else:
+            self.bench = shared.setdefault(
+                (VirtualBench.__name__, bench), VirtualBench()
+            )
+        super().__init__(com=None)
+
+    def _wait(self) -> None:
+        delay = self.latency + self.jitter * self.rng.random()
+        if delay > 0:
+            time.sleep(delay)
+
+    def get_idn(self) -> str:
+        self._idn = f"Virtual Instruments,{self._model},VIRT0001,v1.0.0"
+        return self.idn
+
+    def idn_ask(self) -> str:
+        return self.idn
+
+    def idn_ask_dict(self) -> dict:
+        vendor, model, serial, version = self.idn_ask().split(",")
+        return {"vendor": vendor, "model": model, "serial": serial, "version": version}
+
+    def model(self) -> str:
+        return self._model
+
+    def system_error_ask(self) -> str:
+        return '+0,"No error"'
+
+    def clear_errors(self) -> None:
+        pass
+
+    def print_if_errors(self) -> None:
+        pass
+
+    def assert_errors(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """
+        Since this is a virtual instrument, closing the com port does not do anything.
+
+        :return: None
+        """
+        pass
+
+
+class VirtualLaser(VirtualOpticalInstr):
+    """
+    A virtual tunable laser with the method surface of the Keysight8164B and KeysightN777C drivers. A started sweep
+    fires a step trigger to the armed virtual detectors at every step wavelength, and takes (span / speed) *
+    'time_scale' seconds.
+
+    :param latency: The fixed time taken by every call (s)
+    :type latency: float, default 0
+    :param jitter: The maximum random extra time taken by every call (s)
+    :type jitter: float, default 0
+    :param seed: The seed of the random generator used for the jitter
+    :type seed: int, optional
+    :param time_scale: The scale applied to the duration of sweeps, 0 makes sweeps instantaneous
+    :type time_scale: float, default 1
+    :param min_nm: The minimum wavelength (nm)
+    :type min_nm: float, default 1450
+    :param max_nm: The maximum wavelength (nm)
+    :type max_nm: float, default 1650
+    :param bench: The name of the bench of the instrument
+    :type bench: str, default 'default'
+    :param shared: The objects shared by the instruments of a manager, passed by the InstrumentManager
+    :type shared: dict, optional
+    """
+
+    _model = "VirtualLaser"
+    _host_side = ("close", "dump_state", "sweep_continuous_start")
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int | None = None,
+        time_scale: float = 1.0,
+        min_nm: float = 1450.0,
+        max_nm: float = 1650.0,
+        bench: str = "default",
+        shared: dict | None = None,
+    ):
+        super().__init__(
+            latency=latency, jitter=jitter, seed=seed, bench=bench, shared=shared
+        )
+        self.time_scale = time_scale
+        self._min_nm = min_nm
+        self._max_nm = max_nm
+        self._sweep = {"mode": "CONT", "start": min_nm, "stop": max_nm}
+        self._sweep |= {"step": 0.1, "speed": 10.0, "cycles": 1, "dwell": 0.0}
+        self._sweep_end = 0.0
+        self._trigger = {"configuration": "DEF", "output": "DIS"}
+        self._status_masks = {"OSESM": 0, "OSSEM": 0}
+
+    # Keysight8164B surface
+    def source_channel_wavelength(self, source, channel, wavelength) -> None:
+        wvl = float(str(wavelength).upper().removesuffix("NM"))
+        self.source_wavelength_nm(wvl)
+
+    def output_channel_state(self, output, channel, state) -> None:
+        self.bench.laser_on = bool(state)
+
+    def source_channel_wavelength_sweep_state(self, source, channel, state) -> None:
+        self.source_wavelength_sweep_state(state)
+
+    def source_channel_wavelength_sweep_state_ask(
+        self, source=None, channel=None
+    ) -> bool:
+        return self.source_wavelength_sweep_state_ask() == 1
+
+    def source_channel_wavelength_sweep_softtrigger(
+        self, source=None, channel=None
+    ) -> None:
+        pass
+
+    def trigger_channel_output(self, trigger, channel, mode) -> None:
+        pass
+
+    # KeysightN777C surface
+    def get_min_nm(self) -> float:
+        return self._min_nm
+
+    def get_max_nm(self) -> float:
+        return self._max_nm
+
+    def validate_wavelength_nm(self, val) -> None:
+        assert (
+            self._min_nm <= val <= self._max_nm
+        ), f"Require {self._min_nm} <= {val} <= {self._max_nm}"
+
+    def source_wavelength_nm(self, val) -> None:
+        self.validate_wavelength_nm(val)
+        self.bench.wvl = float(val)
+
+    def source_wavelength_ask(self, val=None) -> float:
+        return 1e-9 * self.source_wavelength_ask_nm(val)
+
+    def source_wavelength_ask_nm(self, val=None) -> float:
+        if val is None:
+            return self.bench.wvl
+        val = val.upper()
+        assert val in ("MIN", "MAX", "DEF")
+        return {"MIN": self._min_nm, "MAX": self._max_nm, "DEF": 1550.0}[val]
+
+    def lock(self, val, password="1234") -> None:
+        pass
+
+    def lock_ask(self) -> int:
+        return 0
+
+    def source_power_state(self, val) -> None:
+        self.bench.laser_on = bool(val)
+
+    def source_power_state_ask(self) -> int:
+        return int(self.bench.laser_on)
+
+    def source_power_mw(self, val) -> None:
+        self.bench.power_mw = float(val)
+
+    def source_power_ask(self) -> float:
+        return 1e-3 * self.bench.power_mw
+
+    def source_power_unit_ask(self) -> int:
+        return 1
+
+    def source_power_unit_ask_str(self) -> str:
+        return "Watts"
+
+    def source_power_ask_mw(self) -> float:
+        return self.bench.power_mw
+
+    def source_wavelength_sweep_ask(self) -> str:
+        ok = self._sweep["start"] < self._sweep["stop"] and self._sweep["step"] > 0
+        return "0,OK" if ok else "1,Bad sweep parameters"
+
+    def source_wavelength_sweep_ask_assert(self) -> None:
+        if self.source_wavelength_sweep_ask() != "0,OK":
+            raise Exception("Bad sweep configuration")
+
+    def source_wavelength_sweep_mode(self, mode) -> None:
+        mode = mode.upper()
+        assert mode in ("STEP", "STEPPED", "MAN", "MANUAL", "CONT", "CONTINUOUS")
+        self._sweep["mode"] = mode[:4]
+
+    def source_wavelength_sweep_mode_ask(self) -> str:
+        return self._sweep["mode"]
+
+    def source_wavelength_sweep_start_nm(self, val) -> None:
+        self.validate_wavelength_nm(val)
+        self._sweep["start"] = float(val)
+
+    def source_wavelength_sweep_start_ask_nm(self) -> float:
+        return self._sweep["start"]
+
+    def source_wavelength_sweep_stop_nm(self, val) -> None:
+        self.validate_wavelength_nm(val)
+        self._sweep["stop"] = float(val)
+
+    def source_wavelength_sweep_stop_ask_nm(self) -> float:
+        return self._sweep["stop"]
+
+    def source_wavelength_sweep_step_nm(self, val) -> None:
+        self._sweep["step"] = float(val)
+
+    def source_wavelength_sweep_step_ask_nm(self) -> float:
+        return self._sweep["step"]
+
+    def source_wavelength_sweep_speed_nms(self, val) -> None:
+        self._sweep["speed"] = float(val)
+
+    def source_wavelength_sweep_speed_ask_nms(self) -> float:
+        return self._sweep["speed"]
+
+    def source_wavelength_sweep_cycles(self, val) -> None:
+        self._sweep["cycles"] = int(val)
+
+    def source_wavelength_sweep_cycles_ask(self) -> int:
+        return self._sweep["cycles"]
+
+    def source_wavelength_sweep_dwell_ms(self, val) -> None:
+        self._sweep["dwell"] = float(val)
+
+    def source_wavelength_sweep_dwell_ask_ms(self) -> float:
+        return self._sweep["dwell"]
+
+    def source_wavelength_sweep_state(self, val) -> None:
+        val = str(val).upper()
+        assert val in ("0", "STOP", "1", "START", "STAR", "2", "PAUSE", "PAUS", "3")
+        if val in ("0", "STOP"):
+            self._sweep_end = 0.0
+        elif val in ("1", "START", "STAR"):
+            self._start_sweep()
+
+    def _start_sweep(self) -> None:
+        start, stop, step = (self._sweep[k] for k in ("start", "stop", "step"))
+        wvls = np.linspace(start, stop, int(round((stop - start) / step)) + 1)
+
+        if self._sweep["mode"] == "CONT":
+            duration = (stop - start) / self._sweep["speed"]
+        else:
+            duration = len(wvls) * 1e-3 * self._sweep["dwell"]
+        self._sweep_end = time.time() + duration * self.time_scale
+
+        self.bench.fire(wvls)
+        self.bench.wvl = stop
+
+    def source_wavelength_sweep_state_ask(self) -> int:
+        return 1 if time.time() < self._sweep_end else 0
+
+    def source_wavelength_sweep_state_ask_str(self) -> str:
+        return {0: "NOT_RUNNING", 1: "RUNNING"}[
+            self.source_wavelength_sweep_state_ask()
+        ]
+
+    def source_wavelength_sweep_state_ask_is_idle(self) -> bool:
+        return self.source_wavelength_sweep_state_ask() == 0
+
+    def source_wavelength_sweep_state_ask_is_running(self) -> bool:
+        return self.source_wavelength_sweep_state_ask() == 1
+
+    def sweep_wait_done(self) -> None:
+        if (remaining := self._sweep_end - time.time()) > 0:
+            time.sleep(remaining)
+
+    def source_wavelength_sweep_softtrigger(self) -> None:
+        pass
+
+    def sweep_abort_if_running(self) -> None:
+        self._sweep_end = 0.0
+
+    def sweep_full_range(self) -> None:
+        self._sweep["start"] = self._min_nm
+        self._sweep["stop"] = self._max_nm
+
+    def sweep_continuous_start(
+        self,
+        power_mw=None,
+        start_nm=None,
+        stop_nm=None,
+        rull_range=None,
+        speed_nms=None,
+    ) -> None:
+        self.sweep_abort_if_running()
+        self.source_wavelength_sweep_mode("CONT")
+        if power_mw:
+            self.source_power_mw(power_mw)
+        if speed_nms:
+            self.source_wavelength_sweep_speed_nms(speed_nms)
+        if start_nm:
+            self.source_wavelength_sweep_start_nm(start_nm)
+        if stop_nm:
+            self.source_wavelength_sweep_stop_nm(stop_nm)
+        if rull_range:
+            self.sweep_full_range()
+        self.source_wavelength_sweep_ask_assert()
+
+        self.lock(False)
+        self.source_power_state(True)
+        self.source_wavelength_sweep_state("START")
+
+    def source_power_max_spectrum(self) -> tuple[list, list]:
+        # the same nesting as the values unpacked from the binary block by the driver, in m and W
+        wvls = np.arange(self._min_nm, self._max_nm + 1.0)
+        return [(1e-9 * w,) for w in wvls], [(1e-2,) for _ in wvls]
+
+    def source_wavelength_correction_ara(self) -> None:
+        pass
+
+    def trigger_configuration(self, val) -> None:
+        val = str(val).upper()
+        assert val in (
+            "0",
+            "DIS",
+            "DISABLED",
+            "1",
+            "DEF",
+            "DEFAULT",
+            "2",
+            "PASS",
+            "PASSTHROUGH",
+            "3",
+            "LOOP",
+            "LOOPBACK",
+        )
+        self._trigger["configuration"] = val
+
+    def trigger_configuration_ask(self) -> str:
+        return self._trigger["configuration"]
+
+    def trigger_output(self, val) -> None:
+        val = val.upper()
+        assert val in (
+            "DIS",
+            "DISABLED",
+            "STF",
+            "STFINISHED",
+            "SWF",
+            "SWFINISHED",
+            "SWSTARTED",
+        )
+        self._trigger["output"] = val
+
+    def trigger_output_ask(self) -> str:
+        return self._trigger["output"]
+
+    def get_OSESM(self) -> int:
+        return self._status_masks["OSESM"]
+
+    def set_OSESM(self, val) -> None:
+        self._status_masks["OSESM"] = int(val)
+
+    def get_OSSER(self) -> int:
+        # bit 0: the laser has been switched on
+        return int(self.bench.laser_on)
+
+    def set_OSSEM(self, val) -> None:
+        self._status_masks["OSSEM"] = int(val)
+
+    def get_OSCSR(self) -> int:
+        return 0
+
+    def dump_state(self, status=False) -> None:
+        print(f"{self._model} state")
+        print("  IDN", self.idn_ask())
+        print("  Lock", self.lock_ask())
+        print("  Is on", self.source_power_state_ask())
+        print("  Wavelength")
+        print(f"    Current: {self.source_wavelength_ask_nm():0.3f} nm")
+        print("    Min: {:0.3f} nm".format(self.source_wavelength_ask_nm("MIN")))
+        print("    Max: {:0.3f} nm".format(self.source_wavelength_ask_nm("MAX")))
+        print("  Power", self.source_power_ask())
+        print("  Power units", self.source_power_unit_ask_str())
+        print("  Power", self.source_power_ask_mw(), "mW")
+        if status:
+            print("Status")
+            print("  OSSER:", self.get_OSSER())
+            print("  OSEM:", self.get_OSESM())
+            print("  OSCSR:", self.get_OSCSR())
+
+
+class VirtualPowerMeter(VirtualOpticalInstr):
+    """
+    A virtual multi-channel optical power meter with the method surface of the KeysightN7745C driver. Its channels look
+    at a synthetic ring resonator: odd channels at the through port and even channels at the drop port. The resonance
+    shifts by 'route_shift' for every output port of the first virtual switch input.
+
+    :param latency: The fixed time taken by every call (s)
+    :type latency: float, default 0
+    :param jitter: The maximum random extra time taken by every call (s)
+    :type jitter: float, default 0
+    :param seed: The seed of the random generator used for the jitter and the noise
+    :type seed: int, optional
+    :param fsr: The free spectral range of the synthetic ring (nm)
+    :type fsr: float, default 10
+    :param finesse: The finesse of the synthetic ring
+    :type finesse: float, default 20
+    :param depth: The depth of the notches of the synthetic ring, between 0 and 1
+    :type depth: float, default 0.9
+    :param route_shift: The shift of the resonance per switch output port (nm)
+    :type route_shift: float, default 0.5
+    :param noise: The relative standard deviation of the noise of each reading
+    :type noise: float, default 1e-3
+    :param floor: The noise floor (W)
+    :type floor: float, default 1e-10
+    :param channels: The number of channels
+    :type channels: int, default 8
+    :param bench: The name of the bench of the instrument
+    :type bench: str, default 'default'
+    :param shared: The objects shared by the instruments of a manager, passed by the InstrumentManager
+    :type shared: dict, optional
+    """
+
+    _model = "VirtualPowerMeter"
+    _host_side = ("close", "read_power_to_confidence")
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int | None = None,
+        fsr: float = 10.0,
+        finesse: float = 20.0,
+        depth: float = 0.9,
+        route_shift: float = 0.5,
+        noise: float = 1e-3,
+        floor: float = 1e-10,
+        channels: int = 8,
+        bench: str = "default",
+        shared: dict | None = None,
+    ):
+        super().__init__(
+            latency=latency, jitter=jitter, seed=seed, bench=bench, shared=shared
+        )
+        self.ring = {"fsr": fsr, "finesse": finesse, "depth": depth}
+        self.route_shift = route_shift
+        self.noise = noise
+        self.floor = floor
+        self.channels = channels
+
+        self._unit = {n: 0 for n in range(1, channels + 1)}
+        self._range = {n: 0 for n in range(1, channels + 1)}
+        self._range_auto = {n: 1 for n in range(1, channels + 1)}
+        self._pm_wvl = {n: 1550.0 for n in range(1, channels + 1)}
+        self._trigger = {n: "IGN" for n in range(1, channels + 1)}
+        self._logging = {n: (1, 0.0) for n in range(1, channels + 1)}
+        self._state = {n: "COMPLETE" for n in range(1, channels + 1)}
+        self._loggers = {}
+        self._fetched = {}
+        self._result = np.array([], dtype=np.float32)
+
+    def power_w(self, n: int, wvl: np.ndarray | float) -> np.ndarray:
+        """
+        The power measured by a channel at a set of laser wavelengths, with noise.
+
+        :param n: The channel
+        :type n: int
+        :param wvl: The wavelengths (nm)
+        :type wvl: np.ndarray or float
+        :return: The power (W)
+        :rtype: np.ndarray
+        """
+        wvl_0 = 1550.0 + self.route_shift * self.bench.route
+        through = ring_transmission(wvl=wvl, wvl_0=wvl_0, **self.ring)
+        trans = through if n % 2 else (1 - through) * self.ring["depth"]
+
+        p = self.bench.input_power_w() * trans
+        p = p + self.rng.normal(size=np.shape(p)) * (self.noise * p + self.floor)
+        return np.abs(p)
+
+    def _to_unit(self, n: int, p_w: np.ndarray) -> np.ndarray:
+        if self._unit[n] == 1:
+            return p_w
+        return 10 * np.log10(1e3 * p_w)
+
+    def assert_n(self, n) -> None:
+        assert 1 <= n <= self.channels, f"Require channel 1 <= {n} <= {self.channels}"
+
+    def fetch_power_ask(self, n) -> float:
+        return float(self._to_unit(n, self._fetched.get(n, self.floor)))
+
+    def fetch_power_all(self) -> list:
+        return [float(self._fetched.get(n, self.floor)) for n in self._unit]
+
+    def read_power(self, n) -> float:
+        self.assert_n(n)
+        self._fetched[n] = self.power_w(n, self.bench.wvl)
+        return self.fetch_power_ask(n)
+
+    def read_power_to_confidence(
+        self, n, target, confidence=0.95, min_samples=5, max_samples=100
+    ) -> tuple[float, float, int]:
+        self.assert_n(n)
+        return ta_math.average_to_confidence(
+            sample=lambda: self.read_power(n),
+            target=target,
+            confidence=confidence,
+            min_samples=min_samples,
+            max_samples=max_samples,
+            db=self.sense_power_unit_ask(n) == 0,
+        )
+
+    def read_power_all(self) -> list:
+        for n in self._unit:
+            self._fetched[n] = self.power_w(n, self.bench.wvl)
+        return self.fetch_power_all()
+
+    def initiate_channel_immediate(self, n, m) -> None:
+        n = m if m else n
+        self._fetched[n] = self.power_w(n, self.bench.wvl)
+
+    def initiate_channel_continuous(self, n, channel, continuous) -> None:
+        pass
+
+    def sense_function_parameter_logging(self, n, data_points, averaging_time) -> None:
+        assert data_points >= 1
+        assert averaging_time >= 0
+        self._logging[n] = (data_points, averaging_time)
+
+    def sense_function_result_ask(self) -> np.ndarray:
+        return self._result
+
+    def sense_function_state(self, n, state, mode) -> None:
+        self.assert_n(n)
+        state = str(state).upper()
+        assert state in ("LOGG", "LOGGING", "STAB", "STABILITY", "MINM", "MINMAX")
+        mode = str(mode).upper()
+        assert mode in ("STOP", "STAR", "START")
+
+        if mode == "STOP":
+            self.bench.disarm(self._loggers.pop(n, None))
+            self._state[n] = "COMPLETE"
+        else:
+            self._state[n] = "PROGRESS"
+            self._loggers[n] = functools.partial(self._log, n)
+            self.bench.arm(self._loggers[n])
+
+    def _log(self, n: int, wvls: np.ndarray) -> None:
+        data_points = self._logging[n][0]
+        wvls = np.resize(wvls, data_points) if len(wvls) < data_points else wvls
+        p = self.power_w(n, wvls[:data_points])
+        self._result = self._to_unit(n, p).astype(np.float32)
+        self._state[n] = "COMPLETE"
+        self._loggers.pop(n, None)
+
+    def sense_function_state_ask(self, n) -> tuple[str, str]:
+        self.assert_n(n)
+        return "LOGGING_STABILITY", self._state[n]
+
+    def sense_function_state_ask_state(self, n) -> str:
+        return self._state[n]
+
+    def sense_function_state_ask_is_running(self, n) -> bool:
+        return self._state[n] == "PROGRESS"
+
+    def trigger(self, val) -> None:
+        val = str(val).upper()
+        assert val in ("NODEA", "1", "NODEB", "2"), val
+        if val in ("NODEA", "1"):
+            self.bench.fire(np.array([self.bench.wvl]))
+
+    def trigger_the_input(self) -> None:
+        self.trigger("NODEA")
+
+    def trigger_input(self, n, trigger_response) -> None:
+        self.assert_n(n)
+        self._trigger[n] = trigger_response.upper()
+
+    def set_trigger_configuration(self, val: str) -> None:
+        pass
+
+    def ask_trigger_configuration(self) -> str:
+        return "DEF"
+
+    def sense_power_range_auto(self, n, val) -> None:
+        val = str(val).upper()
+        assert val in ("0", "OFF", "1", "ON")
+        self._range_auto[n] = int(val in ("1", "ON"))
+
+    def sense_power_range_auto_ask(self, n) -> int:
+        return self._range_auto[n]
+
+    def sense_power_range_dbm(self, n, range) -> None:
+        range = int(range)
+        assert range in (+10, 0, -10, -20, -30)
+        self._range[n] = range
+
+    def sense_power_range_ask(self, n) -> float:
+        self.assert_n(n)
+        return float(self._range[n])
+
+    def sense_power_range_ask_w(self, n) -> float:
+        return 2e-3 * 10 ** (self._range[n] / 10)
+
+    def sense_power_range_ask_mw(self, n) -> float:
+        return self.sense_power_range_ask_w(n) * 1e3
+
+    def sense_power_unit(self, n, val) -> None:
+        val = str(val).upper()
+        assert val in ("0", "DBM", "1", "WATT")
+        self._unit[n] = int(val in ("1", "WATT"))
+
+    def sense_power_unit_ask(self, n) -> int:
+        return self._unit[n]
+
+    def sense_power_unit_ask_str(self, n) -> str:
+        return {0: "dBm", 1: "Watt"}[self._unit[n]]
+
+    def sense_power_gain_auto_ask(self, n) -> int:
+        return 1
+
+    def sense_power_wavelength_nm(self, val, n=None) -> None:
+        for ch in [n] if n else self._pm_wvl:
+            self._pm_wvl[ch] = float(val)
+
+    def sense_power_wavelength_ask(self, n) -> float:
+        self.assert_n(n)
+        return 1e-9 * self._pm_wvl[n]
+
+    def sense_power_wavelength_ask_nm(self, n) -> float:
+        return self._pm_wvl[n]
+
+
+class VirtualSwitch(VirtualOpticalInstr):
+    """
+    A virtual optical matrix switch with the method surface of the DiConGP600X1 driver. The output connected to the
+    first input is the route seen by the other virtual instruments.
+
+    :param latency: The fixed time taken by every call (s)
+    :type latency: float, default 0
+    :param jitter: The maximum random extra time taken by every call (s)
+    :type jitter: float, default 0
+    :param seed: The seed of the random generator used for the jitter
+    :type seed: int, optional
+    :param inputs: The number of inputs
+    :type inputs: int, default 1
+    :param outputs: The number of outputs
+    :type outputs: int, default 16
+    :param bench: The name of the bench of the instrument
+    :type bench: str, default 'default'
+    :param shared: The objects shared by the instruments of a manager, passed by the InstrumentManager
+    :type shared: dict, optional
+    """
+
+    _model = "GP600"
+    _host_side = ("close", "print_state")
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int | None = None,
+        inputs: int = 1,
+        outputs: int = 16,
+        bench: str = "default",
+        shared: dict | None = None,
+    ):
+        super().__init__(
+            latency=latency, jitter=jitter, seed=seed, bench=bench, shared=shared
+        )
+        self._inputs = inputs
+        self._outputs = outputs
+        self._wvl = 1550.0
+        self.bench.routes = {ii: 0 for ii in range(1, inputs + 1)}
+
+    def get_inputs(self) -> int:
+        return self._inputs
+
+    def get_outputs(self) -> int:
+        return self._outputs
+
+    def version_ask(self) -> str:
+        return "1.0.0"
+
+    def system_configuration_ask(self) -> str:
+        return "X1"
+
+    def system_error_ask(self) -> str:
+        return "+0, No Error"
+
+    def reset(self) -> None:
+        self.bench.routes = {ii: 0 for ii in range(1, self._inputs + 1)}
+
+    def wen(self, val) -> None:
+        pass
+
+    def wen_ask(self) -> int:
+        return 0
+
+    def channel(self, input, output) -> None:
+        assert 1 <= input <= self._inputs
+        assert 0 <= output <= self._outputs
+        self.bench.routes[input] = output
+
+    def channels(self, vals) -> None:
+        for input, output in vals:
+            self.channel(input, output)
+
+    def channel_ask(self, input) -> int:
+        assert 1 <= input <= self._inputs
+        return self.bench.routes.get(input, 0)
+
+    def assert_channel(self, input, output) -> None:
+        output_got = self.channel_ask(input)
+        assert (
+            output == output_got
+        ), f"Channel {input}: expected {output} but got {output_got}"
+
+    def assert_idle(self) -> None:
+        for input in self.iter_inputs():
+            output = self.channel_ask(input)
+            assert output == 0, f"Channel {input}: expected 0 / idle but got {output}"
+
+    def dimensions_ask(self) -> tuple[int, int]:
+        return self._inputs, self._outputs
+
+    def wavelengths_availible_ask(self) -> list[float]:
+        return [1310.0, 1550.0]
+
+    def wavelength(self, val) -> None:
+        self._wvl = float(val)
+
+    def wavelength_ask(self) -> float:
+        return self._wvl
+
+    def iter_inputs(self) -> range:
+        return range(1, self.get_inputs() + 1, 1)
+
+    def print_state(self) -> None:
+        print("DiConGP600 state")
+        print("  IDN", self.idn_ask())
+        print("  CONF", self.system_configuration_ask())
+        print("  X1")
+        print("    Dimensions", self.dimensions_ask())
+        print("    Wavelengths", self.wavelengths_availible_ask())
+        inputs = self.get_inputs()
+        outputs = self.get_outputs()
+        print(f"    Channels ({inputs} inputs x {outputs} outputs)")
+        for input in self.iter_inputs():
+            output = self.channel_ask(input)
+            print(f"         Input {input} => output {output}")
+
+
+class VirtualPolarimeter(VirtualOpticalInstr):
+    """
+    A virtual polarimeter and polarization synthesizer with the method surface of the KeysightN778C driver. The
+    stabilizer target sets the input polarization state of a synthetic DUT, a partial polarizer along S1 with a PDL
+    oscillating around 'pdl' with the period 'pdl_period'. The polarimeter measures the output of this DUT.
+
+    :param latency: The fixed time taken by every call (s)
+    :type latency: float, default 0
+    :param jitter: The maximum random extra time taken by every call (s)
+    :type jitter: float, default 0
+    :param seed: The seed of the random generator used for the jitter and the noise
+    :type seed: int, optional
+    :param pdl: The mean PDL of the synthetic DUT (dB)
+    :type pdl: float, default 0.5
+    :param pdl_period: The period of the PDL oscillation (nm)
+    :type pdl_period: float, default 20
+    :param loss: The mean insertion loss of the synthetic DUT (dB)
+    :type loss: float, default 3
+    :param noise: The relative standard deviation of the noise of each sample
+    :type noise: float, default 1e-4
+    :param bench: The name of the bench of the instrument
+    :type bench: str, default 'default'
+    :param shared: The objects shared by the instruments of a manager, passed by the InstrumentManager
+    :type shared: dict, optional
+    """
+
+    _model = "N7786C"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int | None = None,
+        pdl: float = 0.5,
+        pdl_period: float = 20.0,
+        loss: float = 3.0,
+        noise: float = 1e-4,
+        bench: str = "default",
+        shared: dict | None = None,
+    ):
+        super().__init__(
+            latency=latency, jitter=jitter, seed=seed, bench=bench, shared=shared
+        )
+        self.pdl = pdl
+        self.pdl_period = pdl_period
+        self.loss = loss
+        self.noise = noise
+
+        self._unit = "1"
+        self._wvl = 1550.0
+        self._step = 0.1
+        self._samples = 1
+        self._gain = 5
+        self._auto_gain = True
+        self._loops = 1
+        self._trigger_input = "NONE"
+        self._trigger_output = "DIS"
+        self._trigger_configuration = "DEF"
+        self._trigger_offset = 0
+        self._sweep_rate = 1.0
+        self._sampling_rate = 1e4
+        self._averaging_time = None
+        self._pre_post_samples = [0, 0]
+        self._stabilizer = False
+        self._target = (1.0, 0.0, 0.0)
+        self._logging = False
+        self._logged = np.zeros((4, 0), dtype=np.float32)
+
+    def stokes(self, wvl: np.ndarray | float) -> np.ndarray:
+        """
+        The un-normalized Stokes parameters at the DUT output for a set of laser wavelengths, with noise.
+
+        :param wvl: The wavelengths (nm)
+        :type wvl: np.ndarray or float
+        :return: The Stokes parameters (S0, S1, S2, S3) along the first axis (W)
+        :rtype: np.ndarray
+        """
+        wvl = np.atleast_1d(wvl)
+        pdl = self.pdl * (1 + 0.5 * np.sin(2 * np.pi * wvl / self.pdl_period))
+        ratio = 10 ** (pdl / 10)
+        diat = (ratio - 1) / (ratio + 1)
+        ret = np.sqrt(1 - np.square(diat))
+
+        t = 10 ** (-self.loss / 10) * self.bench.input_power_w()
+        s1, s2, s3 = self.bench.input_sop
+        stokes = t * np.array([1 + s1 * diat, diat + s1, ret * s2, ret * s3])
+        noise = self.noise * t * self.rng.normal(size=stokes.shape)
+        return stokes + noise
+
+    def measure_stokes_params(self, normalized: bool = True) -> tuple:
+        s0, s1, s2, s3 = self.stokes(self.bench.wvl)[:, 0]
+        if normalized:
+            return s1 / s0, s2 / s0, s3 / s0
+        else:
+            return s0, s1, s2, s3
+
+    def fetch_stokes_params(self, normalized: bool = True) -> tuple:
+        return self.measure_stokes_params(normalized=normalized)
+
+    def measure_optical_power(self) -> float:
+        p = self.stokes(self.bench.wvl)[0, 0]
+        return float(p if self._unit in ("1", "WATT") else 10 * np.log10(1e3 * p))
+
+    def fetch_optical_power(self) -> float:
+        return self.measure_optical_power()
+
+    def set_optical_power_unit(self, unit) -> None:
+        unit = str(unit).upper()
+        assert unit in ("0", "DBM", "1", "WATT")
+        self._unit = unit
+
+    def ask_optical_power_unit(self) -> str:
+        return "Watts" if self._unit in ("1", "WATT") else "dBm"
+
+    def set_wavelength_nm(self, wl: float) -> None:
+        self._wvl = float(wl)
+
+    def set_min_wavelength_nm(self, wl: float) -> None:
+        pass
+
+    def set_max_wavelength_nm(self, wl: float) -> None:
+        pass
+
+    def ask_wavelength(self, val: str = None) -> float:
+        return 1e-9 * self._wvl
+
+    def set_gain(self, val: int = 5) -> None:
+        if not (0 <= val <= 9):
+            raise ValueError("Gain should be comprised between 0 and 9.")
+        self._gain = val
+
+    def ask_gain(self) -> int:
+        return self._gain
+
+    def set_auto_gain(self, val: bool = True) -> None:
+        self._auto_gain = val
+
+    def ask_auto_gain_state(self) -> bool:
+        return self._auto_gain
+
+    def disable_logging(self) -> None:
+        self.bench.disarm(self._log)
+        self._logging = False
+
+    def zero_photodiodes(self) -> None:
+        pass
+
+    def ask_zero_successful(self) -> bool:
+        return True
+
+    def set_number_loops(self, val: int = 0) -> None:
+        self._loops = val
+
+    def ask_number_loops(self) -> int:
+        return self._loops
+
+    def start_logging(self, mode: str = None) -> None:
+        self._logging = True
+        self._logged = np.zeros((4, 0), dtype=np.float32)
+        self.bench.arm(self._log)
+
+    def _log(self, wvls: np.ndarray) -> None:
+        wvls = np.resize(wvls, self._samples) if len(wvls) < self._samples else wvls
+        self._logged = self.stokes(wvls[: self._samples]).astype(np.float32)
+        self._logging = False
+
+    def ask_logging_state(self) -> list[str]:
+        if self._logging:
+            return ["SAMPLING", "NO_DATA"]
+        return ["IDLE", "DATA_AVAILABLE" if self._logged.shape[1] else "NO_DATA"]
+
+    def get_measured_stokes_params(self, val: str = None) -> np.ndarray:
+        if val is not None and val.upper() in ("NORM", "NORMALIZED"):
+            return self._logged[1:] / self._logged[0]
+        return self._logged
+
+    def get_measured_power(self) -> np.ndarray:
+        return self._logged[0]
+
+    def get_number_logged_loops(self) -> int:
+        return int(self._logged.shape[1] > 0)
+
+    def set_number_sweeps(self, val: int) -> None:
+        if not (1 <= val <= 1048576):
+            raise ValueError(
+                "Number of samples should be comprised between 1 and 1048576."
+            )
+        self._samples = val
+
+    def ask_number_sweeps(self) -> int:
+        return self._samples
+
+    def ask_number_logged_values(self) -> int:
+        return 0
+
+    def set_sweep_step_nm(self, val: float) -> None:
+        self._step = float(val)
+
+    def ask_sweep_step_nm(self) -> float:
+        return self._step
+
+    def set_trigger_input(
+        self, val: str, pmin: float = None, pmax: float = None
+    ) -> None:
+        self._trigger_input = val.upper()
+
+    def ask_trigger_input(self) -> str:
+        return self._trigger_input
+
+    def set_trigger_output(self, val: str) -> None:
+        val = val.upper()
+        assert val in ("DIS", "DISABLED", "AVG", "AVGOVER", "MEAS", "MEASURE")
+        self._trigger_output = val
+
+    def ask_trigger_output(self) -> str:
+        return self._trigger_output
+
+    def set_trigger_configuration(self, val: str) -> None:
+        self._trigger_configuration = val.upper()
+
+    def ask_trigger_configuration(self) -> str:
+        return self._trigger_configuration
+
+    def set_trigger_delay_us(self, val: float) -> None:
+        factor = int(val * 32)
+        if not (0 <= factor <= 997):
+            raise ValueError(f"Delay should be comprised between 0 and {997 / 32}us.")
+        # the delay and the trigger offset are the same setting of the instrument
+        self._trigger_offset = factor
+
+    def ask_trigger_delay_us(self) -> float:
+        return self._trigger_offset / 32
+
+    def set_trigger_offset(self, val: int) -> None:
+        self._trigger_offset = int(val)
+
+    def ask_trigger_offset(self) -> int:
+        return self._trigger_offset
+
+    def set_sweep_rate_nm_per_s(self, val: float) -> None:
+        if self._trigger_input != "NONE":
+            raise ValueError(
+                "The sweet rate [nm/s] can only be set with disabled trigger."
+            )
+        self._sweep_rate = float(val)
+
+    def ask_sweep_rate_nm_per_s(self) -> float:
+        return self._sweep_rate
+
+    def set_sampling_rates_nm_per_s(
+        self, srate: float, averaging_time: float = None
+    ) -> None:
+        self._sampling_rate = float(srate)
+        self._averaging_time = averaging_time
+
+    def ask_sampling_rates(self) -> None:
+        # the driver does not return the answer of the instrument
+        return None
+
+    def ask_quality_gain(self) -> float:
+        return 0.75
+
+    def set_pre_trigger_samples(self, val: int) -> None:
+        if val > 1048576:
+            raise ValueError("Number of pre samples should be lower than 1048576.")
+        self._pre_post_samples[0] = val
+
+    def ask_pre_trigger_samples(self) -> int:
+        return self._pre_post_samples[0]
+
+    def set_post_trigger_samples(self, val: int) -> None:
+        if val > 1048576:
+            raise ValueError("Number of post samples should be lower than 1048576.")
+        self._pre_post_samples[1] = val
+
+    def ask_post_trigger_samples(self) -> int:
+        return self._pre_post_samples[1]
+
+    def set_stabilizer_mode(self, val: bool = True) -> None:
+        self._stabilizer = bool(val)
+        if self._stabilizer:
+            self.bench.input_sop = self._target
+
+    def ask_stabilizer_mode(self) -> bool:
+        return self._stabilizer
+
+    def set_stabilizer_stokes_params_target(
+        self, s1: float, s2: float, s3: float
+    ) -> None:
+        self._target = (s1, s2, s3)
+        if self._stabilizer:
+            self.bench.input_sop = self._target
+
+    def ask_stabilizer_stokes_params_target(self) -> tuple[float, float, float]:
+        return self._target
@@ -1,7 +1,27 @@
-from autosweep.sweep import io, sweep_parser, vis_utils
+from autosweep.sweep import (
+    collection,
+    io,
+    kernels,
+    stats,
+    sweep_parser,
+    units,
+    vis_utils,
+)
+from autosweep.sweep.collection import (
+    SweepCollection,
+)
 from autosweep.sweep.io import (
+    read_data,
+    read_header,
     read_json,
+    read_many,
+    read_npy,
     to_json,
+    to_npy,
+)
+from autosweep.sweep.stats import (
+    aggregate_sweeps,
+    stack_sweeps,
 )
 from autosweep.sweep.sweep_parser import (
     Sweep,
@@ -13,9 +33,21 @@ from autosweep.sweep.vis_utils import (
 __all__ = [
     "FigHandler",
     "Sweep",
+    "SweepCollection",
+    "aggregate_sweeps",
+    "collection",
     "io",
+    "kernels",
+    "read_data",
+    "read_header",
     "read_json",
+    "read_many",
+    "read_npy",
+    "stack_sweeps",
+    "stats",
     "sweep_parser",
     "to_json",
+    "to_npy",
+    "units",
     "vis_utils",
 ]
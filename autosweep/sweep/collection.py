@@ -0,0 +1,523 @@
+import collections
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+import numpy as np
+
+from autosweep.sweep import kernels, sweep_parser
+from autosweep.utils import typing_ext
+
+
+class SweepCollection:
+    """
+    A collection of compatible sweeps, i.e. with the same traces and the same X trace, for example the same recipe
+    step measured over many DUTs or switch routes. The data of every sweep is stacked into a single array with the
+    shape (sweeps, traces, points), so analyses over the whole collection are numpy operations instead of loops over
+    the sweeps.
+
+    :param data: The stacked trace data, with the shape (sweeps, traces, points). The first trace is the X trace.
+    :type data: np.ndarray
+    :param cols: The names of the traces
+    :type cols: list[str] or tuple[str]
+    :param labels: A unique label for every sweep
+    :type labels: list[str] or tuple[str]
+    :param attrs: The collection of trace attributes, with the same channel names as the traces
+    :type attrs: dict, optional
+    :param metadata: The metadata of every sweep
+    :type metadata: list[dict], optional
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        cols: Iterable[str],
+        labels: Iterable[str],
+        attrs: dict | None = None,
+        metadata: list[dict] | None = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._data = np.asarray(data)
+        self._cols = tuple(cols)
+        self._labels = tuple(labels)
+
+        if self._data.ndim != 3:
+            raise ValueError("The argument 'data' must be a 3D array.")
+        if self._data.shape[1] != len(self._cols):
+            raise ValueError("There must be one name in 'cols' for every trace.")
+        if self._data.shape[0] != len(self._labels):
+            raise ValueError("There must be one label for every sweep.")
+        if len(set(self._labels)) != len(self._labels):
+            raise ValueError("The labels must be unique.")
+
+        self._attrs = {k: tuple(attrs[k]) for k in self._cols} if attrs else {}
+        self.metadata = list(metadata) if metadata else [{} for _ in self._labels]
+        if len(self.metadata) != len(self._labels):
+            raise ValueError("There must be one metadata dict for every sweep.")
+
+        self._idxs = {label: ii for ii, label in enumerate(self._labels)}
+        self._aliases = {"x": self._cols[0], "y": self._cols[1]} | {
+            f"y{ii}": k for ii, k in enumerate(self._cols[1:])
+        }
+
+    @classmethod
+    def from_sweeps(
+        cls,
+        sweeps: dict[str, sweep_parser.Sweep] | list[sweep_parser.Sweep],
+        labels: Iterable[str] | None = None,
+    ):
+        """
+        Stacks compatible sweeps into a collection. The attrs are taken from the first sweep.
+
+        :param sweeps: The sweeps, either in label (key) - sweep (value) pairs or as a list
+        :type sweeps: dict[str, autosweep.sweep.sweep_parser.Sweep] or list[autosweep.sweep.sweep_parser.Sweep]
+        :param labels: The labels of the sweeps, by default the keys of 'sweeps' or their index
+        :type labels: list[str] or tuple[str], optional
+        :return: The collection
+        :rtype: autosweep.sweep.collection.SweepCollection
+        """
+        if isinstance(sweeps, dict):
+            labels = sweeps.keys() if labels is None else labels
+            sweeps = list(sweeps.values())
+        elif labels is None:
+            labels = [str(ii) for ii in range(len(sweeps))]
+
+        if not sweeps:
+            raise ValueError("There must be at least 1 sweep in a collection.")
+
+        first = sweeps[0]
+        for s in sweeps[1:]:
+            if s.cols != first.cols:
+                raise ValueError("Every sweep must have the same traces.")
+            if not np.array_equal(s["x"], first["x"]):
+                raise ValueError("Every sweep must have the same X trace.")
+
+        return cls(
+            data=np.stack([s.data for s in sweeps]),
+            cols=first.cols,
+            labels=labels,
+            attrs=first.attrs if first.attrs else None,
+            metadata=[s.metadata for s in sweeps],
+        )
+
+    @classmethod
+    def from_resampled(
+        cls,
+        sweeps: dict[str, sweep_parser.Sweep] | list[sweep_parser.Sweep],
+        grid: typing_ext.ListLike,
+        method: str = "linear",
+        labels: Iterable[str] | None = None,
+    ):
+        """
+        Resamples sweeps with the same traces, but not necessarily the same X trace, onto a common grid and stacks
+        them into a collection. The resampling table is computed once for every distinct X trace and reused by every
+        sweep sharing it.
+
+        :param sweeps: The sweeps, either in label (key) - sweep (value) pairs or as a list
+        :type sweeps: dict[str, autosweep.sweep.sweep_parser.Sweep] or list[autosweep.sweep.sweep_parser.Sweep]
+        :param grid: The common X values
+        :type grid: np.ndarray or list or tuple
+        :param method: 'linear' interpolation or 'nearest' point, see autosweep.sweep.sweep_parser.Sweep.resample()
+        :type method: str, default 'linear'
+        :param labels: The labels of the sweeps, by default the keys of 'sweeps' or their index
+        :type labels: list[str] or tuple[str], optional
+        :return: The collection
+        :rtype: autosweep.sweep.collection.SweepCollection
+        """
+        if isinstance(sweeps, dict):
+            labels = sweeps.keys() if labels is None else labels
+            sweeps = list(sweeps.values())
+
+        grid = np.atleast_1d(np.asarray(grid, dtype=float))
+
+        # the tables, by a hash of the X trace, along with the X trace to rule out collisions
+        tables = {}
+        resampled = []
+        for s in sweeps:
+            key = hash(np.ascontiguousarray(s["x"]).tobytes())
+            if key not in tables or not np.array_equal(tables[key][0], s["x"]):
+                table = kernels.resample_table(x=s["x"], grid=grid, method=method)
+                tables[key] = (s["x"], table)
+            resampled.append(s.resample(grid=grid, method=method, table=tables[key][1]))
+
+        return cls.from_sweeps(sweeps=resampled, labels=labels)
+
+    @classmethod
+    def from_runs(
+        cls,
+        runs: dict[typing_ext.PathLike, tuple] | Iterable[tuple],
+        name: str,
+        labels: Iterable[str] | None = None,
+    ):
+        """
+        Collects the same sweep from the raw data of many runs, e.g. the same recipe step over many DUTs. The
+        metadata of every sweep gets the global metadata of its run, under 'run_metadata', and the DUT info, under
+        'dut_info', so the collection can be grouped by them.
+
+        The labels must be unique, while a DUT can be tested more than once. By default, the sweeps of runs passed in
+        path (key) - output (value) pairs are labelled with the path of their run. Otherwise, they are labelled with the
+        serial number of their DUT, followed by the index of the run for a DUT with several runs, e.g. 'SN1_0' and
+        'SN1_3'.
+
+        :param runs: The outputs of autosweep.sweep.io.read_json() (or read_npy()) for every run, either in path
+            (key) - output (value) pairs or as a list
+        :type runs: dict[str or pathlib.Path, tuple] or Iterable[tuple]
+        :param name: The name of the sweep to collect from every run
+        :type name: str
+        :param labels: The labels of the sweeps, by default the paths of the runs or the serial numbers of the DUTs
+        :type labels: list[str] or tuple[str], optional
+        :return: The collection
+        :rtype: autosweep.sweep.collection.SweepCollection
+        """
+        run_labels = None
+        if isinstance(runs, dict):
+            run_labels = [str(p) for p in runs]
+            runs = runs.values()
+
+        sweeps = []
+        ser_nums = []
+        metadata = []
+        for run_sweeps, run_metadata, dut in runs:
+            sweeps.append(run_sweeps[name])
+            ser_nums.append(dut.ser_num)
+            metadata.append(
+                run_sweeps[name].metadata
+                | {"run_metadata": run_metadata, "dut_info": dut.to_dict()}
+            )
+
+        if run_labels is None:
+            counts = collections.Counter(ser_nums)
+            run_labels = [
+                sn if counts[sn] == 1 else f"{sn}_{ii}"
+                for ii, sn in enumerate(ser_nums)
+            ]
+
+        coll = cls.from_sweeps(
+            sweeps=sweeps, labels=run_labels if labels is None else labels
+        )
+        coll.metadata = metadata
+        return coll
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__module__}.{self.__class__.__name__}, sweeps: {len(self)}, x-col: {self.x_col}, "
+            f"y-cols: {self.y_cols}, len: {self._data.shape[2]}>"
+        )
+
+    def __len__(self) -> int:
+        """
+        The number of sweeps in the collection.
+
+        :return: The number of sweeps
+        :rtype: int
+        """
+        return len(self._labels)
+
+    def __getitem__(self, item) -> np.ndarray:
+        """
+        The data of a trace for every sweep. The X trace is shared by every sweep, so only one copy of it is returned.
+
+        :param item: The name of the trace or its alias
+        :type item: str
+        :return: The trace data, with the shape (sweeps, points), or (points,) for the X trace
+        :rtype: np.ndarray
+        """
+        col = self.get_trace_col(col=item)
+        if col == self.x_col:
+            return self._data[0, 0]
+
+        return self._data[:, self._cols.index(col)]
+
+    def __iter__(self) -> Iterator[tuple[str, sweep_parser.Sweep]]:
+        """
+        Iterate over the sweeps as (label, sweep).
+
+        :yield label: The label of the sweep
+        :yield sweep: The sweep, its data is a view of the collection data
+        """
+        for label in self._labels:
+            yield label, self.sweep(label=label)
+
+    @property
+    def data(self) -> np.ndarray:
+        """
+        Accessor for the stacked trace data
+
+        :return: The data, with the shape (sweeps, traces, points)
+        :rtype: np.ndarray
+        """
+        return self._data
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """
+        The shape of the stacked trace data.
+
+        :return: The number of sweeps, the number of traces and the length of the traces
+        :rtype: tuple[int, int, int]
+        """
+        return self._data.shape
+
+    @property
+    def labels(self) -> tuple[str]:
+        return self._labels
+
+    @property
+    def cols(self) -> tuple[str]:
+        return self._cols
+
+    @property
+    def x_col(self) -> str:
+        return self._cols[0]
+
+    @property
+    def y_cols(self) -> tuple[str]:
+        return self._cols[1:]
+
+    @property
+    def attrs(self) -> dict[str, tuple]:
+        return self._attrs
+
+    def get_trace_col(self, col: Any) -> str:
+        """
+        A helper function which checks the input column name against the trace names and their aliases.
+
+        :raise KeyError: If col is neither an alias to nor the name of a trace, a KeyError is raised
+        :param col: The input name to check
+        :type col: Any
+        :return: The trace name, not the alias
+        :rtype: str
+        """
+        if col in self._aliases:
+            return self._aliases[col]
+        elif col in self._cols:
+            return col
+        else:
+            raise KeyError(f"The trace '{col}' does not exist")
+
+    def _y_rows(self, cols: Iterable[str] | None) -> tuple[tuple[str], list[int]]:
+        # the names and the indices along the trace axis of some Y traces, by default all of them
+        cols = (
+            self.y_cols if cols is None else tuple(self.get_trace_col(c) for c in cols)
+        )
+        return cols, [self._cols.index(c) for c in cols]
+
+    def sweep(self, label: str) -> sweep_parser.Sweep:
+        """
+        The sweep with a given label, its data is a view of the collection data.
+
+        :param label: The label of the sweep
+        :type label: str
+        :return: The sweep
+        :rtype: autosweep.sweep.sweep_parser.Sweep
+        """
+        ii = self._idxs[label]
+        return sweep_parser.Sweep.from_arrays(
+            data=self._data[ii],
+            cols=self._cols,
+            attrs=self.attrs if self.attrs else None,
+            metadata=self.metadata[ii],
+            copy=False,
+        )
+
+    def to_sweeps(self) -> dict[str, sweep_parser.Sweep]:
+        """
+        Splits the collection into sweeps, their data are views of the collection data.
+
+        :return: The sweeps, in label (key) - sweep (value) pairs
+        :rtype: dict[str, autosweep.sweep.sweep_parser.Sweep]
+        """
+        return dict(self)
+
+    def select(self, mask: typing_ext.ListLike | slice):
+        """
+        Selects some of the sweeps, e.g. with a boolean mask computed from the data.
+
+        :param mask: A boolean mask with one value per sweep, the indices of the sweeps or a slice
+        :type mask: np.ndarray or list or tuple or slice
+        :return: A new collection with the selected sweeps
+        :rtype: autosweep.sweep.collection.SweepCollection
+        """
+        idxs = np.arange(len(self))[mask]
+        return self.__class__(
+            data=self._data[idxs],
+            cols=self._cols,
+            labels=[self._labels[ii] for ii in idxs],
+            attrs=self.attrs if self.attrs else None,
+            metadata=[self.metadata[ii] for ii in idxs],
+        )
+
+    def groupby(
+        self, key: str | Callable[[str, dict], Any]
+    ) -> dict[Any, "SweepCollection"]:
+        """
+        Splits the collection into groups of sweeps.
+
+        :param key: Either a key of the metadata of the sweeps, or a function of the label and the metadata of a sweep
+            which returns its group
+        :type key: str or Callable[[str, dict], Any]
+        :return: The groups, in group (key) - collection (value) pairs, in the order of the first sweep of each group
+        :rtype: dict[Any, autosweep.sweep.collection.SweepCollection]
+        """
+        if isinstance(key, str):
+            groups = [md[key] for md in self.metadata]
+        else:
+            groups = [key(label, md) for label, md in zip(self._labels, self.metadata)]
+
+        idxs = {}
+        for ii, group in enumerate(groups):
+            idxs.setdefault(group, []).append(ii)
+
+        return {group: self.select(mask=ii) for group, ii in idxs.items()}
+
+    def reduce(
+        self,
+        func: str | Callable = "mean",
+        cols: Iterable[str] | None = None,
+        mask: np.ndarray | None = None,
+        **kwargs,
+    ) -> sweep_parser.Sweep:
+        """
+        Reduces the Y traces over the sweeps, for every trace and point at once.
+
+        :param func: The name of a numpy reduction ('mean', 'std', 'min', 'max', 'median', 'sum', 'percentile', ...) or
+            a function which takes the data and the 'axis' keyword argument
+        :type func: str or Callable
+        :param cols: The Y traces to reduce, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :param mask: A boolean mask of the data to use, with the shape (sweeps,) or (sweeps, points). The masked-out
+            data is ignored by the reduction (the 'nan' version of a named numpy reduction is used).
+        :type mask: np.ndarray, optional
+        :param kwargs: Any other arguments of the reduction, e.g. 'q' for 'percentile' or 'ddof' for 'std'
+        :type kwargs: dict
+        :return: A sweep with the X trace and the reduced Y traces
+        :rtype: autosweep.sweep.sweep_parser.Sweep
+        """
+        cols, rows = self._y_rows(cols=cols)
+        data = self._data[:, rows]
+
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            mask = mask.reshape(mask.shape[0], 1, -1)
+            data = np.where(mask, data, np.nan)
+
+        if isinstance(func, str):
+            name = f"nan{func}" if mask is not None else func
+            func = getattr(np, name)
+
+        reduced = func(data, axis=0, **kwargs)
+
+        cols = (self.x_col, *cols)
+        return sweep_parser.Sweep.from_arrays(
+            data=np.vstack((self["x"], reduced)),
+            cols=cols,
+            attrs={c: self.attrs[c] for c in cols} if self.attrs else None,
+            copy=False,
+        )
+
+    def resample(self, grid: typing_ext.ListLike, method: str = "linear"):
+        """
+        Resamples every trace of every sweep onto a new X grid, in a single vectorized operation.
+
+        :param grid: The new X values
+        :type grid: np.ndarray or list or tuple
+        :param method: 'linear' interpolation, which needs a monotonic X trace, or 'nearest' point
+        :type method: str, default 'linear'
+        :return: A new collection with 'grid' as the X trace
+        :rtype: autosweep.sweep.collection.SweepCollection
+        """
+        grid = np.atleast_1d(np.asarray(grid, dtype=float))
+        table = kernels.resample_table(x=self["x"], grid=grid, method=method)
+        ys = kernels.apply_table(ys=self._data[:, 1:], table=table)
+        xs = np.broadcast_to(grid, (len(self), 1, len(grid)))
+
+        return self.__class__(
+            data=np.concatenate((xs, ys), axis=1),
+            cols=self._cols,
+            labels=self._labels,
+            attrs=self.attrs if self.attrs else None,
+            metadata=self.metadata,
+        )
+
+    def find_x_intercept(
+        self, val: float = 0.0, cols: Iterable[str] | None = None
+    ) -> dict[str, list[np.ndarray]]:
+        """
+        Finds the X values where Y traces cross a value, linearly interpolated, for every sweep and trace at once.
+
+        :param val: The Y value to cross
+        :type val: float, default 0
+        :param cols: The Y traces to search, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :return: The X values of the crossings of every sweep, in trace name (key) - crossings (value) pairs
+        :rtype: dict[str, list[np.ndarray]]
+        """
+        cols, rows = self._y_rows(cols=cols)
+        (sweeps, traces), xs = kernels.x_intercepts(
+            x=self["x"], ys=self._data[:, rows], val=val
+        )
+
+        # the crossings are sorted by sweep then trace, so they are split by counting them
+        counts = np.bincount(
+            sweeps * len(cols) + traces, minlength=len(self) * len(cols)
+        )
+        parts = np.split(xs, np.cumsum(counts)[:-1])
+        return {col: parts[jj :: len(cols)] for jj, col in enumerate(cols)}
+
+    def find_y_intercept(
+        self, val: float | typing_ext.ListLike, cols: Iterable[str] | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Linearly interpolates Y traces at one or more X values, for every sweep and trace at once. The X trace must be
+        monotonic.
+
+        :param val: The X value(s)
+        :type val: float or np.ndarray or list or tuple
+        :param cols: The Y traces to interpolate, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :return: The Y values, with the shape (sweeps,) + np.shape(val), in trace name (key) - values (value) pairs
+        :rtype: dict[str, np.ndarray]
+        """
+        cols, rows = self._y_rows(cols=cols)
+        ys = kernels.y_intercepts(x=self["x"], ys=self._data[:, rows], vals=val)
+        return dict(zip(cols, ys.swapaxes(0, 1)))
+
+    def find_poly_fit(
+        self, deg: int, cols: Iterable[str] | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Least-squares polynomial fit of Y traces versus X, every sweep and trace is solved in a single call.
+
+        :param deg: The degree of the polynomial
+        :type deg: int
+        :param cols: The Y traces to fit, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :return: The coefficients, highest power first, with the shape (sweeps, deg + 1), in trace name (key) -
+            coefficients (value) pairs
+        :rtype: dict[str, np.ndarray]
+        """
+        cols, rows = self._y_rows(cols=cols)
+        coeffs = kernels.poly_fit(x=self["x"], ys=self._data[:, rows], deg=deg)
+        return dict(zip(cols, coeffs.swapaxes(0, 1)))
+
+    def find_fft(
+        self, cols: Iterable[str] | None = None, window: str | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        The one-sided FFT of Y traces, computed for every sweep and trace at once. The X trace must be evenly spaced.
+
+        :param cols: The Y traces to transform, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :param window: The name of a numpy window function applied before the FFT, e.g. 'hanning' or 'blackman'
+        :type window: str, optional
+        :return: The frequencies under 'freq', in cycles per unit of X, and the complex spectra with the shape
+            (sweeps, frequencies), in trace name (key) - spectra (value) pairs
+        :rtype: dict[str, np.ndarray]
+        """
+        cols, rows = self._y_rows(cols=cols)
+        freq, spectra = kernels.rfft(x=self["x"], ys=self._data[:, rows], window=window)
+        return {"freq": freq} | dict(zip(cols, spectra.swapaxes(0, 1)))
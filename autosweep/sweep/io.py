@@ -1,14 +1,30 @@
+import functools
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import orjson
+
 from autosweep.data_types import metadata as md
 from autosweep.sweep import sweep_parser
 from autosweep.utils import io, typing_ext
 
 
-def read_json(path: typing_ext.PathLike):
+def read_json(
+    path: typing_ext.PathLike,
+    names: Iterable[str] | None = None,
+    cols: Iterable[str] | None = None,
+):
     """
-    With raw data saved in JSON form, this function parses the data
+    With raw data saved in JSON form, this function parses the data. Only the requested sweeps and traces are turned
+    into Sweep objects, though the whole file is still parsed, see read_npy() for truly selective loading.
 
     :param path: The path to the JSON file which contains the data
     :type path: str or pathlib.Path
+    :param names: The names of the sweeps to load, by default all of them
+    :type names: Iterable[str], optional
+    :param cols: The names of the traces to load in every sweep, by default all of them. The X trace is always loaded.
+    :type cols: Iterable[str], optional
     :return: Three items are returned. 1) A dictionary of the Sweep objects contained in the file. 2) A dictionary of
         the global metadata. 3) The DUTInfo instance contained in the the file
     """
@@ -16,9 +32,18 @@ def read_json(path: typing_ext.PathLike):
 
     dut = md.DUTInfo.from_dict(data=data["dut_info"])
 
-    sweeps = {
-        n: sweep_parser.Sweep.from_dict(data=d) for n, d in data["sweeps"].items()
-    }
+    sweeps = {}
+    for n in _select_names(names=names, available=data["sweeps"]):
+        d = data["sweeps"][n]
+        if cols is not None:
+            keep = _select_cols(cols=cols, available=tuple(d["traces"]), name=n)
+            d = {
+                **d,
+                "traces": {c: d["traces"][c] for c in keep},
+                "attrs": {c: d["attrs"][c] for c in keep} if d.get("attrs") else None,
+            }
+        sweeps[n] = sweep_parser.Sweep.from_dict(data=d)
+
     return sweeps, data["metadata"], dut
 
 
@@ -27,10 +52,15 @@ def to_json(
     path: typing_ext.PathLike,
     metadata: dict | None = None,
     dut_info: md.DUTInfo | None = None,
+    dtype: str | np.dtype | None = None,
+    compact: bool = False,
+    compression: str | None = None,
+    level: int | None = None,
 ) -> None:
     """
     Converts a set of raw data to JSON format. Useful for saving raw data to file used in scripting but also as part of
-    the TestExec tests.
+    the TestExec tests. The file is written incrementally, sweep by sweep and trace by trace, see
+    autosweep.utils.io.stream_json().
 
     :param sweeps: a collection of sweeps to write to a JSON file
     :type sweeps: dict[str, Sweep]
@@ -40,13 +70,289 @@ def to_json(
     :type metadata: dict, optional
     :param dut_info: The DUT info for this dataset
     :type dut_info: autosweep.data_types.metadata.DUTInfo, optional
+    :param dtype: The storage type to write the traces with, e.g. 'float32', by default the type of each sweep
+    :type dtype: str or np.dtype, optional
+    :param compact: Write the file without indentation
+    :type compact: bool, default False
+    :param compression: The codec to compress the file with, 'gzip', 'bz2' or 'lzma', see autosweep.utils.io.CODECS.
+        Compressed files are detected by read_json().
+    :type compression: str, optional
+    :param level: The compression level, by default the one of the codec
+    :type level: int, optional
     :return: None
     """
+    if dtype is not None:
+        sweeps = {name: sweep.astype(dtype) for name, sweep in sweeps.items()}
 
+    # the catalog is written before the trace data
     out = {
         "dut_info": dut_info if dut_info else {},
         "metadata": metadata if metadata else {},
+        "catalog": {name: _catalog_entry(sweep) for name, sweep in sweeps.items()},
         "sweeps": {name: sweep.to_dict() for name, sweep in sweeps.items()},
     }
 
-    io.write_json(data=out, path=path)
+    io.stream_json(
+        data=out, path=path, compact=compact, compression=compression, level=level
+    )
+
+
+def to_npy(
+    sweeps: dict,
+    path: typing_ext.PathLike,
+    metadata: dict | None = None,
+    dut_info: md.DUTInfo | None = None,
+    dtype: str | np.dtype | None = None,
+) -> None:
+    """
+    Writes a set of raw data to a folder, with the data block of every sweep in its own '.npy' file and everything
+    else in 'header.json'. Unlike JSON, these files can be memory-mapped back, see read_npy().
+
+    :param sweeps: a collection of sweeps to write to the folder
+    :type sweeps: dict[str, Sweep]
+    :param path: The folder to write to, it is created if needed
+    :type path: str or pathlib.Path
+    :param metadata: Any additional file-wide metadata you want to include
+    :type metadata: dict, optional
+    :param dut_info: The DUT info for this dataset
+    :type dut_info: autosweep.data_types.metadata.DUTInfo, optional
+    :param dtype: The storage type to write the traces with, e.g. 'float32', by default the type of each sweep
+    :type dtype: str or np.dtype, optional
+    :return: None
+    """
+    if dtype is not None:
+        sweeps = {name: sweep.astype(dtype) for name, sweep in sweeps.items()}
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    header = {}
+    for name, sweep in sweeps.items():
+        fname = f"{name}.npy"
+        np.save(path / fname, np.ascontiguousarray(sweep.data), allow_pickle=False)
+        header[name] = {"file": fname, **_catalog_entry(sweep)}
+
+    out = {
+        "dut_info": dut_info if dut_info else {},
+        "metadata": metadata if metadata else {},
+        "sweeps": header,
+    }
+
+    io.write_json(data=out, path=path / "header.json")
+
+
+def read_npy(
+    path: typing_ext.PathLike,
+    mmap: bool = True,
+    names: Iterable[str] | None = None,
+    cols: Iterable[str] | None = None,
+):
+    """
+    Parses raw data written by to_npy(). When memory-mapped, opening the data is almost instant and only the parts of
+    the traces actually used (e.g. by slicing or 'filter_range()') are read from disk. The memory-mapped data is
+    read-only, a Sweep copies it before changing it (see 'change_unit()'). The files of the sweeps which are not
+    requested are not opened at all.
+
+    :param path: The folder which contains the data
+    :type path: str or pathlib.Path
+    :param mmap: Memory-map the data blocks instead of reading them into memory
+    :type mmap: bool, default True
+    :param names: The names of the sweeps to load, by default all of them
+    :type names: Iterable[str], optional
+    :param cols: The names of the traces to load in every sweep, by default all of them. The X trace is always loaded.
+    :type cols: Iterable[str], optional
+    :return: Three items are returned. 1) A dictionary of the Sweep objects contained in the folder. 2) A dictionary
+        of the global metadata. 3) The DUTInfo instance contained in the folder
+    """
+    path = Path(path)
+    data = io.read_json(path=path / "header.json")
+
+    dut = md.DUTInfo.from_dict(data=data["dut_info"])
+
+    sweeps = {}
+    for name in _select_names(names=names, available=data["sweeps"]):
+        d = data["sweeps"][name]
+        block = np.load(
+            path / d["file"], mmap_mode="r" if mmap else None, allow_pickle=False
+        )
+        keep, attrs = tuple(d["cols"]), d["attrs"]
+        if cols is not None:
+            keep = _select_cols(cols=cols, available=keep, name=name)
+            # only the rows of the requested traces are read
+            block = block[[d["cols"].index(c) for c in keep]]
+            attrs = {c: attrs[c] for c in keep} if attrs else None
+
+        sweeps[name] = sweep_parser.Sweep.from_arrays(
+            data=block,
+            cols=keep,
+            attrs=attrs,
+            metadata=d["metadata"],
+            copy=False,
+        )
+
+    return sweeps, data["metadata"], dut
+
+
+def read_data(
+    path: typing_ext.PathLike,
+    mmap: bool = True,
+    names: Iterable[str] | None = None,
+    cols: Iterable[str] | None = None,
+):
+    """
+    Parses raw data written by either to_json() or to_npy(), the format is detected from the path: a folder holding a
+    'header.json' file is read with read_npy(), anything else with read_json().
+
+    :param path: The JSON file or the folder which contains the data
+    :type path: str or pathlib.Path
+    :param mmap: Memory-map the data blocks of the 'npy' format instead of reading them into memory
+    :type mmap: bool, default True
+    :param names: The names of the sweeps to load, by default all of them
+    :type names: Iterable[str], optional
+    :param cols: The names of the traces to load in every sweep, by default all of them. The X trace is always loaded.
+    :type cols: Iterable[str], optional
+    :return: Three items are returned. 1) A dictionary of the Sweep objects contained in the data. 2) A dictionary of
+        the global metadata. 3) The DUTInfo instance contained in the data
+    """
+    path = Path(path)
+    if _is_npy(path=path):
+        return read_npy(path=path, mmap=mmap, names=names, cols=cols)
+    return read_json(path=path, names=names, cols=cols)
+
+
+def read_many(
+    paths: Iterable[typing_ext.PathLike],
+    mmap: bool = True,
+    names: Iterable[str] | None = None,
+    cols: Iterable[str] | None = None,
+    workers: int = 8,
+):
+    """
+    Reads the raw data of many runs with read_data() in a thread pool, see autosweep.utils.io.load_many(). The runs
+    are yielded as soon as they are read, with the error raised while reading them, if any. The (path, data, error)
+    triples are not outputs of read_data(): the callers must filter out the failed runs and unpack the others, e.g.
+    '{path: data for path, data, error in read_many(paths) if error is None}' can be passed on to
+    autosweep.sweep.SweepCollection.from_runs().
+
+    :param paths: The JSON files or the folders which contain the data
+    :type paths: Iterable[str or pathlib.Path]
+    :param mmap: Memory-map the data blocks of the 'npy' format instead of reading them into memory
+    :type mmap: bool, default True
+    :param names: The names of the sweeps to load, by default all of them
+    :type names: Iterable[str], optional
+    :param cols: The names of the traces to load in every sweep, by default all of them
+    :type cols: Iterable[str], optional
+    :param workers: The number of threads
+    :type workers: int, default 8
+    :yield path: The path of the raw data
+    :yield data: The output of read_data(), None if it failed
+    :yield error: The exception raised by read_data(), None if it succeeded
+    """
+    names = None if names is None else list(names)
+    cols = None if cols is None else list(cols)
+    loader = functools.partial(read_data, mmap=mmap, names=names, cols=cols)
+    yield from io.load_many(paths=paths, loader=loader, workers=workers)
+
+
+def read_header(path: typing_ext.PathLike) -> tuple[dict, dict, md.DUTInfo]:
+    """
+    Reads the global metadata, the DUT info and the catalog of the sweeps of some raw data, without building any
+    Sweep. With the 'npy' format, only 'header.json' is read and the trace data is not touched at all. With the JSON
+    format, the catalog is written before the trace data (see to_json()), so only the beginning of the file is read
+    and parsed. JSON files written before the catalog existed are parsed as a whole.
+
+    Every entry of the catalog holds the trace names ('cols'), the number of points ('points'), the storage type
+    ('dtype'), the 'attrs' and the 'metadata' of a sweep.
+
+    :param path: The JSON file or the folder which contains the data
+    :type path: str or pathlib.Path
+    :return: Three items are returned. 1) The catalog, in sweep name (key) - entry (value) pairs. 2) A dictionary of
+        the global metadata. 3) The DUTInfo instance contained in the data
+    :rtype: tuple[dict, dict, autosweep.data_types.metadata.DUTInfo]
+    """
+    path = Path(path)
+    npy = _is_npy(path=path)
+    if npy:
+        data = io.read_json(path=path / "header.json")
+    elif (data := _read_json_header(path=path)) is not None:
+        return (
+            data["catalog"],
+            data["metadata"],
+            md.DUTInfo.from_dict(data=data["dut_info"]),
+        )
+    else:
+        data = io.read_json(path=path)
+
+    catalog = data.get("catalog", {})
+    for name, d in data["sweeps"].items():
+        if npy:
+            entry = {k: v for k, v in d.items() if k != "file"}
+            if "points" not in entry:
+                # written before the catalog existed, only the header of the .npy file is read
+                block = np.load(path / d["file"], mmap_mode="r", allow_pickle=False)
+                entry.update(points=block.shape[1], dtype=block.dtype.name)
+            catalog[name] = entry
+        elif name not in catalog:
+            traces = d["traces"]
+            catalog[name] = {
+                "cols": list(traces),
+                "points": len(next(iter(traces.values()))),
+                "dtype": d.get("dtype"),
+                "attrs": d.get("attrs"),
+                "metadata": d.get("metadata"),
+            }
+
+    return catalog, data["metadata"], md.DUTInfo.from_dict(data=data["dut_info"])
+
+
+def _read_json_header(path: Path, chunk_size: int = 1 << 16) -> dict | None:
+    # The entries before the trace data of a JSON file written by to_json(), read from the beginning of the file until
+    # the top-level 'sweeps' key: the file up to that key, closed, is valid JSON. A "sweeps" found anywhere else (e.g. a
+    # key of the metadata) cuts the file within a nested object, which does not parse. None if there is no catalog.
+    key = b'"sweeps"'
+    buffer, start = b"", 0
+    with io.open_read(path=path) as f:
+        while chunk := f.read(chunk_size):
+            buffer += chunk
+            while (idx := buffer.find(key, start)) >= 0:
+                start = idx + 1
+                try:
+                    data = orjson.loads(buffer[:idx].rstrip().rstrip(b",") + b"}")
+                except orjson.JSONDecodeError:
+                    continue
+                return data if isinstance(data, dict) and "catalog" in data else None
+            # a key cut by the end of the chunk is searched for again with the next chunk
+            start = max(start, len(buffer) - len(key) + 1)
+    return None
+
+
+def _is_npy(path: Path) -> bool:
+    return (path / "header.json").is_file()
+
+
+def _catalog_entry(sweep: sweep_parser.Sweep) -> dict:
+    # what is known about a sweep without reading its trace data
+    return {
+        "cols": sweep.cols,
+        "points": len(sweep),
+        "dtype": sweep.dtype.name,
+        "attrs": sweep.attrs if sweep.attrs else None,
+        "metadata": sweep.metadata,
+    }
+
+
+def _select_names(names: Iterable[str] | None, available: Iterable[str]) -> list:
+    if names is None:
+        return list(available)
+
+    names = list(names)
+    if missing := [n for n in names if n not in available]:
+        raise KeyError(f"The sweeps {missing} do not exist")
+    return names
+
+
+def _select_cols(cols: Iterable[str], available: tuple, name: str) -> tuple:
+    # the X trace is always kept, first
+    cols = [c for c in cols if c != available[0]]
+    if missing := [c for c in cols if c not in available]:
+        raise KeyError(f"The traces {missing} do not exist in the sweep '{name}'")
+    return (available[0], *dict.fromkeys(cols))
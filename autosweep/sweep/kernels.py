@@ -0,0 +1,254 @@
+import numpy as np
+
+from autosweep.utils import ta_math, typing_ext
+
+# The analysis kernels work on a shared X trace of shape (points,) and Y data of shape (..., points), e.g. the Y traces
+# of a Sweep (traces, points) or of a SweepCollection (sweeps, traces, points), so every trace is processed at once.
+
+
+def x_intercepts(
+    x: np.ndarray, ys: np.ndarray, val: float = 0.0
+) -> tuple[tuple[np.ndarray, ...], np.ndarray]:
+    """
+    Finds every X value where the Y data crosses a value, linearly interpolated between the points around the sign
+    change. A point exactly equal to the value is a crossing.
+
+    :param x: The X trace
+    :type x: np.ndarray
+    :param ys: The Y data, with the points along the last axis
+    :type ys: np.ndarray
+    :param val: The Y value to cross
+    :type val: float, default 0
+    :return: The indices along the leading axes of 'ys' of every crossing (as returned by np.nonzero), and the X
+        values of the crossings, in order of the leading axes then of X
+    :rtype: tuple[tuple[np.ndarray, ...], np.ndarray]
+    """
+    d = np.asarray(ys) - val
+    lo, hi = d[..., :-1], d[..., 1:]
+
+    # the points on the value, and the strict sign changes between 2 points
+    *lead_pt, idx_pt = np.nonzero(d == 0)
+    *lead, idx = np.nonzero((lo * hi) < 0)
+
+    d_lo, d_hi = lo[(*lead, idx)], hi[(*lead, idx)]
+    xs = x[idx] + d_lo / (d_lo - d_hi) * (x[idx + 1] - x[idx])
+
+    lead = [np.concatenate((a, b)) for a, b in zip(lead, lead_pt)]
+    xs = np.concatenate((xs, x[idx_pt]))
+    order = np.lexsort((xs, *lead[::-1]))
+    return tuple(a[order] for a in lead), xs[order]
+
+
+def y_intercepts(
+    x: np.ndarray, ys: np.ndarray, vals: float | typing_ext.ListLike
+) -> np.ndarray:
+    """
+    Linearly interpolates the Y data at some X values. The interpolation table is computed once, from X only, and
+    applied to all of the Y data.
+
+    :param x: The X trace, it must be monotonic
+    :type x: np.ndarray
+    :param ys: The Y data, with the points along the last axis
+    :type ys: np.ndarray
+    :param vals: The X values
+    :type vals: float or np.ndarray or list or tuple
+    :return: The interpolated Y values, with the shape ys.shape[:-1] + np.shape(vals)
+    :rtype: np.ndarray
+    """
+    return apply_table(ys=ys, table=resample_table(x=x, grid=vals))
+
+
+def poly_fit(x: np.ndarray, ys: np.ndarray, deg: int) -> np.ndarray:
+    """
+    Least-squares polynomial fit of all of the Y data at once. The Vandermonde matrix of X is built and scaled once,
+    then solved against every trace in a single call, like np.polyfit with a 2D 'y'.
+
+    :param x: The X trace
+    :type x: np.ndarray
+    :param ys: The Y data, with the points along the last axis
+    :type ys: np.ndarray
+    :param deg: The degree of the polynomial
+    :type deg: int
+    :return: The coefficients, highest power first (as np.polyval expects), with the shape ys.shape[:-1] + (deg + 1,)
+    :rtype: np.ndarray
+    """
+    ys = np.asarray(ys)
+    if deg < 0 or deg >= len(x):
+        raise ValueError(
+            "The argument 'deg' must be between 0 and the number of points - 1."
+        )
+
+    vander = np.vander(x, deg + 1)
+    # scaling the columns improves the conditioning, e.g. for wavelengths around 1550 nm
+    scale = np.sqrt(np.square(vander).sum(axis=0))
+    scale[scale == 0] = 1
+
+    rhs = ys.reshape(-1, ys.shape[-1]).T
+    coeffs, *_ = np.linalg.lstsq(vander / scale, rhs, rcond=None)
+    return (coeffs.T / scale).reshape(*ys.shape[:-1], deg + 1)
+
+
+def rfft(
+    x: np.ndarray, ys: np.ndarray, window: str | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The one-sided FFT of all of the Y data at once. The X trace must be evenly spaced.
+
+    :param x: The X trace
+    :type x: np.ndarray
+    :param ys: The Y data, with the points along the last axis
+    :type ys: np.ndarray
+    :param window: The name of a numpy window function applied before the FFT, e.g. 'hanning' or 'blackman'
+    :type window: str, optional
+    :return: The frequencies, in cycles per unit of X, and the complex spectra with the shape
+        ys.shape[:-1] + (frequencies,)
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    ys = np.asarray(ys)
+    dx = np.diff(x)
+    if not np.allclose(dx, dx.mean(), rtol=1e-6, atol=0):
+        raise ValueError("The X trace must be evenly spaced to compute an FFT.")
+
+    if window:
+        ys = ys * getattr(np, window)(ys.shape[-1])
+
+    return np.fft.rfftfreq(ys.shape[-1], d=dx.mean()), np.fft.rfft(ys, axis=-1)
+
+
+def resample_table(
+    x: np.ndarray, grid: typing_ext.ListLike, method: str = "linear"
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes the table to resample data from an X trace onto a new grid. The resampled data is
+    y[..., lo] + weights * (y[..., hi] - y[..., lo]), see apply_table(). The table only depends on X and the grid, so it
+    can be reused for every trace and every sweep sharing the same X trace.
+
+    :param x: The X trace, it must be monotonic for the 'linear' method
+    :type x: np.ndarray
+    :param grid: The new X values
+    :type grid: np.ndarray or list or tuple
+    :param method: 'linear' interpolation, or 'nearest' point
+    :type method: str, default 'linear'
+    :return: The lower indices, the upper indices and the weights of the upper indices
+    :rtype: tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    grid = np.asarray(grid, dtype=float)
+    x = np.asarray(x)
+    decreasing = x[0] > x[-1]
+    if decreasing:
+        x = x[::-1]
+
+    if method == "linear":
+        if np.any(np.diff(x) < 0):
+            raise ValueError("The X trace must be monotonic to interpolate.")
+        lo, weights = ta_math.interp_weights(array=x, vals=grid)
+        hi = lo + 1
+    elif method == "nearest":
+        if np.any(np.diff(x) < 0):
+            lo = np.array(
+                [ta_math.find_nearest_idx(array=x, val=v) for v in grid.ravel()]
+            )
+            lo = lo.reshape(grid.shape)
+        else:
+            lo = ta_math.find_nearest_idxs_sorted(array=x, vals=grid)
+        hi, weights = lo, np.zeros(grid.shape)
+    else:
+        raise ValueError("The argument 'method' must be 'linear' or 'nearest'.")
+
+    if decreasing:
+        lo, hi = len(x) - 1 - lo, len(x) - 1 - hi
+    return lo, hi, weights
+
+
+def apply_table(
+    ys: np.ndarray, table: tuple[np.ndarray, np.ndarray, np.ndarray]
+) -> np.ndarray:
+    """
+    Resamples Y data with a table computed by resample_table().
+
+    :param ys: The Y data, with the points along the last axis
+    :type ys: np.ndarray
+    :param table: The lower indices, the upper indices and the weights of the upper indices
+    :type table: tuple[np.ndarray, np.ndarray, np.ndarray]
+    :return: The resampled data, with the shape ys.shape[:-1] + grid.shape
+    :rtype: np.ndarray
+    """
+    lo, hi, weights = table
+    y_lo = np.asarray(ys)[..., lo]
+    if not weights.any():
+        return y_lo
+    return y_lo + weights * (ys[..., hi] - y_lo)
+
+
+def minmax_idxs(ys: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Decimates Y data by keeping the minimum and the maximum of each bucket of consecutive points, so every peak and
+    notch survives. All of the Y data is processed at once.
+
+    :param ys: The Y data, with the points along the last axis
+    :type ys: np.ndarray
+    :param buckets: The number of buckets, twice as many points are kept
+    :type buckets: int
+    :return: The sorted indices of the points to keep, with the shape ys.shape[:-1] + (2 * buckets,)
+    :rtype: np.ndarray
+    """
+    ys = np.asarray(ys)
+    points = ys.shape[-1]
+    size = -(-points // buckets)
+
+    # the last bucket is padded with its last point, which cannot change its min or max
+    pad = [(0, 0)] * (ys.ndim - 1) + [(0, buckets * size - points)]
+    blocks = np.pad(ys, pad, mode="edge").reshape(*ys.shape[:-1], buckets, size)
+
+    offsets = np.arange(buckets)[:, None] * size
+    idxs = np.stack((blocks.argmin(axis=-1), blocks.argmax(axis=-1)), axis=-1)
+    idxs = np.minimum(np.sort(idxs, axis=-1) + offsets, points - 1)
+    return idxs.reshape(*ys.shape[:-1], 2 * buckets)
+
+
+def lttb_idxs(x: np.ndarray, ys: np.ndarray, points: int) -> np.ndarray:
+    """
+    Decimates Y data with the Largest-Triangle-Three-Buckets algorithm, which keeps the points that best preserve the
+    visual shape of a trace. There is one step per kept point, each one vectorized over the points of the bucket and
+    over all of the Y data, so the time does not depend much on the length of the traces.
+
+    :param x: The X trace
+    :type x: np.ndarray
+    :param ys: The Y data, with the points along the last axis
+    :type ys: np.ndarray
+    :param points: The number of points to keep, at least 3
+    :type points: int
+    :return: The sorted indices of the points to keep, with the shape ys.shape[:-1] + (points,)
+    :rtype: np.ndarray
+    """
+    ys = np.asarray(ys)
+    length = ys.shape[-1]
+    if points < 3:
+        raise ValueError("The argument 'points' must be at least 3.")
+
+    # the first and last points are always kept, the others are split into 'points - 2' buckets
+    edges = np.append(
+        (np.arange(points - 1) * (length - 2) / (points - 2)).astype(int) + 1, length
+    )
+
+    idxs = np.zeros((*ys.shape[:-1], points), dtype=np.intp)
+    idxs[..., -1] = length - 1
+    a = idxs[..., 0]
+    for ii in range(points - 2):
+        start, end = edges[ii], edges[ii + 1]
+        n_start, n_end = edges[ii + 1], edges[ii + 2]
+
+        # the triangle between the last kept point, a point of this bucket and the average of the next bucket
+        x_avg = x[n_start:n_end].mean()
+        y_avg = ys[..., n_start:n_end].mean(axis=-1, keepdims=True)
+        x_a = x[a][..., None]
+        y_a = np.take_along_axis(ys, a[..., None], axis=-1)
+        area = np.abs(
+            (x_a - x_avg) * (ys[..., start:end] - y_a)
+            - (x_a - x[start:end]) * (y_avg - y_a)
+        )
+
+        a = start + area.argmax(axis=-1)
+        idxs[..., ii + 1] = a
+
+    return idxs
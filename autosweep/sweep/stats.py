@@ -0,0 +1,71 @@
+import numpy as np
+
+from autosweep.sweep import sweep_parser
+from autosweep.utils import typing_ext
+
+
+def stack_sweeps(sweeps: list[sweep_parser.Sweep]) -> np.ndarray:
+    """
+    Stacks the Y traces of repeated sweeps into a single array. Every sweep must have the same traces and the same
+    X trace.
+
+    :param sweeps: The repeated sweeps
+    :type sweeps: list[autosweep.sweep.sweep_parser.Sweep]
+    :return: The Y trace data, with the shape (repeats, Y traces, points)
+    :rtype: np.ndarray
+    """
+    if not sweeps:
+        raise ValueError("There must be at least 1 sweep to stack.")
+
+    first = sweeps[0]
+    for s in sweeps[1:]:
+        if s.x_col != first.x_col or s.y_cols != first.y_cols:
+            raise ValueError("Every sweep must have the same traces to be stacked.")
+        if not np.array_equal(s["x"], first["x"]):
+            raise ValueError("Every sweep must have the same X trace to be stacked.")
+
+    return np.stack([s.data[1:] for s in sweeps])
+
+
+def aggregate_sweeps(
+    sweeps: list[sweep_parser.Sweep],
+    percentiles: typing_ext.ListLike = (5, 95),
+) -> sweep_parser.Sweep:
+    """
+    Reduces repeated sweeps to a single sweep. For every Y trace, the new sweep holds the mean (with the original trace
+    name), the standard deviation ('<name>_std') and the percentile envelopes ('<name>_p<percentile>') over the repeats.
+    The statistics of every trace are computed at once over the stacked data.
+
+    :param sweeps: The repeated sweeps
+    :type sweeps: list[autosweep.sweep.sweep_parser.Sweep]
+    :param percentiles: The percentiles to compute, between 0 and 100
+    :type percentiles: list or tuple or np.ndarray, default (5, 95)
+    :return: The aggregated sweep, with the attrs of the first sweep
+    :rtype: autosweep.sweep.sweep_parser.Sweep
+    """
+    stack = stack_sweeps(sweeps=sweeps)
+    first = sweeps[0]
+
+    ddof = 1 if len(sweeps) > 1 else 0
+    stats = {"": stack.mean(axis=0), "_std": stack.std(axis=0, ddof=ddof)}
+    if len(percentiles):
+        envelopes = np.percentile(stack, q=percentiles, axis=0)
+        stats |= {f"_p{p:g}": env for p, env in zip(percentiles, envelopes)}
+
+    traces = {first.x_col: first["x"]}
+    for suffix, data in stats.items():
+        traces |= {f"{col}{suffix}": d for col, d in zip(first.y_cols, data)}
+
+    attrs = None
+    if first.attrs:
+        attrs = {first.x_col: first.attrs[first.x_col]}
+        for suffix in stats:
+            for col in first.y_cols:
+                desc, *unit = first.attrs[col]
+                attrs[f"{col}{suffix}"] = (f"{desc}{suffix.replace('_', ' ')}", *unit)
+
+    return sweep_parser.Sweep(
+        traces=traces,
+        attrs=attrs,
+        metadata=first.metadata | {"repeats": len(sweeps)},
+    )
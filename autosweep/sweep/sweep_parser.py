@@ -1,3 +1,4 @@
+import itertools
 import logging
 from collections.abc import Iterable
 from typing import Any
@@ -5,13 +6,17 @@ from typing import Any
 import numpy as np
 
 from autosweep.data_types import filereader
-from autosweep.utils import ta_math
+from autosweep.sweep import kernels, units
+from autosweep.utils import ta_math, typing_ext
 
 
 class Sweep(filereader.GeneralIOClass):
     """
     A class used to manipulate test data, usually taken as a sweep (IV, laser power meter, etc.). Simplifies handling
-    metadta, units and import/export.
+    metadta, units and import/export. Every trace is stored as a row of a single contiguous 2D block (see 'data'), so
+    slicing or transforming the whole sweep is a single numpy operation. Without a 'dtype', the type of the block must
+    hold the values of every trace exactly, e.g. a datetime64 trace or large int64 timestamps cannot share a block with
+    float traces, and a ValueError is raised.
 
     :param traces: The collection of data from the sweep, in ch-name (key) - values (value) pairs.
     :type traces: dict
@@ -19,10 +24,19 @@ class Sweep(filereader.GeneralIOClass):
     :type attrs: dict, optional
     :param metadata: Any additional metadata specific to this sweep
     :type metadata: dict, optional
+    :param dtype: The storage type of the traces, e.g. 'float32' to halve the memory and file size, the X trace is then
+        converted too. By default, it is the common type of the Y traces when they are floating point and the X trace
+        fits in it exactly, so float32 instrument data stays float32 with e.g. an index X trace. Otherwise, it is the
+        common type of all of the traces, so a fine X grid (e.g. from np.linspace) is never rounded.
+    :type dtype: str or np.dtype, optional
     """
 
     def __init__(
-        self, traces: dict, attrs: dict | None = None, metadata: dict | None = None
+        self,
+        traces: dict,
+        attrs: dict | None = None,
+        metadata: dict | None = None,
+        dtype: str | np.dtype | None = None,
     ):
         self.logger = logging.getLogger(self.__class__.__name__)
 
@@ -33,35 +47,113 @@ class Sweep(filereader.GeneralIOClass):
         if len(traces) < 2:
             raise ValueError("There must be more than 1 trace of data to make a sweep.")
 
+        arrays = [np.asarray(v) for v in traces.values()]
+        for k, v in zip(traces, arrays):
+            # double check that every column has the same length
+            if len(v) != len(arrays[0]):
+                msg = (
+                    f"Trace '{k}' does not have the same length as the x-trace. Every trace must have the same "
+                    f"length."
+                )
+                raise ValueError(msg)
+
+        # parsing data, every trace is copied into a row of a single contiguous block, which must hold every trace
+        # exactly unless a type is given
+        if dtype is None:
+            dtype = _block_dtype(arrays=arrays)
+            for k, v in zip(traces, arrays):
+                if not _fits(array=v, dtype=dtype):
+                    raise ValueError(
+                        f"Trace '{k}' ({v.dtype}) cannot be stored as {dtype} with the other traces without changing "
+                        f"its values, convert it first or pass the argument 'dtype'."
+                    )
+        self._setup(
+            data=np.array(arrays, dtype=dtype),
+            cols=tuple(traces.keys()),
+            attrs=attrs,
+            metadata=metadata,
+        )
+
+    def _setup(
+        self, data: np.ndarray, cols: tuple, attrs: dict | None, metadata: dict | None
+    ) -> None:
         self._attrs = {}
         if attrs:
-            if attrs.keys() != traces.keys():
+            if attrs.keys() != set(cols):
                 raise ValueError("The keys of 'traces' and 'attrs' must match.")
 
-            self._attrs = {k: tuple(attr) for k, attr in attrs.items()}
+            self._attrs = {k: tuple(attrs[k]) for k in cols}
+
+        self._set_data(data=data, cols=cols)
+        self.metadata = metadata if metadata else {}
 
-        # parsing data
-        self._traces = {k: np.array(v) for k, v in traces.items()}
+    def _set_data(self, data: np.ndarray, cols: tuple) -> None:
+        self._data = data
+        # set when another sweep is made from a view of the block, see _own_block()
+        self._shared = False
 
-        t_keys = tuple(self._traces.keys())
-        self._aliases = {"x": t_keys[0], "y": t_keys[1]} | {
-            f"y{ii}": k for ii, k in enumerate(t_keys[1:])
+        # the traces are views of the rows of the block, they share its memory
+        self._traces = {k: data[ii] for ii, k in enumerate(cols)}
+        self._aliases = {"x": cols[0], "y": cols[1]} | {
+            f"y{ii}": k for ii, k in enumerate(cols[1:])
         }
-        self._ranges = {}
-        self._len = len(self["x"])
-        self._col_num = len(self._traces)
-        for k, v in self._traces.items():
-            self._ranges[k] = (np.min(v), np.max(v))
+        self._col_num, self._len = data.shape
 
-            # double check that every column has the same length
-            if len(v) != self._len:
-                msg = (
-                    f"Trace '{k}' does not have the same length as the x-trace. Every trace must have the same "
-                    f"length."
-                )
-                raise ValueError(msg)
+        # computed on first access by 'ranges' and 'monotonic'
+        self._ranges = None
+        self._monotonic = None
 
-        self.metadata = metadata if metadata else {}
+    @classmethod
+    def from_arrays(
+        cls,
+        data: np.ndarray,
+        cols: Iterable[str],
+        attrs: dict | None = None,
+        metadata: dict | None = None,
+        copy: bool = True,
+        dtype: str | np.dtype | None = None,
+    ):
+        """
+        Creates a Sweep instance from a 2D block of data, with one trace per row, for example the output of an
+        instrument which returns every channel at once. The block is copied once into the sweep, unless 'copy' is False.
+
+        :param data: The trace data, with the shape (traces, points). The first row is the X trace.
+        :type data: np.ndarray
+        :param cols: The names of the traces, in the order of the rows
+        :type cols: list[str] or tuple[str]
+        :param attrs: The collection of trace attributes, with the same channel names as the traces
+        :type attrs: dict, optional
+        :param metadata: Any additional metadata specific to this sweep
+        :type metadata: dict, optional
+        :param copy: When False, the sweep uses 'data' as is, without copying nor checking it. This is meant for
+            trusted internal paths (file IO, slicing, instrument readback) with a 2D array which nothing else modifies.
+        :type copy: bool, default True
+        :param dtype: The storage type of the traces, by default the type of 'data'. Ignored when 'copy' is False.
+        :type dtype: str or np.dtype, optional
+        :return: A sweep instance
+        :rtype: autosweep.sweep.sweep_parser.Sweep
+        """
+        cols = tuple(cols)
+
+        if not copy:
+            obj = cls.__new__(cls)
+            obj.logger = logging.getLogger(cls.__name__)
+            obj._setup(data=data, cols=cols, attrs=attrs, metadata=metadata)
+            return obj
+
+        data = np.array(data, dtype=dtype)
+        if data.ndim != 2:
+            raise ValueError("The argument 'data' must be a 2D array.")
+        if data.shape[0] != len(cols):
+            raise ValueError(
+                "There must be one name in 'cols' for every row of 'data'."
+            )
+        if len(cols) < 2:
+            raise ValueError("There must be more than 1 trace of data to make a sweep.")
+
+        return cls.from_arrays(
+            data=data, cols=cols, attrs=attrs, metadata=metadata, copy=False
+        )
 
     @classmethod
     def from_dict(cls, data: dict):
@@ -73,7 +165,24 @@ class Sweep(filereader.GeneralIOClass):
         :return: A sweep instance
         :rtype: autosweep.sweep.sweep_parser.Sweep
         """
-        return Sweep(**data)
+        traces = data["traces"]
+        cols = tuple(traces.keys())
+
+        # the file data is read once into a new block, which is then used as is
+        try:
+            block = np.array(list(traces.values()), dtype=data.get("dtype"))
+        except ValueError:
+            block = None
+        if block is None or block.ndim != 2 or len(cols) < 2:
+            return Sweep(**data)
+
+        return Sweep.from_arrays(
+            data=block,
+            cols=cols,
+            attrs=data.get("attrs"),
+            metadata=data.get("metadata"),
+            copy=False,
+        )
 
     def __str__(self) -> str:
         return self.__repr__()
@@ -91,8 +200,24 @@ class Sweep(filereader.GeneralIOClass):
         return self._len
 
     def __getitem__(self, item):
+        # slicing the sweep slices every trace at once
+        if isinstance(item, slice):
+            return self._from_block(data=self._data[:, item])
+
         return self._traces[self.get_trace_col(col=item)]
 
+    def _from_block(self, data: np.ndarray):
+        # a new sweep sharing the memory of this one, e.g. a view of some of its points
+        if np.may_share_memory(data, self._data):
+            self._shared = True
+        return self.from_arrays(
+            data=data,
+            cols=self.cols,
+            attrs=self.attrs if self.attrs else None,
+            metadata=self.metadata if self.metadata else None,
+            copy=False,
+        )
+
     @property
     def shape(self) -> tuple[int, int]:
         """
@@ -103,6 +228,53 @@ class Sweep(filereader.GeneralIOClass):
         """
         return self._col_num, self._len
 
+    @property
+    def data(self) -> np.ndarray:
+        """
+        Accessor for the block holding every trace, one trace per row. The traces are views of its rows.
+
+        :return: The trace data, with the shape (traces, points)
+        :rtype: np.ndarray
+        """
+        return self._data
+
+    @property
+    def dtype(self) -> np.dtype:
+        """
+        Accessor for the storage type of the traces
+
+        :return: The type of the data block
+        :rtype: np.dtype
+        """
+        return self._data.dtype
+
+    def astype(self, dtype: str | np.dtype):
+        """
+        Converts the traces to another storage type, e.g. 'float32' before saving large data.
+
+        :param dtype: The new storage type
+        :type dtype: str or np.dtype
+        :return: A new Sweep instance with the same attrs and metadata as this Sweep, with the converted data
+        :rtype: autosweep.sweep.sweep_parser.Sweep
+        """
+        return self.from_arrays(
+            data=self._data,
+            cols=self.cols,
+            attrs=self.attrs if self.attrs else None,
+            metadata=self.metadata if self.metadata else None,
+            dtype=dtype,
+        )
+
+    @property
+    def cols(self) -> tuple[str]:
+        """
+        Accessor for the names of every trace, in the order of the rows of the data
+
+        :return: The names of the traces
+        :rtype: tuple[str]
+        """
+        return tuple(self._traces.keys())
+
     @property
     def attrs(self) -> dict[str, tuple]:
         return self._attrs
@@ -110,13 +282,36 @@ class Sweep(filereader.GeneralIOClass):
     @property
     def ranges(self) -> dict[str, tuple]:
         """
-        Accessor for the min and max values of each trace
+        Accessor for the min and max values of each trace. They are computed on the first access, then cached.
 
         :return: The ranges of the trace data
         :rtype: dict[str, tuple]
         """
+        if self._ranges is None:
+            mins, maxs = self._data.min(axis=1), self._data.max(axis=1)
+            self._ranges = {k: (mins[ii], maxs[ii]) for ii, k in enumerate(self.cols)}
         return self._ranges
 
+    @property
+    def monotonic(self) -> int:
+        """
+        Accessor for the ordering of the X trace: 1 if it is non-decreasing, -1 if it is non-increasing and 0
+        otherwise. It is computed on the first access, then cached. On a monotonic X trace, the look-ups are binary
+        searches.
+
+        :return: The ordering of the X trace
+        :rtype: int
+        """
+        if self._monotonic is None:
+            dx = np.diff(self["x"])
+            if np.all(dx >= 0):
+                self._monotonic = 1
+            elif np.all(dx <= 0):
+                self._monotonic = -1
+            else:
+                self._monotonic = 0
+        return self._monotonic
+
     @property
     def x_col(self) -> str:
         """
@@ -174,7 +369,12 @@ class Sweep(filereader.GeneralIOClass):
         :return: The data needed to save to disk to recreate the instance
         :rtype: dict
         """
-        return {"traces": self._traces, "attrs": self.attrs, "metadata": self.metadata}
+        return {
+            "traces": self._traces,
+            "attrs": self.attrs,
+            "metadata": self.metadata,
+            "dtype": self.dtype.name,
+        }
 
     def get_axis_labels(self, use_generic_names: bool = False) -> dict[str, str]:
         """
@@ -218,7 +418,12 @@ class Sweep(filereader.GeneralIOClass):
         :return: None
         """
         col = self.get_trace_col(col=col)
-        self._traces[col] = coeff * self._traces[col]
+        scaled = coeff * self._traces[col]
+
+        self._own_block(dtype=scaled.dtype)
+        self._traces[col][:] = scaled
+        self._ranges = None
+        self._monotonic = None
 
         if self.attrs:
             if unit:
@@ -228,6 +433,79 @@ class Sweep(filereader.GeneralIOClass):
                     "The argument 'unit' must be defined for a Sweep with attrs"
                 )
 
+    def convert_unit(
+        self,
+        cols: str | Iterable[str],
+        unit: str,
+        src: str | None = None,
+        desc: str | None = None,
+    ) -> None:
+        """
+        Converts some traces to another unit in place, for example from 'W' to 'dBm' or from 'nm' to 'THz', see
+        autosweep.sweep.units.convert() for the supported units. All of the traces are converted in one call, directly
+        in the data block when this sweep owns it (it is copied first otherwise, so the sweeps sharing it are not
+        changed), and the attrs are updated. Use 'change_unit()' for any other scaling.
+
+        :param cols: The trace name, or the trace names, to convert. They must all have the same unit.
+        :type cols: str or Iterable[str]
+        :param unit: The unit to convert to
+        :type unit: str
+        :param src: The unit of the traces, it must be defined for a Sweep without attrs, otherwise it is taken from the
+            attrs
+        :type src: str, optional
+        :param desc: The new description of the traces in their attrs entries, e.g. 'Frequency' for a wavelength
+        :type desc: str, optional
+        :return: None
+        """
+        cols = (cols,) if isinstance(cols, str) else cols
+        cols = [self.get_trace_col(col=c) for c in cols]
+
+        if src is None:
+            if not self.attrs:
+                raise ValueError(
+                    "The argument 'src' must be defined for a Sweep without attrs"
+                )
+            srcs = {self.attrs[c][1] if len(self.attrs[c]) == 2 else None for c in cols}
+            if len(srcs) != 1 or None in srcs:
+                raise ValueError(
+                    f"The traces {cols} do not have a single unit in their attrs."
+                )
+            src = srcs.pop()
+
+        if not units.is_supported(src=src, dst=unit):
+            raise ValueError(f"Cannot convert from '{src}' to '{unit}'.")
+
+        # the conversions are made in floating point, directly in the block
+        self._own_block(dtype=np.result_type(self._data, 1.0))
+
+        # the traces are grouped in runs of consecutive rows, each converted at once through a view of the block
+        rows = sorted({self.cols.index(c) for c in cols})
+        for _, run in itertools.groupby(enumerate(rows), key=lambda r: r[1] - r[0]):
+            run = [row for _, row in run]
+            view = self._data[run[0] : run[-1] + 1]
+            units.convert(values=view, src=src, dst=unit, out=view)
+
+        self._ranges = None
+        self._monotonic = None
+
+        if self.attrs:
+            for c in cols:
+                self._attrs[c] = (desc or self._attrs[c][0], unit)
+
+    def _own_block(self, dtype: np.dtype) -> None:
+        # a change which needs another type of data, e.g. a float on int data, changes the type of the block. The
+        # block is also copied when it is a view of another sweep, when views of it were given to other sweeps (e.g. by
+        # slicing or filter_range()), so the change does not leak into them, or when it is read-only, e.g.
+        # memory-mapped from a file (copy-on-write). Only a block owned by this sweep alone is changed in place.
+        if (
+            dtype != self._data.dtype
+            or self._shared
+            or not self._data.flags.owndata
+            or not self._data.flags.writeable
+        ):
+            dtype = np.result_type(self._data, dtype)
+            self._set_data(data=np.array(self._data, dtype=dtype), cols=self.cols)
+
     def filter_range(self, x_min: float, x_max: float):
         """
         Applies an operation to filter all trace data within the x-value range passed in.
@@ -237,27 +515,247 @@ class Sweep(filereader.GeneralIOClass):
         :param x_max: The new maximum value
         :type x_min: float
         :return: A new Sweep instance with the same attrs and metadata as this Sweep, but with smaller trace data bound
-            by the (x_min, x_max).
+            by the (x_min, x_max). Its traces are views of the traces of this Sweep, a unit change of either Sweep
+            copies the data first, so it does not change the other one.
         """
-        idx_min = ta_math.find_nearest_idx(array=self["x"], val=x_min)
-        idx_max = ta_math.find_nearest_idx(array=self["x"], val=x_max)
+        idx_min, idx_max = self.find_nearest_idxs(vals=(x_min, x_max))
+        return self[idx_min:idx_max]
 
-        traces = {col: trace[idx_min:idx_max] for col, trace in self._traces.items()}
-        return Sweep(
-            traces=traces,
-            attrs=self.attrs if self.attrs else None,
+    def find_nearest_idxs(self, vals: float | typing_ext.ListLike) -> np.ndarray:
+        """
+        Finds the indices of the X values nearest to many values at once. This is a binary search when the X trace is
+        monotonic, otherwise every value is searched for with ta_math.find_nearest_idx().
+
+        :param vals: The X values to search for
+        :type vals: float or np.ndarray or list or tuple
+        :return: The nearest indices, with the shape of 'vals'
+        :rtype: np.ndarray
+        """
+        x = self["x"]
+        vals = np.asarray(vals)
+
+        if self.monotonic == 1:
+            return ta_math.find_nearest_idxs_sorted(array=x, vals=vals)
+        if self.monotonic == -1:
+            return (
+                len(x) - 1 - ta_math.find_nearest_idxs_sorted(array=x[::-1], vals=vals)
+            )
+
+        idxs = [ta_math.find_nearest_idx(array=x, val=v) for v in vals.ravel()]
+        return np.array(idxs, dtype=np.intp).reshape(vals.shape)
+
+    def loc(self, vals: typing_ext.ListLike):
+        """
+        Looks up the points nearest to a set of X values.
+
+        :param vals: The X values to look up
+        :type vals: np.ndarray or list or tuple
+        :return: A new Sweep instance with the same attrs and metadata as this Sweep, holding the nearest point for
+            each of 'vals'
+        :rtype: autosweep.sweep.sweep_parser.Sweep
+        """
+        idxs = self.find_nearest_idxs(vals=np.atleast_1d(vals))
+        return self._from_block(data=self._data[:, idxs])
+
+    def interp_at(self, vals: typing_ext.ListLike, cols: Iterable[str] | None = None):
+        """
+        Linearly interpolates the Y traces at a set of X values, for every trace in one vectorized operation. Values
+        outside of the X range get the first or last point. The X trace must be monotonic.
+
+        :param vals: The X values to interpolate at
+        :type vals: np.ndarray or list or tuple
+        :param cols: The Y traces to interpolate, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :return: A new Sweep instance with 'vals' as the X trace and the interpolated Y traces, with the same attrs and
+            metadata as this Sweep
+        :rtype: autosweep.sweep.sweep_parser.Sweep
+        """
+        return self.resample(grid=vals, method="linear", cols=cols)
+
+    def resample(
+        self,
+        grid: typing_ext.ListLike,
+        method: str = "linear",
+        cols: Iterable[str] | None = None,
+        table: tuple | None = None,
+    ):
+        """
+        Resamples the Y traces onto a new X grid, every trace in one vectorized operation. Values outside of the X
+        range get the first or last point.
+
+        :param grid: The new X values
+        :type grid: np.ndarray or list or tuple
+        :param method: 'linear' interpolation, which needs a monotonic X trace, or 'nearest' point
+        :type method: str, default 'linear'
+        :param cols: The Y traces to resample, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :param table: A table from autosweep.sweep.kernels.resample_table() for this X trace and grid, to reuse it
+            when resampling many sweeps with the same X trace
+        :type table: tuple, optional
+        :return: A new Sweep instance with 'grid' as the X trace and the resampled Y traces, with the same attrs and
+            metadata as this Sweep
+        :rtype: autosweep.sweep.sweep_parser.Sweep
+        """
+        if method == "linear" and not self.monotonic:
+            raise ValueError("The X trace must be monotonic to interpolate.")
+
+        grid = np.atleast_1d(np.asarray(grid, dtype=float))
+        cols, rows = self._y_rows(cols=cols)
+        if table is None:
+            table = kernels.resample_table(x=self["x"], grid=grid, method=method)
+
+        block = kernels.apply_table(ys=self._data[rows], table=table)
+
+        cols = (self.x_col, *cols)
+        return self.from_arrays(
+            data=np.vstack((grid, block)),
+            cols=cols,
+            attrs={c: self.attrs[c] for c in cols} if self.attrs else None,
             metadata=self.metadata if self.metadata else None,
+            copy=False,
+        )
+
+    def _y_rows(self, cols: Iterable[str] | None) -> tuple[tuple[str], list[int]]:
+        # the names and the rows in the block of some Y traces, by default all of them
+        cols = (
+            self.y_cols if cols is None else tuple(self.get_trace_col(c) for c in cols)
         )
+        return cols, [self.cols.index(c) for c in cols]
+
+    def find_x_intercept(
+        self, val: float = 0.0, cols: Iterable[str] | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Finds the X values where Y traces cross a value, linearly interpolated, for every trace at once.
+
+        :param val: The Y value to cross
+        :type val: float, default 0
+        :param cols: The Y traces to search, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :return: The X values of every crossing, in trace name (key) - crossings (value) pairs
+        :rtype: dict[str, np.ndarray]
+        """
+        cols, rows = self._y_rows(cols=cols)
+        (lead,), xs = kernels.x_intercepts(x=self["x"], ys=self._data[rows], val=val)
+        return {col: xs[lead == ii] for ii, col in enumerate(cols)}
+
+    def find_y_intercept(
+        self, val: float | typing_ext.ListLike, cols: Iterable[str] | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Linearly interpolates Y traces at one or more X values, for every trace at once. The X trace must be monotonic.
+
+        :param val: The X value(s)
+        :type val: float or np.ndarray or list or tuple
+        :param cols: The Y traces to interpolate, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :return: The Y values, with the shape of 'val', in trace name (key) - values (value) pairs
+        :rtype: dict[str, np.ndarray]
+        """
+        if not self.monotonic:
+            raise ValueError("The X trace must be monotonic to interpolate.")
+
+        cols, rows = self._y_rows(cols=cols)
+        ys = kernels.y_intercepts(x=self["x"], ys=self._data[rows], vals=val)
+        return dict(zip(cols, ys))
+
+    def find_poly_fit(
+        self, deg: int, cols: Iterable[str] | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Least-squares polynomial fit of Y traces versus X, every trace is solved in a single call.
+
+        :param deg: The degree of the polynomial
+        :type deg: int
+        :param cols: The Y traces to fit, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :return: The coefficients, highest power first (as np.polyval expects), in trace name (key) - coefficients
+            (value) pairs
+        :rtype: dict[str, np.ndarray]
+        """
+        cols, rows = self._y_rows(cols=cols)
+        coeffs = kernels.poly_fit(x=self["x"], ys=self._data[rows], deg=deg)
+        return dict(zip(cols, coeffs))
+
+    def find_fft(
+        self, cols: Iterable[str] | None = None, window: str | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        The one-sided FFT of Y traces, computed for every trace at once. The X trace must be evenly spaced.
+
+        :param cols: The Y traces to transform, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :param window: The name of a numpy window function applied before the FFT, e.g. 'hanning' or 'blackman'
+        :type window: str, optional
+        :return: The frequencies under 'freq', in cycles per unit of X, and the complex spectrum of each trace, in
+            trace name (key) - spectrum (value) pairs
+        :rtype: dict[str, np.ndarray]
+        """
+        cols, rows = self._y_rows(cols=cols)
+        freq, spectra = kernels.rfft(x=self["x"], ys=self._data[rows], window=window)
+        return {"freq": freq} | dict(zip(cols, spectra))
+
+    def decimate(
+        self,
+        points: int = 2000,
+        method: str = "minmax",
+        cols: Iterable[str] | None = None,
+    ) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """
+        Reduces the Y traces to about 'points' points for plotting, e.g. to the pixel resolution of a figure. Both
+        methods keep the peaks and notches: 'minmax' keeps the minimum and maximum of each bucket of points, 'lttb'
+        keeps the points which best preserve the shape (Largest-Triangle-Three-Buckets). Sweeps with fewer points are
+        returned unchanged.
+
+        :param points: The number of points to keep for each trace
+        :type points: int, default 2000
+        :param method: 'minmax' or 'lttb'
+        :type method: str, default 'minmax'
+        :param cols: The Y traces to decimate, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :return: The decimated (x-data, y-data) of every Y trace, in trace name (key) - data (value) pairs
+        :rtype: dict[str, tuple[np.ndarray, np.ndarray]]
+        """
+        cols, rows = self._y_rows(cols=cols)
+        x = self["x"]
+        if len(self) <= points:
+            return {col: (x, self._data[row]) for col, row in zip(cols, rows)}
+
+        ys = self._data[rows]
+        if method == "minmax":
+            idxs = kernels.minmax_idxs(ys=ys, buckets=max(points // 2, 1))
+        elif method == "lttb":
+            idxs = kernels.lttb_idxs(x=x, ys=ys, points=points)
+        else:
+            raise ValueError("The argument 'method' must be 'minmax' or 'lttb'.")
 
-    # def find_x_intercept(self, val: float, y_col: str):
-    #     y = self[self.get_trace_col(col=y_col)]
-    #     raise NotImplementedError
-    #
-    # def find_y_intercept(self, val: float, y_col: str):
-    #     raise NotImplementedError
-    # #
-    # # def find_poly_fit(self, deg: int, y_col: str):
-    # #     raise NotImplementedError
-    # #
-    # # def find_fft(self, y_col: str):
-    # #     raise NotImplementedError
+        return {
+            col: (x[idx], y[idx]) for col, y, idx in zip(cols, ys, idxs, strict=True)
+        }
+
+
+def _block_dtype(arrays: list[np.ndarray]) -> np.dtype:
+    # the Y traces set the type of floating point data, unless the X trace would be rounded in it
+    try:
+        ys = np.result_type(*arrays[1:])
+        if np.issubdtype(ys, np.floating) and _fits(array=arrays[0], dtype=ys):
+            return ys
+        return np.result_type(*arrays)
+    except TypeError:
+        types = sorted({str(a.dtype) for a in arrays})
+        raise ValueError(
+            f"The traces cannot be stored in a single block, their types {types} have no common type."
+        ) from None
+
+
+def _fits(array: np.ndarray, dtype: np.dtype) -> bool:
+    # whether the values of an array are stored exactly with another type, only numbers are converted
+    if array.dtype.kind not in "biufc" or np.dtype(dtype).kind not in "biufc":
+        return array.dtype == dtype
+    # numpy deems the conversion of large integers to floats safe, they are checked
+    if np.can_cast(array.dtype, dtype, casting="safe") and not (
+        array.dtype.kind in "iu" and np.dtype(dtype).kind in "fc"
+    ):
+        return True
+    back = array.astype(dtype).astype(array.dtype)
+    return np.array_equal(back, array, equal_nan=array.dtype.kind in "fc")
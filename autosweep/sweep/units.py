@@ -0,0 +1,97 @@
+import numpy as np
+
+from autosweep.utils import typing_ext
+
+# the speed of light, in nm * THz
+C_NM_THZ = 299792.458
+
+# the linear units of each quantity, as the factor to the base unit of the quantity
+POWER = {"W": 1.0, "mW": 1e-3, "uW": 1e-6, "nW": 1e-9}
+WAVELENGTH = {"m": 1.0, "um": 1e-6, "nm": 1e-9, "pm": 1e-12}
+FREQUENCY = {"Hz": 1.0, "GHz": 1e9, "THz": 1e12}
+
+_LINEAR = (POWER, WAVELENGTH, FREQUENCY)
+
+
+def _family(unit: str) -> dict | None:
+    for family in _LINEAR:
+        if unit in family:
+            return family
+    return None
+
+
+def is_supported(src: str, dst: str) -> bool:
+    """
+    Checks if a conversion between two units is supported by convert()
+
+    :param src: The unit of the values
+    :type src: str
+    :param dst: The unit to convert to
+    :type dst: str
+    :return: True if the conversion is supported
+    :rtype: bool
+    """
+    src_fam, dst_fam = _family(src), _family(dst)
+    if src_fam is not None and src_fam is dst_fam:
+        return True
+
+    if "dBm" in (src, dst):
+        return src == dst or POWER in (src_fam, dst_fam)
+
+    return (src_fam, dst_fam) in ((WAVELENGTH, FREQUENCY), (FREQUENCY, WAVELENGTH))
+
+
+def convert(
+    values: typing_ext.ListLike, src: str, dst: str, out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Converts values between units, for example 'W' to 'dBm' or 'nm' to 'THz'. The conversion is made with numpy ufuncs
+    writing into 'out', so no intermediate array is allocated, and 'out' can be 'values' itself for an in-place
+    conversion. 'values' can have any shape, e.g. several traces of a sweep at once.
+
+    The supported units are the power units (W, mW, uW, nW and dBm), the wavelength units (m, um, nm and pm) and the
+    frequency units (Hz, GHz and THz). A wavelength can be converted to a frequency and vice versa. A power of 0 is
+    -inf dBm.
+
+    :param values: The values to convert
+    :type values: np.ndarray or list or tuple
+    :param src: The unit of the values
+    :type src: str
+    :param dst: The unit to convert to
+    :type dst: str
+    :param out: The floating point array to write the result into, with the shape of 'values'
+    :type out: np.ndarray, optional
+    :raises ValueError: The conversion is not supported
+    :return: The converted values, 'out' if it was passed in
+    :rtype: np.ndarray
+    """
+    if not is_supported(src=src, dst=dst):
+        raise ValueError(f"Cannot convert from '{src}' to '{dst}'.")
+
+    values = np.asarray(values)
+    if out is None:
+        out = np.empty(values.shape, dtype=np.result_type(values, 1.0))
+
+    src_fam, dst_fam = _family(src), _family(dst)
+    if src == dst:
+        np.copyto(out, values)
+    elif src_fam is dst_fam:
+        np.multiply(values, src_fam[src] / dst_fam[dst], out=out)
+    elif dst == "dBm":
+        # to mW, then 10 * log10(P)
+        np.multiply(values, src_fam[src] / POWER["mW"], out=out)
+        with np.errstate(divide="ignore"):
+            np.log10(out, out=out)
+        np.multiply(out, 10, out=out)
+    elif src == "dBm":
+        # 10 ** (P / 10), in mW
+        np.divide(values, 10, out=out)
+        np.power(10, out, out=out)
+        np.multiply(out, POWER["mW"] / dst_fam[dst], out=out)
+    else:
+        # f = c / wvl, the scale of both units folds into the numerator
+        num = C_NM_THZ * (WAVELENGTH["nm"] * FREQUENCY["THz"])
+        with np.errstate(divide="ignore"):
+            np.divide(num / (src_fam[src] * dst_fam[dst]), values, out=out)
+
+    return out
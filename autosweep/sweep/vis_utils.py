@@ -1,5 +1,7 @@
 import base64
 import io
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
 
 import matplotlib
 import matplotlib.pyplot as plt
@@ -7,6 +9,9 @@ import numpy as np
 
 from autosweep.utils.typing_ext import PathLike
 
+if TYPE_CHECKING:
+    from autosweep.sweep.sweep_parser import Sweep
+
 
 class FigHandler:
     """
@@ -35,6 +40,50 @@ class FigHandler:
         else:
             return self.axes
 
+    def plot_sweep(
+        self,
+        sweep: "Sweep",
+        ax: matplotlib.axes.Axes | None = None,
+        cols: Iterable[str] | None = None,
+        points: int | None = None,
+        method: str = "minmax",
+        **kwargs,
+    ) -> None:
+        """
+        Plots the Y traces of a sweep against its X trace, decimated to about the pixel resolution of the figure (see
+        Sweep.decimate()), so long sweeps are plotted and saved in a bounded time. Each trace is labelled with its
+        name, and the axes are labelled from the sweep attrs if there are any.
+
+        :param sweep: The sweep to plot
+        :type sweep: autosweep.sweep.sweep_parser.Sweep
+        :param ax: The axis to plot on, by default the first one
+        :type ax: matplotlib.axes.Axes, optional
+        :param cols: The Y traces to plot, by default all of them
+        :type cols: list[str] or tuple[str], optional
+        :param points: The number of points plotted per trace, by default 2 per horizontal pixel of the figure
+        :type points: int, optional
+        :param method: The decimation method, 'minmax' or 'lttb'
+        :type method: str, default 'minmax'
+        :param kwargs: Any other arguments of matplotlib.axes.Axes.plot()
+        :type kwargs: dict
+        :return: None
+        """
+        ax = self.ax if ax is None else ax
+        if points is None:
+            points = 2 * int(self.fig.get_figwidth() * self.fig.dpi)
+
+        for col, (x, y) in sweep.decimate(
+            points=points, method=method, cols=cols
+        ).items():
+            ax.plot(x, y, label=col, **kwargs)
+
+        if sweep.attrs:
+            labels = sweep.get_axis_labels()
+            ax.set_xlabel(labels[sweep.x_col])
+            ax.set_ylabel(
+                labels[sweep.get_trace_col(next(iter(cols)) if cols else "y")]
+            )
+
     def save_fig(self, path: PathLike) -> None:
         """
         Saves a figure as a png to a file.
@@ -2,9 +2,15 @@ import logging
 from pathlib import Path
 
 from autosweep.data_types import metadata, recipe, station_config
-from autosweep.exec_helpers import reporter, status_writer
+from autosweep.exec_helpers import (
+    migrator,
+    reporter,
+    run_index,
+    spec_store,
+    status_writer,
+)
 from autosweep.instruments import instrument_manager
-from autosweep.utils import io, logger, registrar, typing_ext
+from autosweep.utils import generics, io, logger, registrar, typing_ext
 
 
 class TestExec:
@@ -50,32 +56,66 @@ class TestExec:
         self.test_classes = registrar.TEST_CLASSES
 
         self.timestamp = {"start": metadata.TimeStamp(), "end": None}
+        # 'complete' or 'error', set when the run is over
+        self.status = None
 
+        # The run is saved in 'dst_path', within the data path. With a staging folder, the run is written in it then
+        # migrated to 'dst_path' when it is over, so the tests never wait for a slow network share.
         run_name = f'{self.dut_info.part_num}_{self.dut_info.ser_num}_{self.timestamp["start"]}'
+        self.data_path = self.station_config.data_path
+        staging_path = self.station_config.staging_path
         if self.reanalyze:
-            self.run_path = Path(path)
+            self.run_path = self.dst_path = Path(path)
         else:
-            self.run_path = self.station_config.data_path / run_name
+            self.dst_path = self.station_config.run_path(
+                run_name=run_name,
+                dut_info=self.dut_info,
+                timestamp=self.timestamp["start"],
+            )
+            self.run_path = (
+                self.dst_path if staging_path is None else staging_path / run_name
+            )
 
         # Holds the functions related to writing the status files, the test results, and code to generate reports, these
         # functions/classes can be replaced when test_exec is inherited from to change the behavior.
 
         self.status_writer = status_writer.write_status
+        self.run_indexer = run_index.index_run
+        self.spec_recorder = spec_store.record_specs
         self.test_results = reporter.ResultsHold()
         self.reports_generator = reporter.gen_reports
 
         # holds the test instances after each recipe step is done
         self.test_instances = {}
 
+        # builds the ZIP file of the run one recipe step at a time, when 'gen_archive=True'
+        self.archiver = None
+
+        # moves the staged runs to the data path, when the station has a staging folder
+        self.migrator = (
+            migrator.Migrator()
+            if staging_path is not None and not self.reanalyze
+            else None
+        )
+
         # the folder to look for the HTML template
         self.html_path = Path(__file__).parent / "exec_helpers" / "html"
 
     def __enter__(self):
-        self.run_path.mkdir(exist_ok=True)
+        if self.migrator is not None:
+            # the runs left in the staging folder, e.g. by a network outage, are migrated along with this one
+            self.migrator.migrate_pending(staging_path=self.run_path.parent)
+
+        self.run_path.mkdir(parents=True, exist_ok=True)
 
         # Any calls made to the logger will not be recorded to file if they are made before calling init_logger()
         logger.init_logger(path=self.run_path / f'runlog_{self.timestamp["start"]}.txt')
 
+        if self.gen_archive:
+            self.archiver = io.RunArchiver(
+                src_path=self.run_path, dst_path=self.run_path.parent
+            )
+
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -83,17 +123,62 @@ class TestExec:
             self.instr_mgr.close_instruments()
 
         self.timestamp["end"] = metadata.TimeStamp()
+        self.status = "complete" if exc_type is None else "error"
 
         status_fname = (
             f'status_renalysis_{self.timestamp["start"]}.json'
             if self.reanalyze
             else "status.json"
         )
-        self.status_writer(test_exec=self, path=self.run_path / status_fname)
-        self.reports_generator(test_exec=self)
+        try:
+            # the report is the main output of the run, it is generated before the bookkeeping below, which writes to
+            # the data path (e.g. on a network share) and must not lose it
+            self.reports_generator(test_exec=self)
+        finally:
+            self._run_step(
+                self.status_writer, test_exec=self, path=self.run_path / status_fname
+            )
+            # the run index, the spec store and the latest run pointers hold the acquisitions, not the re-analyses
+            if not self.reanalyze:
+                self._run_step(self.run_indexer, test_exec=self)
+                self._run_step(self.spec_recorder, test_exec=self)
+                self._run_step(
+                    generics.write_last_run,
+                    path=self.data_path,
+                    run_path=self.dst_path,
+                    timestamp=self.timestamp["start"],
+                    dut_info=self.dut_info,
+                )
+
+            # the archive and the staged run are always closed and handed over, so a staged run is never left without
+            # its migration marker
+            try:
+                if self.archiver is not None:
+                    self.archiver.close()
+            finally:
+                if self.migrator is not None:
+                    self._stage_run()
+
+    def _run_step(self, func, **kwargs) -> None:
+        # a bookkeeping step of the end of the run, a failure (e.g. a locked index or an unreachable share) is logged
+        # and does not stop the others
+        if func is None:
+            return
+        try:
+            func(**kwargs)
+        except Exception:
+            self.logger.exception(
+                f"The end-of-run step '{getattr(func, '__name__', func)}' failed"
+            )
 
-        if self.gen_archive:
-            io.write_archive(src_path=self.run_path, dst_path=self.run_path.parent)
+    def _stage_run(self) -> None:
+        # the run log is released first, so the run folder does not change while being migrated
+        logger.init_logger()
+        extras = ()
+        if self.archiver is not None and self.archiver.path.exists():
+            extras = (self.archiver.path,)
+        migrator.stage(run_path=self.run_path, dst_path=self.dst_path, extras=extras)
+        self.migrator.start(run_path=self.run_path)
 
     def run_recipe(self) -> None:
         """
@@ -136,10 +221,30 @@ class TestExec:
             **params["init"],
         )
 
+        # the raw data format comes from the station, then the recipe, then the recipe step
+        raw_data_format = {
+            **self.station_config.raw_data_format,
+            **self.recipe.raw_data_format,
+            **params.get("raw_data", {}),
+        }
+        if unknown := raw_data_format.keys() - test_instance.raw_data_format.keys():
+            raise ValueError(f"Unknown raw data format entries: {sorted(unknown)}")
+        test_instance.raw_data_format.update(raw_data_format)
+
         # Don't acquire data if doing re-analysis
         if not self.reanalyze:
-            test_instance.run_acquire(instr_mgr=self.instr_mgr, **params["acquire"])
+            # an optional 'repeat' entry is either the number of repeats or the arguments of 'run_repeats()'
+            if repeat := params.get("repeat"):
+                repeat = {"count": repeat} if isinstance(repeat, int) else repeat
+                test_instance.run_repeats(
+                    instr_mgr=self.instr_mgr, **repeat, **params["acquire"]
+                )
+            else:
+                test_instance.run_acquire(instr_mgr=self.instr_mgr, **params["acquire"])
 
         test_instance.run_analysis(**params["analysis"])
         self.test_results.validate()
         self.test_instances[name] = test_instance
+
+        if self.archiver is not None:
+            self.archiver.add(path=test_path)
@@ -1,6 +1,12 @@
 from autosweep.tests.abs_test import (
     AbsTest,
 )
+from autosweep.tests.pol_sweep import (
+    PolSweep,
+)
+from autosweep.tests.stream_test import (
+    AbsStreamTest,
+)
 from autosweep.tests.virt_test import (
     VirtualTest,
 )
@@ -8,4 +14,4 @@ from autosweep.tests.wvl_sweep import (
     WvlSweep,
 )
 
-__all__ = ["AbsTest", "VirtualTest", "WvlSweep"]
+__all__ = ["AbsStreamTest", "AbsTest", "PolSweep", "VirtualTest", "WvlSweep"]
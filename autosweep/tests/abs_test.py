@@ -2,8 +2,11 @@ import logging
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 from autosweep import sweep
 from autosweep.data_types.metadata import DUTInfo
+from autosweep.utils import io
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -38,6 +41,18 @@ class AbsTest(ABC):
 
         self.save_path = save_path
         self.raw_data_fname = "raw_data.json"
+        self.raw_data_dname = "raw_data"
+        self.repeats_fname = "repeats.npz"
+
+        # the default format of the raw data written by 'save_data()', the TestExec sets it from the station
+        # configuration and the recipe
+        self.raw_data_format = {
+            "layout": "json",
+            "dtype": None,
+            "compact": False,
+            "compression": None,
+            "level": None,
+        }
 
         self._raw_data = False
         self.metadata = None
@@ -45,6 +60,9 @@ class AbsTest(ABC):
 
         self.results = results
 
+        # holds the data of each repeat while 'run_repeats()' is running
+        self._repeats = None
+
     @abstractmethod
     def run_acquire(self, instr_mgr: "InstrumentManager") -> None:
         """
@@ -57,17 +75,38 @@ class AbsTest(ABC):
         raise NotImplementedError
 
     def save_data(
-        self, sweeps: dict | None = None, metadata: dict | None = None
+        self,
+        sweeps: dict | None = None,
+        metadata: dict | None = None,
+        layout: str | None = None,
+        dtype: str | None = None,
     ) -> None:
         """
-        A helper method that can be called from within 'run_acquire()' to save data in a standardized way.
+        A helper method that can be called from within 'run_acquire()' to save data in a standardized way. The layout
+        and the storage type default to the 'raw_data_format' attribute, which can be set per station or per recipe.
 
         :param sweeps: A collection of Sweep instances
         :type sweeps: dict, optional
         :param metadata: Any global metadata needing saving
         :type metadata: dict, optional
+        :param layout: 'json' writes a single JSON file, 'npy' writes a folder with one '.npy' file per sweep (see
+            autosweep.sweep.io.to_npy), which is memory-mapped by 'load_data()'. Use 'npy' for very large traces.
+        :type layout: str, optional
+        :param dtype: The storage type of the saved traces, e.g. 'float32' to halve the size of large data. If it is
+            not defined here or in 'raw_data_format', the type of each sweep is kept.
+        :type dtype: str, optional
         :return: None
         """
+        layout = layout if layout else self.raw_data_format["layout"]
+        dtype = dtype if dtype else self.raw_data_format["dtype"]
+        if layout not in ("json", "npy"):
+            raise ValueError("The argument 'layout' must be 'json' or 'npy'.")
+        compression = self.raw_data_format["compression"]
+        if compression is not None and compression not in io.CODECS:
+            raise ValueError(
+                f"The raw data compression must be one of {tuple(io.CODECS)}."
+            )
+
         for key, s in sweeps.items():
             if not isinstance(key, str):
                 msg = f"The 'sweep' key, '{key}' should be a str"
@@ -77,18 +116,97 @@ class AbsTest(ABC):
                 msg = f"The 'sweep' value for key '{key}' should be a autosweep.sweep.Sweep class instance"
                 raise TypeError(msg)
 
+        # while repeating, the data is only written to disk once it is aggregated
+        if self._repeats is not None:
+            self._repeats.append((sweeps, metadata if metadata else {}))
+            return
+
+        if dtype is not None:
+            sweeps = {key: s.astype(dtype) for key, s in sweeps.items()}
+
         self.sweeps = sweeps
         self.metadata = metadata if metadata else {}
 
-        sweep.io.to_json(
-            sweeps=self.sweeps,
-            metadata=self.metadata,
-            dut_info=self.dut_info,
-            path=self.save_path / self.raw_data_fname,
-        )
+        if layout == "npy":
+            sweep.io.to_npy(
+                sweeps=self.sweeps,
+                metadata=self.metadata,
+                dut_info=self.dut_info,
+                path=self.save_path / self.raw_data_dname,
+            )
+        else:
+            sweep.io.to_json(
+                sweeps=self.sweeps,
+                metadata=self.metadata,
+                dut_info=self.dut_info,
+                path=self._raw_data_path(compression=compression),
+                compact=self.raw_data_format["compact"],
+                compression=compression,
+                level=self.raw_data_format["level"],
+            )
 
         self._raw_data = True
 
+    def run_repeats(
+        self,
+        instr_mgr: "InstrumentManager",
+        count: int,
+        percentiles: list | tuple = (5, 95),
+        **kwargs,
+    ) -> None:
+        """
+        Runs 'run_acquire()' several times and saves the aggregated data. The sweeps saved by each repeat are stacked
+        and reduced to their mean, standard deviation and percentile envelopes (see
+        autosweep.sweep.stats.aggregate_sweeps), which are saved as the raw data so 'run_analysis()' works unchanged.
+        The data of every repeat is saved in a compressed NPZ file, see 'load_repeats()'.
+
+        :param instr_mgr: An instrument manager with the appropriate instruments
+        :type instr_mgr: autosweep.instruments.instrument_manager.InstrumentManager
+        :param count: The number of repeats
+        :type count: int
+        :param percentiles: The percentile envelopes to compute, between 0 and 100
+        :type percentiles: list or tuple, default (5, 95)
+        :param kwargs: The parameters passed on to 'run_acquire()'
+        :type kwargs: dict
+        :return: None
+        """
+        if count < 1:
+            raise ValueError("The argument 'count' must be at least 1.")
+
+        self._repeats = []
+        try:
+            for ii in range(count):
+                self.logger.info(f"Repeat {ii + 1} of {count}")
+                self.run_acquire(instr_mgr=instr_mgr, **kwargs)
+        finally:
+            repeats, self._repeats = self._repeats, None
+
+        if len(repeats) != count:
+            raise ValueError(
+                "Every repeat of 'run_acquire()' must call 'save_data()' once."
+            )
+
+        names = repeats[0][0].keys()
+        sweeps = {}
+        stacks = {}
+        for name in names:
+            reps = [r[name] for r, _ in repeats]
+            sweeps[name] = sweep.stats.aggregate_sweeps(
+                sweeps=reps, percentiles=percentiles
+            )
+
+            stacks[f"{name}/{reps[0].x_col}"] = reps[0]["x"]
+            stack = sweep.stats.stack_sweeps(sweeps=reps)
+            stacks |= {
+                f"{name}/{col}": d
+                for col, d in zip(reps[0].y_cols, stack.swapaxes(0, 1))
+            }
+
+        np.savez_compressed(self.save_path / self.repeats_fname, **stacks)
+
+        metadata = repeats[0][1] | {"repeats": count, "percentiles": list(percentiles)}
+        self.save_data(sweeps=sweeps, metadata=metadata)
+
     @abstractmethod
     def run_analysis(self, report_headings: list) -> None:
         """
@@ -103,9 +221,36 @@ class AbsTest(ABC):
     def load_data(self) -> None:
         """
         Used in conjunction with the 'save_data()' method. Call this within 'run_analysis()' to load saved raw data.
+        Data saved with the 'npy' layout is memory-mapped.
         """
         # no point reading in data if it's already in memory
-        if not self._raw_data:
-            self.sweeps, self.metadata, _ = sweep.io.read_json(
-                path=self.save_path / self.raw_data_fname
-            )
+        if self._raw_data:
+            return
+
+        path = self.save_path / self.raw_data_dname
+        if not path.exists():
+            # the JSON file may have been compressed with any codec
+            paths = [self._raw_data_path(compression=c) for c in (None, *io.CODECS)]
+            path = next((p for p in paths if p.exists()), paths[0])
+        self.sweeps, self.metadata, _ = sweep.io.read_data(path=path)
+
+    def _raw_data_path(self, compression: str | None) -> "Path":
+        # the JSON raw data file, with the suffix of its codec
+        suffix = io.CODECS[compression][0] if compression else ""
+        return self.save_path / f"{self.raw_data_fname}{suffix}"
+
+    def load_repeats(self) -> dict[str, dict[str, np.ndarray]]:
+        """
+        Loads the data of every repeat saved by 'run_repeats()'.
+
+        :return: For every sweep, the X trace and the stacked Y traces with the shape (repeats, points), in trace
+            name (key) - data (value) pairs
+        :rtype: dict[str, dict[str, np.ndarray]]
+        """
+        repeats = {}
+        with np.load(self.save_path / self.repeats_fname) as data:
+            for key in data.files:
+                name, col = key.split("/", 1)
+                repeats.setdefault(name, {})[col] = data[key]
+
+        return repeats
@@ -0,0 +1,191 @@
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from autosweep import sweep
+from autosweep.tests.abs_test import AbsTest
+from autosweep.utils import ta_math
+
+if TYPE_CHECKING:
+    from autosweep.instruments.instrument_manager import InstrumentManager
+
+# The input polarization states of the Mueller method as normalized Stokes vectors (s1, s2, s3): linear horizontal,
+# linear vertical, linear diagonal (+45 deg) and right-hand circular.
+MUELLER_STATES = {
+    "h": (1.0, 0.0, 0.0),
+    "v": (-1.0, 0.0, 0.0),
+    "d": (0.0, 1.0, 0.0),
+    "r": (0.0, 0.0, 1.0),
+}
+
+
+class PolSweep(AbsTest):
+    """
+    A polarization-resolved laser wavelength sweep. For each input polarization state of the Mueller method, a
+    continuous laser sweep is made while the polarimeter logs the Stokes parameters of the light exiting the DUT, one
+    sample per laser step trigger. The analysis computes the PDL, the DOP and the min/max transmission at every
+    wavelength.
+
+    The instruments used are 'laser' (KeysightN777C), 'polarimeter' (KeysightN778C) and 'pol_ctrl', a KeysightN778C
+    polarization synthesizer used in stabilizer mode to set the input polarization states.
+    """
+
+    def run_acquire(
+        self,
+        instr_mgr: "InstrumentManager",
+        wvl_start: float,
+        wvl_stop: float,
+        dwvl: float,
+        speed: float = 10,
+        power_mw: float = 1,
+        timeout: float = 60,
+        dtype: str | None = None,
+    ):
+        """
+        Sweeps the laser once per input polarization state and records the Stokes parameters at the DUT output.
+
+        :param instr_mgr: An instrument manager with the appropriate instruments
+        :type instr_mgr: autosweep.instruments.instrument_manager.InstrumentManager
+        :param wvl_start: The starting wavelength of the sweep (nm)
+        :type wvl_start: float
+        :param wvl_stop: The last wavelength of the sweep (nm)
+        :type wvl_stop: float
+        :param dwvl: The spacing between wavelengths, this is the step at which the laser triggers the polarimeter (nm)
+        :type dwvl: float
+        :param speed: The laser sweep speed (nm/s)
+        :type speed: float, default 10
+        :param power_mw: The laser output power (mW), used as the reference for the transmission
+        :type power_mw: float, default 1
+        :param timeout: The maximum time to wait for the polarimeter logging to finish after the sweep (s)
+        :type timeout: float, default 60
+        :param dtype: The storage type of the saved data, e.g. 'float32', the precision of the polarimeter data
+        :type dtype: str, optional
+        :return: None
+        """
+        lsr = instr_mgr.instrs["laser"]
+        pol = instr_mgr.instrs["polarimeter"]
+        pol_ctrl = instr_mgr.instrs["pol_ctrl"]
+
+        wvls = ta_math.get_grid(start=wvl_start, stop=wvl_stop, step=dwvl)
+
+        lsr.sweep_abort_if_running()
+        lsr.source_wavelength_sweep_mode("CONT")
+        lsr.source_power_mw(power_mw)
+        lsr.source_wavelength_sweep_speed_nms(speed)
+        lsr.source_wavelength_sweep_start_nm(wvls[0])
+        lsr.source_wavelength_sweep_stop_nm(wvls[-1])
+        lsr.source_wavelength_sweep_step_nm(np.diff(wvls).mean())
+        lsr.trigger_configuration("DEFAULT")
+        lsr.trigger_output("STFINISHED")  # one trigger for every sweep step
+        lsr.source_wavelength_sweep_ask_assert()
+        lsr.lock(False)
+        lsr.source_power_state(True)
+
+        pol.set_wavelength_nm(wvls[0])
+        pol.set_sweep_step_nm(np.diff(wvls).mean())
+        pol.set_trigger_input("SME")  # one sample for every trigger
+        pol.set_number_sweeps(len(wvls))
+
+        attrs = {
+            "wvl": ("Wavelength", "nm"),
+            "s0": ("S0", "W"),
+            "s1": ("S1", "W"),
+            "s2": ("S2", "W"),
+            "s3": ("S3", "W"),
+        }
+
+        sweeps = {}
+        for name, state in MUELLER_STATES.items():
+            self.logger.info(f"Sweeping input polarization state '{name}'")
+            pol_ctrl.set_stabilizer_stokes_params_target(*state)
+            pol_ctrl.set_stabilizer_mode(True)
+
+            pol.start_logging()
+            lsr.source_wavelength_sweep_state("START")
+            lsr.sweep_wait_done()
+
+            t_end = time.time() + timeout
+            while pol.ask_logging_state()[0] == "SAMPLING":
+                if time.time() > t_end:
+                    pol.disable_logging()
+                    raise TimeoutError("The polarimeter logging did not finish.")
+                time.sleep(0.1)
+
+            stokes = pol.get_measured_stokes_params()
+            if stokes.shape[1] != len(wvls):
+                msg = (
+                    f"The polarimeter logged {stokes.shape[1]} samples, but the sweep has {len(wvls)} "
+                    f"wavelengths."
+                )
+                raise ValueError(msg)
+
+            # the readback is already a block of traces, only the wavelengths are added to it
+            sweeps[name] = sweep.Sweep.from_arrays(
+                data=np.vstack((wvls, stokes)), cols=attrs, attrs=attrs, copy=False
+            )
+
+        pol_ctrl.set_stabilizer_mode(False)
+        lsr.source_power_state(False)
+
+        self.save_data(
+            sweeps=sweeps,
+            metadata={"power_mw": power_mw, "states": MUELLER_STATES},
+            dtype=dtype,
+        )
+
+    def run_analysis(self, report_headings: list):
+        """
+        Computes the PDL, DOP and min/max transmission spectra with the Mueller method, plots them and reports out the
+        worst-case values in the specs.
+
+        :param report_headings: A collection of headings used in the HTML report
+        :type report_headings: list
+        :return: None
+        """
+        self.load_data()
+        self.logger.info("Running the polarization analysis")
+
+        names = tuple(self.sweeps.keys())
+        states = np.array([self.metadata["states"][n] for n in names])
+        wvls = self.sweeps[names[0]]["wvl"]
+
+        # (states, stokes params, wavelengths)
+        stokes = np.stack(
+            [[self.sweeps[n][f"s{ii}"] for ii in range(4)] for n in names]
+        )
+
+        p_ref = 1e-3 * self.metadata["power_mw"]
+        m_row = ta_math.mueller_row(states=states, powers=stokes[:, 0] / p_ref)
+        t_min, t_max, pdl = ta_math.mueller_pdl(m_row=m_row)
+        dop = ta_math.degree_of_polarization(stokes=stokes.swapaxes(0, 1)).min(axis=0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_min_db = 10 * np.log10(t_min)
+            t_max_db = 10 * np.log10(t_max)
+
+        fig_hdlr = sweep.FigHandler(subplts=(2, 1))
+        ax_t, ax_pdl = fig_hdlr.axes
+        ax_t.plot(wvls, t_max_db, label="max")
+        ax_t.plot(wvls, t_min_db, label="min")
+        ax_t.set_ylabel("Transmission (dB)")
+        ax_t.legend()
+        ax_pdl.plot(wvls, pdl)
+        ax_pdl.set_ylabel("PDL (dB)")
+        ax_pdl.set_xlabel(self.sweeps[names[0]].get_axis_labels()["wvl"])
+
+        fig_hdlr.save_fig(path=self.save_path / "pdl.png")
+
+        report_heading = report_headings[0]
+        specs = {
+            "pdl_max": ("dB", np.nanmax(pdl)),
+            "pdl_mean": ("dB", np.nanmean(pdl)),
+            "dop_min": ("", np.nanmin(dop)),
+            "transmission_max": ("dB", np.nanmax(t_max_db)),
+            "transmission_min": ("dB", np.nanmin(t_min_db)),
+        }
+        for spec, (unit, value) in specs.items():
+            self.results.add_spec(
+                report_heading=report_heading, spec=spec, unit=unit, value=float(value)
+            )
+        self.results.add_report_entry(report_heading=report_heading, fig_hdlr=fig_hdlr)
@@ -0,0 +1,162 @@
+import queue
+import threading
+from abc import abstractmethod
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+
+from autosweep import sweep
+from autosweep.tests.abs_test import AbsTest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from autosweep.data_types.metadata import DUTInfo
+    from autosweep.exec_helpers.reporter import ResultsHold
+    from autosweep.instruments.instrument_manager import InstrumentManager
+
+# marks the end of the acquisition in the queue
+_DONE = object()
+
+
+class AbsStreamTest(AbsTest):
+    """
+    The abstract base class for tests made of many sub-sweeps (for example one per switch route or per bias point),
+    where the analysis of each sub-sweep runs in a background thread while the next one is being acquired.
+
+    Instead of 'run_acquire()', inheriting tests implement 'acquire_parts()', a generator which yields
+    (name, Sweep) pairs, and 'analyze_part()', which is called on each of them in the order they were yielded. The
+    yielded sweeps pass through a bounded queue, so the acquisition blocks if the analysis falls too far behind. Inside
+    'run_analysis()', call 'join_parts()' to wait for the analysis of every part and get the results.
+    """
+
+    def __init__(
+        self,
+        dut_info: "DUTInfo",
+        results: "ResultsHold",
+        save_path: "Path",
+        queue_size: int = 4,
+    ):
+        """
+
+        :param dut_info: The information about the device-under-test
+        :type dut_info: autosweep.utils.data_types.metadata.DUTInfo
+        :param results: Any test results generated by the test are held in this object
+        :type results: autosweep.utils.exec_helpers.reporter.ResultsHold
+        :param save_path: The path to the folder in which any generated files, like raw data will be saved.
+        :type save_path: pathlib.Path
+        :param queue_size: The maximum number of acquired parts waiting to be analyzed
+        :type queue_size: int, default 4
+        """
+        super().__init__(dut_info=dut_info, results=results, save_path=save_path)
+
+        if queue_size < 1:
+            raise ValueError("The argument 'queue_size' must be at least 1.")
+
+        self.queue_size = queue_size
+
+        # global metadata saved with the raw data, it can be filled in by 'acquire_parts()'
+        self.acquire_metadata = {}
+
+        self._queue = None
+        self._consumer = None
+        self._part_results = {}
+        self._consumer_error = None
+
+    @abstractmethod
+    def acquire_parts(
+        self, instr_mgr: "InstrumentManager", **kwargs
+    ) -> Iterator[tuple[str, sweep.Sweep]]:
+        """
+        A generator which acquires the data one part at a time. It must be overwritten.
+
+        :param instr_mgr: An instrument manager with the appropriate instruments
+        :type instr_mgr: autosweep.instruments.instrument_manager.InstrumentManager
+        :param kwargs: The 'acquire' parameters of the recipe step
+        :type kwargs: dict
+        :yield name: The name of the part, used as the sweep name in the raw data
+        :yield sweep: The data of the part
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def analyze_part(self, name: str, sweep: sweep.Sweep) -> Any:
+        """
+        Analyzes a single part, this runs in the consumer thread during the acquisition. It must be overwritten.
+
+        :param name: The name of the part
+        :type name: str
+        :param sweep: The data of the part
+        :type sweep: autosweep.sweep.Sweep
+        :return: The result of the analysis of this part, collected by 'join_parts()'
+        :rtype: Any
+        """
+        raise NotImplementedError
+
+    def run_acquire(self, instr_mgr: "InstrumentManager", **kwargs) -> None:
+        """
+        Runs 'acquire_parts()', passing every part on to the analysis thread, then saves all the parts as the raw data.
+
+        :param instr_mgr: An instrument manager with the appropriate instruments
+        :type instr_mgr: autosweep.instruments.instrument_manager.InstrumentManager
+        :param kwargs: The 'acquire' parameters of the recipe step, passed on to 'acquire_parts()'
+        :type kwargs: dict
+        :return: None
+        """
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._part_results = {}
+        self._consumer_error = None
+        self._consumer = threading.Thread(
+            target=self._consume, name=f"{self.__class__.__name__}-analysis"
+        )
+        self._consumer.start()
+
+        sweeps = {}
+        try:
+            for name, s in self.acquire_parts(instr_mgr=instr_mgr, **kwargs):
+                if name in sweeps:
+                    raise ValueError(f"The part '{name}' was acquired more than once.")
+
+                sweeps[name] = s
+                self._queue.put((name, s))
+        finally:
+            self._queue.put(_DONE)
+
+        self.save_data(sweeps=sweeps, metadata=self.acquire_metadata)
+
+    def _consume(self) -> None:
+        """
+        The body of the analysis thread. After an error, the queue is still drained so the acquisition never blocks.
+
+        :return: None
+        """
+        while (item := self._queue.get()) is not _DONE:
+            if self._consumer_error is not None:
+                continue
+
+            name, s = item
+            try:
+                self._part_results[name] = self.analyze_part(name=name, sweep=s)
+            except Exception as e:
+                self.logger.exception(f"The analysis of the part '{name}' failed")
+                self._consumer_error = e
+
+    def join_parts(self) -> dict[str, Any]:
+        """
+        Waits for the analysis of every part to finish. Call this within 'run_analysis()'. During re-analysis, no
+        acquisition was made, so the saved parts are loaded and analyzed here instead.
+
+        :raise Exception: The first exception raised by 'analyze_part()'
+        :return: The results of 'analyze_part()', in part name (key) - result (value) pairs
+        :rtype: dict[str, Any]
+        """
+        if self._consumer is None:
+            self.load_data()
+            return {
+                n: self.analyze_part(name=n, sweep=s) for n, s in self.sweeps.items()
+            }
+
+        self._consumer.join()
+        if self._consumer_error is not None:
+            raise self._consumer_error
+
+        return self._part_results
@@ -32,23 +32,29 @@ class VirtualTest(AbsTest):
         super().__init__(dut_info=dut_info, results=results, save_path=save_path)
         self.logger.info("Initializing the virtual test")
 
-    def run_acquire(self, instr_mgr: "InstrumentManager"):
+    def run_acquire(
+        self, instr_mgr: "InstrumentManager", points: int = 21, delay: float = 2
+    ):
         """
         Generates data for an IV sweep of a 10-ohm and 20-ohm resistor. Does not need any actual instruments.
 
         :param instr_mgr: An instrument manager with the appropriate instruments
         :type instr_mgr: autosweep.instruments.instrument_manager.InstrumentManager
+        :param points: The number of points in the IV sweep
+        :type points: int, default 21
+        :param delay: The time taken by the virtual acquisition (s)
+        :type delay: float, default 2
         :return: None
         """
         self.logger.info("Running the virtual test")
 
-        v = np.linspace(-1, 1, 21)
+        v = np.linspace(-1, 1, points)
 
         traces = {"v": v, "i0": v / 10, "i1": v / 20}
         attrs = {"v": ("Voltage", "V"), "i0": ("Current", "A"), "i1": ("Current", "A")}
 
         s = sweep.Sweep(traces=traces, attrs=attrs)
-        sleep(2)
+        sleep(delay)
 
         self.save_data(sweeps={"iv": s}, metadata=None)
 
@@ -65,26 +71,25 @@ class VirtualTest(AbsTest):
 
         iv = self.sweeps["iv"]
 
+        # long sweeps are decimated to the resolution of the figure
         fig_hdlr = sweep.FigHandler()
-        ax = fig_hdlr.ax
-        for col, x, y in iv.itercols():
-            ax.plot(x, y, label=col)
-
-        ax.legend()
-        labels = iv.get_axis_labels()
-        ax.set_xlabel(labels["v"])
-        ax.set_ylabel(labels["i0"])
+        fig_hdlr.plot_sweep(sweep=iv)
+        fig_hdlr.ax.legend()
 
         fig_hdlr.save_fig(path=self.save_path / "iv.png")
 
+        # the resistance is the inverse of the slope of a linear fit, every current trace is fitted at once
+        fits = iv.find_poly_fit(deg=1)
+
         report_heading = report_headings[0]
         info = {"a": "hello world"}
-        self.results.add_spec(
-            report_heading=report_heading, spec="resist_i0", unit="ohm", value=10
-        )
-        self.results.add_spec(
-            report_heading=report_heading, spec="resist_i1", unit="ohm", value=20
-        )
+        for col, (slope, _) in fits.items():
+            self.results.add_spec(
+                report_heading=report_heading,
+                spec=f"resist_{col}",
+                unit="ohm",
+                value=float(round(1 / slope, 6)),
+            )
         self.results.add_report_entry(
             report_heading=report_heading, fig_hdlr=fig_hdlr, info=info
         )
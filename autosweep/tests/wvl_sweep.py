@@ -1,6 +1,8 @@
 import time
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 from autosweep import sweep
 from autosweep.tests.abs_test import AbsTest
 from autosweep.utils import ta_math
@@ -21,6 +23,11 @@ class WvlSweep(AbsTest):
         wvl_start: float,
         wvl_stop: float,
         dwvl: float,
+        settle_time: float = 0.1,
+        target_ci: float | None = None,
+        confidence: float = 0.95,
+        min_samples: int = 5,
+        max_samples: int = 100,
     ):
         """
         Sweeps a laser and returns readings from 2 optical powermeters.
@@ -33,6 +40,17 @@ class WvlSweep(AbsTest):
         :type wvl_stop: float
         :param dwvl: The spacing between wavelengths (nm)
         :type dwvl: float
+        :param settle_time: The time to wait after each wavelength change before reading the powermeters (s)
+        :type settle_time: float, default 0.1
+        :param target_ci: When given, each power reading is averaged until the half-width of its confidence interval is
+            below this value (dB). The achieved half-widths and sample counts are saved in the sweep metadata.
+        :type target_ci: float, optional
+        :param confidence: The confidence level used with 'target_ci'
+        :type confidence: float, default 0.95
+        :param min_samples: The minimum number of readings averaged per point when using 'target_ci'
+        :type min_samples: int, default 5
+        :param max_samples: The maximum number of readings averaged per point when using 'target_ci'
+        :type max_samples: int, default 100
         :return: None
         """
         lsr = instr_mgr.instrs["laser"]  # gets laser from instrument manager
@@ -42,32 +60,50 @@ class WvlSweep(AbsTest):
 
         wvls = ta_math.get_grid(start=wvl_start, stop=wvl_stop, step=dwvl)
 
-        opm.sense_power_range(0)
+        for n in (1, 2):
+            opm.sense_power_range_dbm(n, 0)
         lsr.output_channel_state(output=0, channel=0, state=True)  # turning laser on
         # should replace this with a triggered read
-        p1 = []
-        p2 = []
+        powers = {"p1": [], "p2": []}
+        uncertainty = {"p1_ci": [], "p2_ci": [], "p1_samples": [], "p2_samples": []}
 
         for wvl in wvls:
             lsr.source_channel_wavelength(0, 0, f"{wvl}NM")
-            time.sleep(0.1)
-            p1.append(
-                opm.initiate_channel_immediate(1, 1)
-            )  # makes a reading on channel 1
-            p2.append(
-                opm.initiate_channel_immediate(1, 2)
-            )  # makes a reading on channel 2
+            time.sleep(settle_time)
+            for n, col in enumerate(powers, start=1):
+                if target_ci is None:
+                    powers[col].append(
+                        opm.read_power(n)
+                    )  # makes a reading on channel n
+                    continue
+
+                p, ci, samples = opm.read_power_to_confidence(
+                    n,
+                    target=target_ci,
+                    confidence=confidence,
+                    min_samples=min_samples,
+                    max_samples=max_samples,
+                )
+                powers[col].append(p)
+                uncertainty[f"{col}_ci"].append(ci)
+                uncertainty[f"{col}_samples"].append(samples)
 
         lsr.output_channel_state(output=0, channel=0, state=False)  # turning laser off
 
-        traces = {"wvl": wvls, "p1": p1, "p2": p2}
+        metadata = None
+        if target_ci is not None:
+            metadata = {"confidence": confidence} | {
+                k: np.array(v) for k, v in uncertainty.items()
+            }
+
+        traces = {"wvl": wvls} | powers
         attrs = {
             "wvl": ("Wavelength", "nm"),
             "p1": ("Power", "dBm"),
             "p2": ("Power", "dBm"),
         }
 
-        s = sweep.Sweep(traces=traces, attrs=attrs)
+        s = sweep.Sweep(traces=traces, attrs=attrs, metadata=metadata)
         self.save_data(sweeps={"wvl": s}, metadata=None)
 
     def run_analysis(self, report_headings: list):
@@ -83,15 +119,10 @@ class WvlSweep(AbsTest):
 
         iv = self.sweeps["wvl"]
 
+        # long sweeps are decimated to the resolution of the figure
         fig_hdlr = sweep.FigHandler()
-        ax = fig_hdlr.ax
-        for col, x, y in iv.itercols():
-            ax.plot(x, y, label=col)
-
-        ax.legend()
-        labels = iv.get_axis_labels()
-        ax.set_xlabel(labels["wvl"])
-        ax.set_ylabel(labels["p1"])
+        fig_hdlr.plot_sweep(sweep=iv)
+        fig_hdlr.ax.legend()
 
         fig_hdlr.save_fig(path=self.save_path / "wvl.png")
 
@@ -1,11 +1,20 @@
 from autosweep.utils import generics, io, logger, params, registrar, ta_math, typing_ext
 from autosweep.utils.generics import (
     find_last_run,
+    find_run_dirs,
     load_into_mappingproxytype,
+    relative_run_path,
+    write_last_run,
 )
 from autosweep.utils.io import (
+    RunArchiver,
     json_serializer,
+    load_many,
+    open_read,
+    open_write,
+    read_bytes,
     read_json,
+    stream_json,
     write_archive,
     write_csv,
     write_json,
@@ -24,9 +33,15 @@ from autosweep.utils.registrar import (
     register_classes,
 )
 from autosweep.utils.ta_math import (
+    average_to_confidence,
+    degree_of_polarization,
     find_3_idxs,
     find_nearest_idx,
+    find_nearest_idxs_sorted,
     get_grid,
+    interp_weights,
+    mueller_pdl,
+    mueller_row,
 )
 from autosweep.utils.typing_ext import (
     ListLike,
@@ -37,27 +52,42 @@ __all__ = [
     "INSTR_CLASSES",
     "ListLike",
     "PathLike",
+    "RunArchiver",
     "TEST_CLASSES",
+    "average_to_confidence",
     "datetime_frmt",
+    "degree_of_polarization",
     "find_3_idxs",
     "find_last_run",
     "find_nearest_idx",
+    "find_nearest_idxs_sorted",
+    "find_run_dirs",
     "generics",
     "get_grid",
     "init_logger",
+    "interp_weights",
     "io",
     "json_serializer",
     "load_into_mappingproxytype",
+    "load_many",
     "logger",
     "logger_format",
     "logger_level",
+    "mueller_pdl",
+    "mueller_row",
+    "open_read",
+    "open_write",
     "params",
+    "read_bytes",
     "read_json",
     "register_classes",
     "registrar",
+    "relative_run_path",
+    "stream_json",
     "ta_math",
     "typing_ext",
     "write_archive",
     "write_csv",
     "write_json",
+    "write_last_run",
 ]
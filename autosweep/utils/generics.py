@@ -1,34 +1,222 @@
+import re
 import types
+from collections.abc import Iterator
 from pathlib import Path
 
 from autosweep.data_types import metadata
 from autosweep.utils import io, typing_ext
 
+# the pointer to the latest run of a folder of runs, the pointers of each DUT, and the cache of the scans of the runs
+LAST_RUN_FNAME = "last_run.json"
+LAST_RUN_DNAME = "last_runs"
+SCAN_CACHE_FNAME = "run_scan_cache.json"
 
-def find_last_run(path: typing_ext.PathLike) -> Path:
+# the folder of the spec store, see autosweep.exec_helpers.spec_store
+STORE_DNAME = "spec_store"
+
+# the run folders of the TestExec end with the start timestamp, and the month folders of the 'sharded' layout of the
+# data path ('<part number>/<YYYYMM>/<run>') are named after the month
+_RUN_DNAME = re.compile(r"_\d{8}-\d{6}$")
+_MONTH_DNAME = re.compile(r"\d{6}")
+
+
+def find_last_run(
+    path: typing_ext.PathLike,
+    part_num: str | None = None,
+    ser_num: str | None = None,
+    scan: bool = False,
+) -> Path:
     """
-    A helper function that finds the latest run in a collection of data runs
+    A helper function that finds the latest run in a collection of data runs, optionally of a DUT. The TestExec
+    maintains pointers to the latest runs (see write_last_run()), so this is usually a single small read. Without a
+    pointer, or with 'scan=True', e.g. after copying runs into the folder, the runs are scanned instead. The start
+    timestamps read by a scan are cached in the folder, so the next scans only read the status files of new or modified
+    runs, in parallel (see autosweep.utils.io.load_many()).
 
     :param path: The path to the folder that holds multiple data runs
     :type path: str or pathlib.Path
+    :param part_num: The full part number of the DUT, e.g. 'ABC-R1'
+    :type part_num: str, optional
+    :param ser_num: The serial number of the DUT
+    :type ser_num: str, optional
+    :param scan: Scan the runs even if there is a pointer to the latest run
+    :type scan: bool, default False
+    :raises FileNotFoundError: There is no matching run
     :return: The path to the latest data run
     :rtype: pathlib.Path
     """
-    timestamps = []
-    runs = []
-
-    for run in sorted(Path(path).glob("*")):
+    path = Path(path)
+    pointer_path = _last_run_pointer(path=path, part_num=part_num, ser_num=ser_num)
+    if not scan and pointer_path is not None and pointer_path.exists():
+        run = path / io.read_json(path=pointer_path)["run"]
         if run.is_dir():
-            status_path = run / "status.json"
-            if status_path.exists():
-                status = io.read_json(path=status_path)
-                if timestamp_strs := status.get("timestamp"):
-                    ts = metadata.TimeStamp(timestamp=timestamp_strs["start"])
-                    timestamps.append(ts)
-                    runs.append(run)
-
-    sort_idx = [ii for ii, ts in sorted(enumerate(timestamps), key=lambda x: x[1])]
-    return runs[sort_idx[-1]]
+            return run
+
+    runs = _scan_runs(path=path)
+    runs = {
+        name: run
+        for name, run in runs.items()
+        if (part_num is None or run["part_num"] == str(part_num))
+        and (ser_num is None or run["ser_num"] == str(ser_num))
+    }
+    if not runs:
+        raise FileNotFoundError(f"There is no matching run in '{path}'")
+
+    # the name breaks ties between timestamps
+    name = max(runs, key=lambda n: (runs[n]["start"], n))
+    if pointer_path is not None:
+        # a pointer to a later run, e.g. one still being migrated from the staging folder, is kept
+        _update_pointer(path=pointer_path, name=name, start=runs[name]["start"])
+    return path / name
+
+
+def write_last_run(
+    path: typing_ext.PathLike,
+    run_path: typing_ext.PathLike,
+    timestamp: metadata.TimeStamp,
+    dut_info: metadata.DUTInfo | None = None,
+) -> None:
+    """
+    Points the latest run of a collection of data runs, and of a DUT, to a run, unless the current pointers are to
+    later runs. The pointer files are replaced atomically. Used by the TestExec at the end of every run.
+
+    :param path: The path to the folder that holds multiple data runs
+    :type path: str or pathlib.Path
+    :param run_path: The folder of the run
+    :type run_path: str or pathlib.Path
+    :param timestamp: The start of the run
+    :type timestamp: autosweep.data_types.metadata.TimeStamp
+    :param dut_info: The DUT of the run
+    :type dut_info: autosweep.data_types.metadata.DUTInfo, optional
+    :return: None
+    """
+    path = Path(path)
+    pointer_paths = [_last_run_pointer(path=path)]
+    if dut_info is not None:
+        pointer_paths.append(
+            _last_run_pointer(
+                path=path, part_num=dut_info.part_num, ser_num=dut_info.ser_num
+            )
+        )
+
+    name = relative_run_path(path=path, run_path=run_path)
+    for pointer_path in pointer_paths:
+        _update_pointer(path=pointer_path, name=name, start=str(timestamp))
+
+
+def find_run_dirs(path: typing_ext.PathLike) -> Iterator[Path]:
+    """
+    Lists the folders which can hold a run in a collection of data runs, in both layouts of the data path: directly in
+    it ('flat'), and in '<part number>/<YYYYMM>' subfolders ('sharded'). Only the part number folders are walked, not
+    the run folders, and the folders of the pointers and of the spec store, hidden folders and the folders of a
+    migration in progress (ending with '.partial') are skipped. Not every folder is a run, a run has a 'status.json'
+    file.
+
+    :param path: The path to the folder that holds multiple data runs
+    :type path: str or pathlib.Path
+    :return: The folders
+    :rtype: Iterator[pathlib.Path]
+    """
+    for top in Path(path).iterdir():
+        if not _is_run_dir(path=top) or top.name in (LAST_RUN_DNAME, STORE_DNAME):
+            continue
+        if _RUN_DNAME.search(top.name):
+            yield top
+            continue
+
+        months = [
+            m for m in top.iterdir() if m.is_dir() and _MONTH_DNAME.fullmatch(m.name)
+        ]
+        if not months:
+            # a run folder with another name, e.g. copied into the data path
+            yield top
+        for month in months:
+            yield from (run for run in month.iterdir() if _is_run_dir(path=run))
+
+
+def relative_run_path(path: typing_ext.PathLike, run_path: typing_ext.PathLike) -> str:
+    """
+    The path of a run relative to the collection of data runs holding it, e.g. 'ABC-R1/202601/<run>' in the 'sharded'
+    layout, with forward slashes so it can be stored and compared on any platform. It is how the run pointers, the run
+    index and the spec store refer to a run.
+
+    :param path: The path to the folder that holds multiple data runs
+    :type path: str or pathlib.Path
+    :param run_path: The folder of the run
+    :type run_path: str or pathlib.Path
+    :return: The relative path, or only the name of the run if it is not in the folder
+    :rtype: str
+    """
+    run_path = Path(run_path)
+    try:
+        return run_path.relative_to(path).as_posix()
+    except ValueError:
+        return run_path.name
+
+
+def _last_run_pointer(
+    path: Path, part_num: str | None = None, ser_num: str | None = None
+) -> Path | None:
+    # there is a pointer for the whole folder and for every DUT, not for a part number or a serial number alone
+    if part_num is None and ser_num is None:
+        return path / LAST_RUN_FNAME
+    if part_num is None or ser_num is None:
+        return None
+    return path / LAST_RUN_DNAME / f"{part_num}_{ser_num}.json"
+
+
+def _update_pointer(path: Path, name: str, start: str) -> None:
+    # the pointers never move back to an earlier run
+    if path.exists():
+        current = io.read_json(path=path)
+        if (current["start"], current["run"]) > (start, name):
+            return
+    path.parent.mkdir(exist_ok=True)
+    io.write_json(data={"run": name, "start": start}, path=path, atomic=True)
+
+
+def _is_run_dir(path: Path) -> bool:
+    return (
+        path.is_dir()
+        and not path.name.startswith(".")
+        and not path.name.endswith(".partial")
+    )
+
+
+def _scan_runs(path: Path) -> dict[str, dict]:
+    # the start timestamp and the DUT of every run, the status files are only read for the runs which are not cached
+    # with the same modification time (the time of a folder changes when a file is added to it, e.g. 'status.json')
+    cache_path = path / SCAN_CACHE_FNAME
+    cache = io.read_json(path=cache_path) if cache_path.exists() else {}
+
+    mtimes = {
+        p.relative_to(path).as_posix(): p.stat().st_mtime_ns
+        for p in find_run_dirs(path=path)
+    }
+    runs = {
+        n: cache[n] for n, t in mtimes.items() if n in cache and cache[n]["mtime"] == t
+    }
+
+    status_paths = [path / n / "status.json" for n in mtimes if n not in runs]
+    for status_path, status, error in io.load_many(paths=status_paths):
+        name = status_path.parent.relative_to(path).as_posix()
+        run = {"mtime": mtimes[name], "start": None, "part_num": None, "ser_num": None}
+        # a run without a status file is skipped
+        if error is not None and not isinstance(error, FileNotFoundError):
+            raise error
+        if error is None and (timestamp_strs := status.get("timestamp")):
+            dut = metadata.DUTInfo.from_dict(data=status["dut_info"])
+            run.update(
+                start=str(metadata.TimeStamp(timestamp=timestamp_strs["start"])),
+                part_num=dut.part_num,
+                ser_num=dut.ser_num,
+            )
+        runs[name] = run
+
+    if status_paths or runs.keys() != cache.keys():
+        io.write_json(data=runs, path=cache_path, atomic=True)
+
+    return {n: run for n, run in runs.items() if run["start"] is not None}
 
 
 def load_into_mappingproxytype(data: dict) -> types.MappingProxyType:
@@ -1,11 +1,46 @@
+import bz2
+import contextlib
 import csv
+import gzip
+import itertools
+import logging
+import lzma
+import mmap
+import os
+import queue
+import threading
 import typing
 import zipfile
+import zlib
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
 
+import numpy as np
 import orjson
 
 from autosweep.utils import typing_ext
 
+# the supported codecs, with their file suffix, their default level, their compression function and their magic bytes.
+# A file made of several concatenated streams (members) of a codec is decompressed as a whole by each function, which
+# allows compressing the chunks of large files in parallel.
+CODECS = {
+    "gzip": (".gz", 6, lambda d, lvl: gzip.compress(d, compresslevel=lvl, mtime=0)),
+    "bz2": (".bz2", 9, lambda d, lvl: bz2.compress(d, compresslevel=lvl)),
+    "lzma": (".xz", 6, lambda d, lvl: lzma.compress(d, preset=lvl)),
+}
+_MAGIC = {
+    b"\x1f\x8b": gzip.decompress,
+    b"BZh": bz2.decompress,
+    b"\xfd7zXZ\x00": lzma.decompress,
+}
+_OPENERS = {
+    b"\x1f\x8b": gzip.open,
+    b"BZh": bz2.open,
+    b"\xfd7zXZ\x00": lzma.open,
+}
+
 
 def json_serializer(obj: typing.Any) -> str | dict:
     """
@@ -24,26 +59,221 @@ def json_serializer(obj: typing.Any) -> str | dict:
         return obj.to_dict()
     if isinstance(obj, metadata.TimeStamp):
         return str(obj)
+    # orjson only serializes C-contiguous np.ndarray instances of some types, not subclasses like np.memmap nor strided
+    # views like the traces of a stepped slice of a sweep. Those are copied into a C-contiguous array, and an array
+    # which orjson still cannot serialize, e.g. of an unsupported type, is serialized as a list.
+    if isinstance(obj, np.ndarray):
+        if type(obj) is np.ndarray and obj.flags.c_contiguous:
+            return obj.tolist()
+        return np.ascontiguousarray(obj)
 
     raise TypeError(f"{type(obj)} is not serialized by json_serializer")
 
 
+# files of at least this size are memory-mapped instead of read into memory
+MMAP_SIZE = 1 << 20
+
+
+@contextlib.contextmanager
+def _open_buffer(path: typing_ext.PathLike) -> Iterator[bytes | memoryview]:
+    # the contents of a file, memory-mapped for large files, decompressed if needed
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < MMAP_SIZE:
+            yield _decompress(f.read())
+            return
+
+        with (
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+            memoryview(mm) as view,
+        ):
+            yield _decompress(view)
+
+
+def _decompress(raw: bytes | memoryview) -> bytes | memoryview:
+    for magic, decompress in _MAGIC.items():
+        if raw[: len(magic)] == magic:
+            return decompress(raw)
+    return raw
+
+
+def open_read(path: typing_ext.PathLike) -> typing.BinaryIO:
+    """
+    Opens a binary file for reading, decompressed on the fly if it was compressed with one of the CODECS, whatever its
+    name, so the beginning of a large file can be read without reading all of it.
+
+    :param path: The path to the file to read
+    :type path: str or pathlib.Path
+    :return: The open file, to use as a context manager
+    :rtype: typing.BinaryIO
+    """
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, opener in _OPENERS.items():
+        if head.startswith(magic):
+            return opener(path, "rb")
+    return open(path, "rb")
+
+
+def read_bytes(path: typing_ext.PathLike) -> bytes:
+    """
+    Reads a whole file, which is decompressed if it was compressed with one of the CODECS, whatever its name. The
+    codec is detected from the first bytes of the file.
+
+    :param path: The path to the file to read
+    :type path: str or pathlib.Path
+    :return: The (decompressed) contents of the file
+    :rtype: bytes
+    """
+    with _open_buffer(path=path) as raw:
+        return bytes(raw)
+
+
 def read_json(path: typing_ext.PathLike) -> dict:
     """
-    Uses orjson to parse a JSON file
+    Uses orjson to parse a JSON file, compressed or not (see read_bytes()). Large files are memory-mapped and parsed
+    directly from the map, without a copy of their contents.
 
     :param path: The path to a JSON file to read
     :type path: str or pathlib.Path
     :return: The contents of the JSON file
     :rtype: dict
     """
-    with open(path) as f:
-        raw = f.read()
+    with _open_buffer(path=path) as raw:
+        return orjson.loads(raw)
+
+
+def load_many(
+    paths: Iterable[typing_ext.PathLike],
+    loader: Callable[[Path], typing.Any] = read_json,
+    workers: int = 8,
+) -> Iterator[tuple[Path, typing.Any, Exception | None]]:
+    """
+    Loads many files with a thread pool, so reading the files overlaps, which matters most on network storage. The
+    results are yielded as soon as each file is loaded, not in the order of 'paths'. A file which cannot be loaded does
+    not stop the others, its exception is yielded instead. At most '2 * workers' files are loaded ahead of the consumer,
+    and a result is released once it is yielded, so the memory used does not grow with the number of files.
+
+    :param paths: The paths of the files to load
+    :type paths: Iterable[str or pathlib.Path]
+    :param loader: The function loading a single file, called with the path as 'path', e.g. read_json() or
+        autosweep.sweep.io.read_data()
+    :type loader: Callable, default read_json
+    :param workers: The number of threads
+    :type workers: int, default 8
+    :yield path: The path of a file
+    :yield result: What the loader returned, None if it failed
+    :yield error: The exception raised by the loader, None if it succeeded
+    """
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        while True:
+            # the window of files in flight is refilled from the remaining paths
+            for p in itertools.islice(paths, 2 * workers - len(pending)):
+                pending[pool.submit(loader, path=Path(p))] = Path(p)
+            if not pending:
+                return
 
-    return orjson.loads(raw)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path = pending.pop(fut)
+                if (error := fut.exception()) is not None:
+                    yield path, None, error
+                else:
+                    yield path, fut.result(), None
 
 
-def write_json(data: dict, path: typing_ext.PathLike) -> None:
+class _CompressedWriter:
+    """
+    A write-only binary file which compresses what is written to it in chunks, each one an independent stream of the
+    codec, compressed in a thread pool (the codecs release the GIL). The chunks are written in order, and only a few of
+    them are in flight at once, so the memory used is bounded.
+    """
+
+    def __init__(
+        self, path: typing_ext.PathLike, codec: str, level: int | None, chunk_size: int
+    ):
+        if codec not in CODECS:
+            raise ValueError(
+                f"The codec must be one of {tuple(CODECS)}, not '{codec}'."
+            )
+
+        _, default_level, compress = CODECS[codec]
+        level = default_level if level is None else level
+        self._compress = lambda d: compress(d, level)
+        self._chunk_size = chunk_size
+
+        workers = os.cpu_count() or 1
+        self._f = open(path, "wb")
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._max_pending = 2 * workers
+        self._pending = deque()
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self._submit()
+
+    def _submit(self) -> None:
+        self._pending.append(self._pool.submit(self._compress, bytes(self._buffer)))
+        self._buffer.clear()
+        while len(self._pending) > self._max_pending:
+            self._f.write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        try:
+            if self._buffer or not self._pending:
+                self._submit()
+            while self._pending:
+                self._f.write(self._pending.popleft().result())
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def open_write(
+    path: typing_ext.PathLike,
+    compression: str | None = None,
+    level: int | None = None,
+    chunk_size: int = 1 << 22,
+) -> typing.BinaryIO:
+    """
+    Opens a binary file for writing, optionally compressed with one of the CODECS ('gzip', 'bz2' or 'lzma'). Large
+    files are compressed in chunks of 'chunk_size' bytes in parallel. The file name is used as is, see CODECS for the
+    usual suffixes.
+
+    :param path: The path to the file to create
+    :type path: str or pathlib.Path
+    :param compression: The codec, by default the file is not compressed
+    :type compression: str, optional
+    :param level: The compression level, by default the one in CODECS
+    :type level: int, optional
+    :param chunk_size: The number of bytes compressed at once
+    :type chunk_size: int, default 4 MiB
+    :return: The open file, to use as a context manager
+    :rtype: typing.BinaryIO
+    """
+    if compression is None:
+        return open(path, "wb", buffering=1 << 20)
+    return _CompressedWriter(
+        path=path, codec=compression, level=level, chunk_size=chunk_size
+    )
+
+
+def write_json(
+    data: dict,
+    path: typing_ext.PathLike,
+    compression: str | None = None,
+    level: int | None = None,
+    atomic: bool = False,
+) -> None:
     """
     Uses orjson to write a JSON file with 2-space indent, numpy serialization, and automatic handling of certain
     internal types.
@@ -52,6 +282,12 @@ def write_json(data: dict, path: typing_ext.PathLike) -> None:
     :type data: dict
     :param path: The path to the JSON file to create
     :type path: str or pathlib.Path
+    :param compression: The codec to compress the file with, see open_write()
+    :type compression: str, optional
+    :param level: The compression level
+    :type level: int, optional
+    :param atomic: Write a temporary file first, then move it to 'path', so a reader never sees a partial file
+    :type atomic: bool, default False
     :return: None
     """
     json_data = orjson.dumps(
@@ -59,8 +295,72 @@ def write_json(data: dict, path: typing_ext.PathLike) -> None:
         default=json_serializer,
         option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
     )
-    with open(path, "wb") as f:
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp") if atomic else path
+    with open_write(path=tmp_path, compression=compression, level=level) as f:
         f.write(json_data)
+    if atomic:
+        os.replace(tmp_path, path)
+
+
+def stream_json(
+    data: dict,
+    path: typing_ext.PathLike,
+    compact: bool = False,
+    chunk_size: int = 65536,
+    compression: str | None = None,
+    level: int | None = None,
+) -> None:
+    """
+    Writes a JSON file incrementally, so the whole document is never held in memory as one string like with
+    write_json(). The nested dicts are written key by key, and the 1D numpy arrays (e.g. the traces of a sweep) are
+    serialized 'chunk_size' elements at a time, so the memory used does not depend on the size of the data. The
+    output is identical to write_json(), or has no whitespace at all with 'compact=True'.
+
+    :param data: The data to write to the JSON file
+    :type data: dict
+    :param path: The path to the JSON file to create
+    :type path: str or pathlib.Path
+    :param compact: Write the file without indentation, which is smaller and faster to write
+    :type compact: bool, default False
+    :param chunk_size: The number of array elements serialized at once
+    :type chunk_size: int, default 65536
+    :param compression: The codec to compress the file with, see open_write()
+    :type compression: str, optional
+    :param level: The compression level
+    :type level: int, optional
+    :return: None
+    """
+    option = orjson.OPT_SERIALIZE_NUMPY | (0 if compact else orjson.OPT_INDENT_2)
+
+    def dumps(obj: typing.Any, level: int) -> bytes:
+        out = orjson.dumps(obj, default=json_serializer, option=option)
+        return out if compact else out.replace(b"\n", b"\n" + b"  " * level)
+
+    def newline(level: int) -> bytes:
+        return b"" if compact else b"\n" + b"  " * level
+
+    def write(f: typing.BinaryIO, obj: typing.Any, level: int) -> None:
+        if isinstance(obj, dict) and obj:
+            f.write(b"{")
+            for ii, (k, v) in enumerate(obj.items()):
+                f.write((b"," if ii else b"") + newline(level + 1))
+                f.write(orjson.dumps(k) + (b":" if compact else b": "))
+                write(f=f, obj=v, level=level + 1)
+            f.write(newline(level) + b"}")
+        elif isinstance(obj, np.ndarray) and obj.ndim == 1 and len(obj) > chunk_size:
+            f.write(b"[")
+            for start in range(0, len(obj), chunk_size):
+                # the brackets and the indentation of each chunk are replaced by those of the whole array
+                chunk = dumps(np.asarray(obj[start : start + chunk_size]), level=level)
+                f.write((b"," if start else b"") + newline(level + 1))
+                f.write(chunk[1:-1].strip())
+            f.write(newline(level) + b"]")
+        else:
+            f.write(dumps(obj, level=level))
+
+    with open_write(path=path, compression=compression, level=level) as f:
+        write(f=f, obj=data, level=0)
 
 
 def write_csv(data: list[dict], path: typing_ext.PathLike) -> None:
@@ -79,10 +379,234 @@ def write_csv(data: list[dict], path: typing_ext.PathLike) -> None:
         w.writerows(rowdicts=data)
 
 
+# the files which are already compressed are stored in the archives as they are
+STORED_SUFFIXES = (
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".pdf",
+    ".zip",
+    ".npz",
+    ".gz",
+    ".bz2",
+    ".xz",
+)
+
+# marks the end of the files to archive in the queue
+_DONE = object()
+
+# the files up to this size are compressed in the thread pool of the archiver, larger ones are streamed into the
+# archive by its writer thread, so the memory used stays bounded
+ARCHIVE_POOL_SIZE = 64 << 20
+
+
+class _ZipWriter(zipfile.ZipFile):
+    """
+    A ZIP file which can also write members compressed beforehand, so they can be compressed in parallel. The member is
+    written like ZipFile.mkdir() writes a directory: its header, then its data, with the sizes and the CRC known.
+    """
+
+    def write_compressed(self, zinfo: zipfile.ZipInfo, data: bytes) -> None:
+        with self._lock:
+            self._writecheck(zinfo)
+            self._didModify = True
+            zinfo.header_offset = self.fp.tell()
+            zip64 = max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.write(data)
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+            self.start_dir = self.fp.tell()
+
+
+class RunArchiver:
+    """
+    Writes a ZIP file of a folder incrementally, in a background thread, so the archive is built while the data is
+    still being taken, e.g. one recipe step at a time, and closing it at the end of a run only adds the last few files.
+    The files are deflated in a thread pool (zlib releases the GIL), then written in order by the background thread,
+    except those which are already compressed (see STORED_SUFFIXES), which are stored. Files larger than
+    ARCHIVE_POOL_SIZE are streamed into the archive instead. The archive has the name of the folder, and the paths
+    inside of it start with the name of the folder.
+
+    Files should only be added once they are complete. A file changed after it was added is archived again by
+    'close()', by rebuilding the whole archive.
+
+    :param src_path: The folder to archive
+    :type src_path: str or pathlib.Path
+    :param dst_path: The destination folder of the ZIP file
+    :type dst_path: str or pathlib.Path
+    :param compresslevel: The deflate level, by default the zlib default
+    :type compresslevel: int, optional
+    """
+
+    def __init__(
+        self,
+        src_path: typing_ext.PathLike,
+        dst_path: typing_ext.PathLike,
+        compresslevel: int | None = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.src_path = Path(src_path)
+        self.path = Path(dst_path) / f"{self.src_path.name}.zip"
+        self.compresslevel = compresslevel
+
+        # the size and the modification time of every archived file
+        self._archived = {}
+        self._error = None
+
+        self._zip = _ZipWriter(self.path, mode="w")
+        workers = os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._max_pending = 2 * workers
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write, name=f"{self.__class__.__name__}-writer"
+        )
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, path: typing_ext.PathLike | None = None) -> None:
+        """
+        Queues every file and folder under a path which is not archived yet. This returns immediately, the files are
+        written by the background thread.
+
+        :param path: A file or a folder within the archived folder, by default the archived folder itself
+        :type path: str or pathlib.Path, optional
+        :return: None
+        """
+        path = self.src_path if path is None else Path(path)
+        paths = sorted(path.rglob("*")) if path.is_dir() else [path]
+        if path != self.src_path:
+            paths.insert(0, path)
+
+        for p in paths:
+            if p not in self._archived:
+                self._archived[p] = self._stat(path=p)
+                self._queue.put(p)
+
+    def _write(self) -> None:
+        # the body of the writer thread: the files are compressed in the pool, and written in order once compressed.
+        # After an error, the queue is still drained.
+        pending = deque()
+        while (p := self._queue.get()) is not _DONE:
+            if self._error is None:
+                try:
+                    pending.append((p, self._submit(path=p)))
+                except Exception as e:
+                    self.logger.exception(f"Could not archive '{p}'")
+                    self._error = e
+            while pending and (
+                len(pending) > self._max_pending
+                or pending[0][1] is None
+                or pending[0][1].done()
+            ):
+                self._write_pending(*pending.popleft())
+
+        while pending:
+            self._write_pending(*pending.popleft())
+
+    def _submit(self, path: Path) -> Future | None:
+        # the folders and the large files are written by the writer thread itself
+        if path.is_dir() or path.stat().st_size > ARCHIVE_POOL_SIZE:
+            return None
+        return self._pool.submit(self._compress, path=path)
+
+    def _write_pending(self, path: Path, fut: Future | None) -> None:
+        if self._error is not None:
+            return
+
+        try:
+            if fut is None:
+                self._write_file(arc=self._zip, path=path)
+            else:
+                self._zip.write_compressed(*fut.result())
+        except Exception as e:
+            self.logger.exception(f"Could not archive '{path}'")
+            self._error = e
+
+    def _compress(self, path: Path) -> tuple[zipfile.ZipInfo, bytes]:
+        # the ZIP entry of a file and its data, deflated or stored
+        zinfo = zipfile.ZipInfo.from_file(
+            path, arcname=path.relative_to(self.src_path.parent)
+        )
+        raw = path.read_bytes()
+        zinfo.file_size = len(raw)
+        zinfo.CRC = zlib.crc32(raw)
+        if path.suffix.lower() in STORED_SUFFIXES:
+            zinfo.compress_type = zipfile.ZIP_STORED
+            data = raw
+        else:
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            level = (
+                zlib.Z_DEFAULT_COMPRESSION
+                if self.compresslevel is None
+                else self.compresslevel
+            )
+            # a raw deflate stream, as zipfile writes it
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            data = compressor.compress(raw) + compressor.flush()
+        zinfo.compress_size = len(data)
+        return zinfo, data
+
+    def _write_file(self, arc: zipfile.ZipFile, path: Path) -> None:
+        stored = path.suffix.lower() in STORED_SUFFIXES
+        arc.write(
+            path,
+            arcname=path.relative_to(self.src_path.parent),
+            compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED,
+            compresslevel=self.compresslevel,
+        )
+
+    def close(self) -> None:
+        """
+        Adds the files which are not archived yet, waits for the background thread and closes the archive. If some
+        files changed after they were archived, the archive is rebuilt.
+
+        :raise Exception: The first exception raised while writing the archive
+        :return: None
+        """
+        try:
+            self.add()
+        finally:
+            self._queue.put(_DONE)
+            self._writer.join()
+            self._pool.shutdown()
+            self._zip.close()
+
+        if self._error is not None:
+            raise self._error
+
+        changed = [
+            p
+            for p, st in self._archived.items()
+            if p.is_file() and self._stat(path=p) != st
+        ]
+        if changed:
+            self.logger.warning(
+                f"{len(changed)} files changed after they were archived, rebuilding the archive"
+            )
+            with zipfile.ZipFile(self.path, mode="w") as arc:
+                for p in self._archived:
+                    if p.exists():
+                        self._write_file(arc=arc, path=p)
+
+    @staticmethod
+    def _stat(path: Path) -> tuple[int, int]:
+        stat = path.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+
 def write_archive(src_path: typing_ext.PathLike, dst_path: typing_ext.PathLike) -> None:
     """
     Used to generate a ZIP file of a whole folder, specifically test data for archiving purposes. The generated ZIP file
-    has the name of the folder to archive.
+    has the name of the folder to archive. See RunArchiver to build the archive incrementally.
 
     :param src_path: The folder to archive
     :type src_path: str or pathlib.Path
@@ -90,9 +614,5 @@ def write_archive(src_path: typing_ext.PathLike, dst_path: typing_ext.PathLike)
     :type dst_path: str or pathlib.Path
     :return: None
     """
-
-    dst_fn = dst_path / f"{src_path.name}.zip"
-
-    with zipfile.ZipFile(dst_fn, mode="w") as arc:
-        for fn in src_path.rglob("*"):
-            arc.write(fn, arcname=fn.relative_to(src_path.parent))
+    with RunArchiver(src_path=src_path, dst_path=dst_path):
+        pass
@@ -21,6 +21,9 @@ def init_logger(path: PathLike | None = None) -> logging.Logger:
     if path:
         handlers.append(logging.FileHandler(path))
 
+    # the replaced handlers are closed, which releases the previous log file
+    for handler in root_logger.handlers:
+        handler.close()
     root_logger.handlers = []
     for handler in handlers:
         formatter = logging.Formatter(logger_format)
@@ -1,3 +1,8 @@
+import functools
+import math
+from collections.abc import Callable
+from statistics import NormalDist
+
 import numpy as np
 
 from autosweep.utils import typing_ext
@@ -17,6 +22,55 @@ def find_nearest_idx(array: typing_ext.ListLike, val: float) -> int:
     return np.abs(array - val).argmin()
 
 
+def find_nearest_idxs_sorted(
+    array: np.ndarray, vals: typing_ext.ListLike
+) -> np.ndarray:
+    """
+    Find the nearest indices of a sorted (non-decreasing) array for many values at once, using a binary search. On a
+    tie, the lower index is returned, like find_nearest_idx().
+
+    :param array: The sorted array to search
+    :type array: np.ndarray
+    :param vals: The values to search for
+    :type vals: float or np.ndarray or list or tuple
+    :return: The closest matching indices, with the shape of 'vals'
+    :rtype: np.ndarray
+    """
+    vals = np.asarray(vals)
+    if len(array) == 1:
+        return np.zeros(vals.shape, dtype=np.intp)
+
+    idx = np.clip(np.searchsorted(array, vals), 1, len(array) - 1)
+    return np.where(vals - array[idx - 1] <= array[idx] - vals, idx - 1, idx)
+
+
+def interp_weights(
+    array: np.ndarray, vals: typing_ext.ListLike
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the linear interpolation table of a sorted (non-decreasing) array for many values at once. The value
+    interpolated at vals[i] is (1 - weights[i]) * y[idxs[i]] + weights[i] * y[idxs[i] + 1]. Values outside of the array
+    get the first or last element, like np.interp. The table only depends on the X values, so it can be applied to
+    any number of Y traces.
+
+    :param array: The sorted array to interpolate over, with at least 2 elements
+    :type array: np.ndarray
+    :param vals: The values to interpolate at
+    :type vals: np.ndarray or list or tuple
+    :return: The lower indices and the weights of the upper indices, each with the shape of 'vals'
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    vals = np.asarray(vals)
+    if len(array) < 2:
+        raise ValueError("At least 2 points are needed to interpolate.")
+
+    idxs = np.clip(np.searchsorted(array, vals, side="right") - 1, 0, len(array) - 2)
+    x_lo, x_hi = array[idxs], array[idxs + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weights = np.where(x_hi > x_lo, (vals - x_lo) / (x_hi - x_lo), 0.0)
+    return idxs, np.clip(weights, 0.0, 1.0)
+
+
 def find_3_idxs(
     array: typing_ext.ListLike, val: float
 ) -> tuple[int, int] | tuple[int, int, int]:
@@ -55,3 +109,184 @@ def get_grid(start: float, stop: float, step: float) -> np.ndarray:
     """
 
     return np.linspace(start, stop, int(np.abs(np.abs(start - stop) / step)))
+
+
+def mueller_row(states: typing_ext.ListLike, powers: np.ndarray) -> np.ndarray:
+    """
+    Solves for the first row of the Mueller matrix of a device from the powers transmitted for a set of known input
+    polarization states. Every wavelength (column of 'powers') is solved at once with a single matrix product, more than
+    4 states are solved in the least-squares sense.
+
+    :param states: The normalized input Stokes vectors (s1, s2, s3), one per row
+    :type states: np.ndarray or list or tuple
+    :param powers: The transmitted power for each input state, with shape (states, points)
+    :type powers: np.ndarray
+    :return: The first row of the Mueller matrix (m00, m01, m02, m03) for every point, with shape (4, points)
+    :rtype: np.ndarray
+    """
+    states = np.asarray(states, dtype=float)
+    powers = np.asarray(powers)
+    if states.ndim != 2 or states.shape[1] != 3:
+        raise ValueError("The argument 'states' must have the shape (states, 3).")
+    if powers.shape[0] != states.shape[0]:
+        raise ValueError(
+            "The first dimension of 'powers' must match the number of input states."
+        )
+    if states.shape[0] < 4:
+        raise ValueError("At least 4 input polarization states are needed.")
+
+    stokes_in = np.hstack((np.ones((states.shape[0], 1)), states))
+    return np.linalg.pinv(stokes_in) @ powers
+
+
+def mueller_pdl(m_row: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes the minimum and maximum transmission, and the polarization dependent loss (PDL) from the first row of the
+    Mueller matrix.
+
+    :param m_row: The first row of the Mueller matrix, with shape (4, points)
+    :type m_row: np.ndarray
+    :return: The minimum transmission, the maximum transmission and the PDL (dB), each with shape (points,)
+    :rtype: tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    m_pol = np.sqrt(np.sum(np.square(m_row[1:]), axis=0))
+    t_max = m_row[0] + m_pol
+    t_min = m_row[0] - m_pol
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pdl = 10 * np.log10(t_max / t_min)
+    return t_min, t_max, pdl
+
+
+def degree_of_polarization(stokes: np.ndarray) -> np.ndarray:
+    """
+    Computes the degree of polarization (DOP) from un-normalized Stokes parameters.
+
+    :param stokes: The Stokes parameters (S0, S1, S2, S3) along the first axis
+    :type stokes: np.ndarray
+    :return: The DOP, with the first axis removed
+    :rtype: np.ndarray
+    """
+    stokes = np.asarray(stokes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sqrt(np.sum(np.square(stokes[1:4]), axis=0)) / stokes[0]
+
+
+def average_to_confidence(
+    sample: Callable[[], float],
+    target: float,
+    confidence: float = 0.95,
+    min_samples: int = 5,
+    max_samples: int = 100,
+    db: bool = False,
+) -> tuple[float, float, int]:
+    """
+    Averages the readings returned by 'sample' until the half-width of the confidence interval of the mean falls below
+    'target'. The mean and the variance are updated one reading at a time (Welford's algorithm), so quiet signals stop
+    after 'min_samples' readings and only noisy ones go on up to 'max_samples'. The interval uses the Student-t quantile
+    with n - 1 degrees of freedom, so it keeps its confidence level for the few readings of a quiet signal.
+
+    With 'db=True', the readings are logarithmic (e.g. dBm) and are averaged in linear scale, since the mean of the
+    logarithms underestimates the mean power of a noisy signal. The mean is converted back, and the target and the
+    half-width are in dB, relative to the mean.
+
+    :param sample: A function taking no arguments which makes and returns a new reading
+    :type sample: Callable[[], float]
+    :param target: The wanted half-width of the confidence interval, in the unit of the readings
+    :type target: float
+    :param confidence: The confidence level of the interval, between 0 and 1
+    :type confidence: float, default 0.95
+    :param min_samples: The minimum number of readings, at least 2
+    :type min_samples: int, default 5
+    :param max_samples: The maximum number of readings
+    :type max_samples: int, default 100
+    :param db: The readings are in dB or dBm
+    :type db: bool, default False
+    :return: The mean, the achieved half-width of the confidence interval and the number of readings
+    :rtype: tuple[float, float, int]
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("The argument 'confidence' must be between 0 and 1.")
+    if not 2 <= min_samples <= max_samples:
+        raise ValueError(
+            "The sample caps must satisfy 2 <= 'min_samples' <= 'max_samples'."
+        )
+
+    # in dB, the half-width is compared to the mean in linear scale
+    rel_target = 10 ** (target / 10) - 1
+
+    mean = m2 = 0.0
+    half_width = np.inf
+    for n in range(1, max_samples + 1):
+        val = float(sample())
+        if db:
+            val = 10 ** (val / 10)
+        delta = val - mean
+        mean += delta / n
+        m2 += delta * (val - mean)
+
+        if n >= min_samples:
+            half_width = t_quantile(confidence=confidence, dof=n - 1) * np.sqrt(
+                m2 / (n - 1) / n
+            )
+            if half_width <= (rel_target * mean if db else target):
+                break
+
+    if db:
+        return 10 * np.log10(mean), float(10 * np.log10(1 + half_width / mean)), n
+    return mean, float(half_width), n
+
+
+@functools.lru_cache
+def t_quantile(confidence: float, dof: int) -> float:
+    """
+    The two-sided quantile of the Student-t distribution, i.e. the t for which P(|T| < t) = confidence. Below 30
+    degrees of freedom, it is found by bisection of the closed-form distribution of T for integer degrees of freedom
+    (Abramowitz and Stegun 26.7.3 and 26.7.4), above it, the Cornish-Fisher expansion around the normal quantile
+    (Abramowitz and Stegun 26.7.5) is accurate to better than 1e-6.
+
+    :param confidence: The confidence level, between 0 and 1
+    :type confidence: float
+    :param dof: The number of degrees of freedom, at least 1
+    :type dof: int
+    :return: The quantile
+    :rtype: float
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("The argument 'confidence' must be between 0 and 1.")
+    if dof < 1:
+        raise ValueError("The argument 'dof' must be at least 1.")
+
+    if dof >= 30:
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        return (
+            z
+            + (z**3 + z) / (4 * dof)
+            + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * dof**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * dof**3)
+            + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z)
+            / (92160 * dof**4)
+        )
+
+    def prob(t: float) -> float:
+        theta = math.atan(t / math.sqrt(dof))
+        cos2 = math.cos(theta) ** 2
+        # the terms of the series in cos(theta) ** 2, starting at 1
+        if dof % 2:
+            term = total = 1.0 if dof > 1 else 0.0
+            for k in range(1, (dof - 1) // 2):
+                term *= cos2 * 2 * k / (2 * k + 1)
+                total += term
+            return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+        term = total = 1.0
+        for k in range(1, dof // 2):
+            term *= cos2 * (2 * k - 1) / (2 * k)
+            total += term
+        return math.sin(theta) * total
+
+    lo, hi = 0.0, 1.0
+    while prob(hi) < confidence:
+        lo, hi = hi, 2 * hi
+    while hi - lo > 1e-12 * hi:
+        mid = (lo + hi) / 2
+        lo, hi = (mid, hi) if prob(mid) < confidence else (lo, mid)
+    return (lo + hi) / 2
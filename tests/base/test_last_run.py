@@ -0,0 +1,65 @@
+import shutil
+
+import pytest
+
+from autosweep.data_types.metadata import PN, SN, DUTInfo, TimeStamp
+from autosweep.utils import generics, io
+
+
+def _add_run(path, pn: str, sn: str, start: str):
+    dut = DUTInfo(part_num=PN(pn, 1), ser_num=SN(sn))
+    run = path / f"{pn}_{sn}_{start}"
+    run.mkdir()
+    io.write_json(
+        data={"dut_info": dut, "timestamp": {"start": start}}, path=run / "status.json"
+    )
+    return run, dut
+
+
+def test_find_last_run(tmp_path, monkeypatch) -> None:
+    with pytest.raises(FileNotFoundError):
+        generics.find_last_run(path=tmp_path)
+
+    _add_run(tmp_path, "A", "1", "20260103-120000")
+    _add_run(tmp_path, "A", "2", "20260101-120000")
+    (tmp_path / "no_status").mkdir()
+
+    # without pointers the runs are scanned, and the scan is cached
+    assert generics.find_last_run(path=tmp_path).name == "A_1_20260103-120000"
+    assert (
+        generics.find_last_run(path=tmp_path, part_num="A-R1", ser_num="2").name
+        == "A_2_20260101-120000"
+    )
+    assert (tmp_path / generics.SCAN_CACHE_FNAME).exists()
+
+    # only the new runs are read by the next scan
+    read = []
+    load_many = io.load_many
+    monkeypatch.setattr(
+        io, "load_many", lambda paths: load_many(paths=read.extend(paths) or paths)
+    )
+    run, dut = _add_run(tmp_path, "A", "2", "20260104-120000")
+    assert generics.find_last_run(path=tmp_path, scan=True) == run
+    assert read == [run / "status.json"]
+
+    # the pointers are used without any scan, and are not moved back by an earlier run
+    read.clear()
+    generics.write_last_run(
+        path=tmp_path,
+        run_path=run,
+        timestamp=TimeStamp("20260104-120000"),
+        dut_info=dut,
+    )
+    old_run, old_dut = _add_run(tmp_path, "A", "2", "20260102-120000")
+    generics.write_last_run(
+        path=tmp_path,
+        run_path=old_run,
+        timestamp=TimeStamp("20260102-120000"),
+        dut_info=old_dut,
+    )
+    assert generics.find_last_run(path=tmp_path, part_num="A-R1", ser_num="2") == run
+    assert not read
+
+    # a pointer to a deleted run falls back to a scan
+    shutil.rmtree(run)
+    assert generics.find_last_run(path=tmp_path).name == "A_1_20260103-120000"
@@ -0,0 +1,74 @@
+import numpy as np
+
+from autosweep.tests.pol_sweep import MUELLER_STATES
+from autosweep.utils import ta_math
+
+
+def test_mueller_pdl() -> None:
+    states = np.array(list(MUELLER_STATES.values()))
+
+    # a partial polarizer along 'h', with transmission 1 and 0.5 along its axes, at 3 wavelengths
+    t_h, t_v = 1.0, 0.5
+    m_true = np.array([(t_h + t_v) / 2, (t_h - t_v) / 2, 0, 0])[:, None] * np.ones(3)
+    stokes_in = np.hstack((np.ones((4, 1)), states))
+    powers = stokes_in @ m_true
+
+    m_row = ta_math.mueller_row(states=states, powers=powers)
+    assert np.allclose(m_row, m_true), "The Mueller row should be recovered"
+
+    t_min, t_max, pdl = ta_math.mueller_pdl(m_row=m_row)
+    assert np.allclose(t_min, t_v) and np.allclose(t_max, t_h)
+    assert np.allclose(pdl, 10 * np.log10(t_h / t_v)), "PDL of a partial polarizer"
+
+
+def test_degree_of_polarization() -> None:
+    stokes = np.array([[1.0, 2.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]])
+    assert np.allclose(ta_math.degree_of_polarization(stokes=stokes), [1.0, 0.5])
+
+
+def test_average_to_confidence() -> None:
+    rng = np.random.default_rng(0)
+
+    # a quiet signal stops at the minimum number of samples
+    mean, ci, n = ta_math.average_to_confidence(
+        sample=lambda: 1 + 1e-6 * rng.normal(), target=1e-3, min_samples=5
+    )
+    assert n == 5 and ci <= 1e-3 and np.isclose(mean, 1, atol=1e-5)
+
+    # a noisy signal averages until the target is reached
+    mean, ci, n = ta_math.average_to_confidence(
+        sample=lambda: rng.normal(), target=0.2, max_samples=1000
+    )
+    assert 5 < n < 1000 and ci <= 0.2
+
+    # a signal too noisy for the target stops at the maximum number of samples
+    _, ci, n = ta_math.average_to_confidence(
+        sample=lambda: rng.normal(), target=1e-3, max_samples=50
+    )
+    assert n == 50 and ci > 1e-3
+
+    # readings in dBm are averaged in mW, 1 and 10 mW average to 5.5 mW
+    vals = iter([0.0, 10.0])
+    mean, _, n = ta_math.average_to_confidence(
+        sample=lambda: next(vals), target=100, min_samples=2, db=True
+    )
+    assert n == 2 and np.isclose(mean, 10 * np.log10(5.5))
+
+
+def test_average_to_confidence_coverage() -> None:
+    assert np.isclose(ta_math.t_quantile(confidence=0.95, dof=4), 2.7764, atol=1e-4)
+    assert np.isclose(ta_math.t_quantile(confidence=0.99, dof=29), 2.7564, atol=1e-4)
+
+    # the intervals of 5 readings of a known distribution hold its mean at the confidence level, a normal quantile
+    # would only hold it about 88 % of the time
+    rng = np.random.default_rng(1)
+    trials, covered = 4000, 0
+    for _ in range(trials):
+        mean, ci, n = ta_math.average_to_confidence(
+            sample=lambda: rng.normal(loc=3.0, scale=0.5),
+            target=0,
+            min_samples=5,
+            max_samples=5,
+        )
+        covered += abs(mean - 3.0) <= ci
+    assert abs(covered / trials - 0.95) < 0.015
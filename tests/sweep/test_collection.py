@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from autosweep import sweep
+from autosweep.data_types.metadata import PN, SN, DUTInfo
+
+
+def test_collection(tmp_path) -> None:
+    x = np.linspace(0, 1, 11)
+    attrs = {"x": ("Time", "s"), "a": ("A", "V"), "b": ("B", "V")}
+
+    runs = []
+    for ii in range(6):
+        s = sweep.Sweep(traces={"x": x, "a": x + ii, "b": -x * ii}, attrs=attrs)
+        dut = DUTInfo(part_num=PN("abc", ii % 2), ser_num=SN(f"sn{ii}"))
+        sweep.io.to_json(sweeps={"s": s}, path=tmp_path / f"{ii}.json", dut_info=dut)
+        runs.append(sweep.io.read_json(path=tmp_path / f"{ii}.json"))
+
+    coll = sweep.SweepCollection.from_runs(runs=runs, name="s")
+    assert coll.shape == (6, 3, 11)
+    assert coll.labels == tuple(f"SN{ii}" for ii in range(6))
+    assert coll["a"].shape == (6, 11) and np.array_equal(coll["x"], x)
+    assert np.array_equal(coll.sweep("SN2")["b"], -2 * x)
+
+    mean = coll.reduce("mean")
+    assert mean.attrs == attrs and np.allclose(mean["a"], x + 2.5)
+    assert np.allclose(coll.reduce("percentile", cols=["b"], q=100)["b"], 0)
+
+    # only the sweeps with an offset above 2
+    mask = coll["a"][:, 0] > 2
+    assert coll.select(mask).labels == ("SN3", "SN4", "SN5")
+    assert np.allclose(coll.reduce("mean", mask=mask)["a"], x + 4)
+
+    groups = coll.groupby(lambda label, md: md["dut_info"]["part_num"]["rev"])
+    assert {g: c.labels for g, c in groups.items()} == {
+        0: ("SN0", "SN2", "SN4"),
+        1: ("SN1", "SN3", "SN5"),
+    }
+    assert np.allclose(groups[1].reduce("max")["a"], x + 5)
+
+    with pytest.raises(ValueError):
+        sweep.SweepCollection.from_sweeps([runs[0][0]["s"], runs[0][0]["s"][1:]])
+
+    # a DUT tested twice is collected twice, labelled by run
+    retest = [runs[0], runs[1], runs[0]]
+    assert sweep.SweepCollection.from_runs(runs=retest, name="s").labels == (
+        "SN0_0",
+        "SN1",
+        "SN0_2",
+    )
+    paths = {tmp_path / "0.json": runs[0], tmp_path / "0_retest.json": runs[0]}
+    assert sweep.SweepCollection.from_runs(runs=paths, name="s").labels == tuple(
+        str(p) for p in paths
+    )
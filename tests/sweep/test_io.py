@@ -0,0 +1,230 @@
+import numpy as np
+import orjson
+import pytest
+
+from autosweep import sweep
+from autosweep.data_types.metadata import PN, SN, DUTInfo
+from autosweep.utils import io
+
+
+def test_npy_layout(tmp_path) -> None:
+    x = np.linspace(1500, 1600, 100_001)
+    s = sweep.Sweep(
+        traces={"wvl": x, "p": np.cos(x)},
+        attrs={"wvl": ("Wavelength", "nm"), "p": ("Power", "dBm")},
+        metadata={"route": 3},
+    )
+    dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN("123"))
+    sweep.io.to_npy(
+        sweeps={"s": s}, path=tmp_path / "raw", metadata={"a": 1}, dut_info=dut
+    )
+
+    sweeps, metadata, dut_read = sweep.io.read_npy(path=tmp_path / "raw")
+    m = sweeps["s"]
+    assert isinstance(m.data, np.memmap), "The data should be memory-mapped"
+    assert metadata == {"a": 1} and m.metadata == {"route": 3}
+    assert dut_read.to_dict() == dut.to_dict()
+    assert m.attrs == s.attrs and np.array_equal(m["p"], s["p"])
+
+    part = m.filter_range(x_min=1550, x_max=1551)
+    assert np.shares_memory(part.data, m.data)
+    assert np.array_equal(part["p"], s.filter_range(x_min=1550, x_max=1551)["p"])
+
+    # memory-mapped sweeps can be written back to JSON
+    sweep.io.to_json(sweeps=sweeps, path=tmp_path / "raw.json", dut_info=dut)
+    assert np.array_equal(
+        sweep.io.read_json(path=tmp_path / "raw.json")[0]["s"]["p"], s["p"]
+    )
+
+    # the memory-mapped data is read-only, it is copied on the first change
+    m.change_unit(col="p", coeff=2, unit="dBm")
+    assert not isinstance(m.data, np.memmap) and np.allclose(m["p"], 2 * s["p"])
+    assert np.array_equal(sweep.io.read_npy(path=tmp_path / "raw")[0]["s"]["p"], s["p"])
+
+
+def test_float32_policy(tmp_path) -> None:
+    dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN("123"))
+    x = np.linspace(0, 1, 10_001, dtype=np.float32)
+    s = sweep.Sweep(traces={"x": x, "y": np.sin(x)})
+    assert s.dtype == np.float32, "float32 data should stay float32"
+    mixed = sweep.Sweep(traces={"x": np.arange(11.0), "y": np.zeros(11, "f4")})
+    assert mixed.dtype == np.float32, "An exact X trace should not promote float32 data"
+
+    # a fine X grid is not rounded to float32, its points stay unique and exact
+    x = np.linspace(1500, 1600, 1_000_001)
+    fine = sweep.Sweep(traces={"x": x, "y": np.zeros(len(x), "f4")})
+    assert np.array_equal(fine["x"], x) and len(np.unique(fine["x"])) == len(x)
+    assert sweep.Sweep(traces={"x": x, "y": x}, dtype="float32").dtype == np.float32
+
+    s64 = s.astype("float64")
+    sweep.io.to_json(sweeps={"s": s64}, path=tmp_path / "64.json", dut_info=dut)
+    sweep.io.to_json(
+        sweeps={"s": s64}, path=tmp_path / "32.json", dut_info=dut, dtype="float32"
+    )
+    assert (tmp_path / "32.json").stat().st_size < (tmp_path / "64.json").stat().st_size
+
+    read = sweep.io.read_json(path=tmp_path / "32.json")[0]["s"]
+    assert read.dtype == np.float32 and np.array_equal(read["y"], s["y"])
+    assert sweep.io.read_json(path=tmp_path / "64.json")[0]["s"].dtype == np.float64
+
+    sweep.io.to_npy(
+        sweeps={"s": s64}, path=tmp_path / "raw", dut_info=dut, dtype="float32"
+    )
+    assert sweep.io.read_npy(path=tmp_path / "raw")[0]["s"].dtype == np.float32
+
+
+def test_strided_slice(tmp_path) -> None:
+    dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN("123"))
+    x = np.arange(20.0)
+    s = sweep.Sweep(traces={"x": x, "y": 2 * x})[::2]
+    assert not s["y"].flags.c_contiguous
+
+    sweep.io.to_json(sweeps={"s": s}, path=tmp_path / "raw.json", dut_info=dut)
+    read = sweep.io.read_json(path=tmp_path / "raw.json")[0]["s"]
+    assert np.array_equal(read["y"], 2 * x[::2])
+
+
+def test_selective_loading(tmp_path) -> None:
+    dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN("123"))
+    x = np.arange(50.0)
+    sweeps = {
+        "a": sweep.Sweep(
+            traces={"x": x, "p1": x + 1, "p2": x + 2, "p3": x + 3},
+            attrs={
+                "x": ("X", "nm"),
+                "p1": ("P", "W"),
+                "p2": ("P", "W"),
+                "p3": ("P", "W"),
+            },
+        ),
+        "b": sweep.Sweep(traces={"x": x[:10], "p1": x[:10], "p3": x[:10]}),
+    }
+    sweep.io.to_json(
+        sweeps=sweeps, path=tmp_path / "raw.json", metadata={"m": 1}, dut_info=dut
+    )
+    sweep.io.to_npy(
+        sweeps=sweeps, path=tmp_path / "raw", metadata={"m": 1}, dut_info=dut
+    )
+
+    for path in (tmp_path / "raw.json", tmp_path / "raw"):
+        catalog, metadata, dut_read = sweep.io.read_header(path=path)
+        assert metadata == {"m": 1} and dut_read.to_dict() == dut.to_dict()
+        assert catalog["a"]["points"] == 50 and catalog["b"]["points"] == 10
+        assert list(catalog["b"]["cols"]) == ["x", "p1", "p3"]
+
+        read = sweep.io.read_data(path=path, names=["a"], cols=["p3", "p1"])[0]
+        assert list(read) == ["a"] and read["a"].cols == ("x", "p3", "p1")
+        assert np.array_equal(read["a"]["p3"], x + 3)
+        assert read["a"].attrs["p1"] == ("P", "W")
+
+        with pytest.raises(KeyError):
+            sweep.io.read_data(path=path, cols=["p2"])
+
+    # the trace data is not needed for the catalog
+    (tmp_path / "raw" / "a.npy").unlink()
+    assert sweep.io.read_header(path=tmp_path / "raw")[0]["a"]["dtype"] == "float64"
+
+    # nor for JSON, only the beginning of the file is read, even if compressed
+    big = {"s": sweep.Sweep(traces={"x": np.arange(1e5), "y": np.arange(1e5)})}
+    for compression in (None, "gzip"):
+        path = tmp_path / f"big_{compression}.json"
+        sweep.io.to_json(
+            sweeps=big,
+            path=path,
+            metadata={"sweeps": 2},
+            dut_info=dut,
+            compression=compression,
+        )
+        path.write_bytes(path.read_bytes()[: path.stat().st_size // 2])
+        catalog, metadata, _ = sweep.io.read_header(path=path)
+        assert catalog["s"]["points"] == 100_000 and metadata == {"sweeps": 2}
+
+
+def test_streamed_json(tmp_path) -> None:
+    dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN("123"))
+    x = np.linspace(0, 1, 200_001)
+    sweeps = {
+        "s": sweep.Sweep(
+            traces={"x": x, "y": x**2}, attrs={"x": ("X", "s"), "y": ("Y", "V")}
+        )
+    }
+    out = {"dut_info": dut, "metadata": {}, "sweeps": {"s": sweeps["s"].to_dict()}}
+
+    # the streamed file is identical to the one written at once
+    io.write_json(data=out, path=tmp_path / "whole.json")
+    io.stream_json(data=out, path=tmp_path / "streamed.json", chunk_size=1000)
+    assert (tmp_path / "whole.json").read_bytes() == (
+        tmp_path / "streamed.json"
+    ).read_bytes()
+
+    sweep.io.to_json(
+        sweeps=sweeps, path=tmp_path / "compact.json", dut_info=dut, compact=True
+    )
+    assert (tmp_path / "compact.json").stat().st_size < (
+        tmp_path / "whole.json"
+    ).stat().st_size
+    read = sweep.io.read_json(path=tmp_path / "compact.json")[0]["s"]
+    assert np.array_equal(read["y"], x**2) and read.attrs == sweeps["s"].attrs
+
+
+@pytest.mark.parametrize("codec", ["gzip", "bz2", "lzma"])
+def test_compressed_json(tmp_path, codec) -> None:
+    dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN("123"))
+    x = np.linspace(0, 1, 50_001)
+    s = sweep.Sweep(traces={"x": x, "y": np.round(np.sin(40 * x), 3)})
+
+    sweep.io.to_json(sweeps={"s": s}, path=tmp_path / "plain.json", dut_info=dut)
+    path = tmp_path / f"raw.json{io.CODECS[codec][0]}"
+    sweep.io.to_json(sweeps={"s": s}, path=path, dut_info=dut, compression=codec)
+    assert path.stat().st_size < (tmp_path / "plain.json").stat().st_size / 2
+
+    read = sweep.io.read_json(path=path)[0]["s"]
+    assert np.array_equal(read["y"], s["y"])
+
+    # large files are compressed as several streams, in parallel
+    out = {"data": x}
+    with io.open_write(
+        path=tmp_path / "chunked", compression=codec, chunk_size=10_000
+    ) as f:
+        f.write(orjson.dumps(out, option=orjson.OPT_SERIALIZE_NUMPY))
+    assert np.array_equal(io.read_json(path=tmp_path / "chunked")["data"], x)
+
+
+def test_read_many(tmp_path) -> None:
+    x = np.arange(20.0)
+    paths = []
+    for ii in range(6):
+        dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN(f"{ii}"))
+        s = sweep.Sweep(traces={"x": x, "y": x * ii, "z": -x})
+        write = sweep.io.to_npy if ii % 2 else sweep.io.to_json
+        paths.append(tmp_path / f"run_{ii}")
+        write(sweeps={"s": s}, path=paths[-1], dut_info=dut)
+
+    (tmp_path / "bad.json").write_text("{")
+    runs, errors = {}, {}
+    for path, data, error in sweep.io.read_many(
+        paths=[*paths, tmp_path / "bad.json"], cols=["y"]
+    ):
+        if error is None:
+            runs[path] = data
+        else:
+            errors[path] = error
+
+    assert list(errors) == [tmp_path / "bad.json"] and len(runs) == 6
+    runs = {p: runs[p] for p in paths}
+    coll = sweep.SweepCollection.from_runs(runs=runs, name="s")
+    assert coll.labels == tuple(str(p) for p in paths)
+    assert coll.cols == ("x", "y") and np.array_equal(coll["y"][3], 3 * x)
+
+    # only a bounded window of files is loaded ahead of the consumer
+    consumed = []
+
+    def lazy_paths():
+        for ii in range(100):
+            consumed.append(ii)
+            yield tmp_path / f"{ii}"
+
+    loaded = io.load_many(paths=lazy_paths(), loader=lambda path: path.name, workers=2)
+    next(loaded)
+    assert len(consumed) <= 4
+    assert len(list(loaded)) == 99
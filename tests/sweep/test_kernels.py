@@ -0,0 +1,94 @@
+import numpy as np
+
+from autosweep import sweep
+
+
+def test_sweep_kernels() -> None:
+    x = np.linspace(0, 2.1, 211)
+    s = sweep.Sweep(traces={"x": x, "sin": np.sin(2 * np.pi * x), "line": 3 * x - 1})
+
+    crossings = s.find_x_intercept(val=0)
+    assert np.allclose(crossings["sin"], [0, 0.5, 1, 1.5, 2], atol=1e-3)
+    assert np.allclose(crossings["line"], [1 / 3])
+
+    y = s.find_y_intercept(val=[0.25, 1.0 / 3], cols=["line"])
+    assert np.allclose(y["line"], [-0.25, 0])
+
+    fits = s.find_poly_fit(deg=1)
+    assert np.allclose(fits["line"], [3, -1])
+    assert np.allclose(fits["sin"], np.polyfit(x, s["sin"], deg=1))
+
+    # 2 full periods
+    fft = s[:200].find_fft()
+    assert np.isclose(fft["freq"][np.abs(fft["sin"]).argmax()], 1)
+
+
+def test_collection_kernels() -> None:
+    x = np.linspace(1540, 1560, 101)
+    sweeps = [
+        sweep.Sweep(traces={"wvl": x, "a": (x - 1550) ** 2 - ii, "b": x - 1545 - ii})
+        for ii in range(1, 4)
+    ]
+    coll = sweep.SweepCollection.from_sweeps(sweeps)
+
+    crossings = coll.find_x_intercept(val=0)
+    assert [len(c) for c in crossings["a"]] == [2, 2, 2]
+    assert np.allclose(
+        crossings["a"][2], 1550 + np.array([-1, 1]) * np.sqrt(3), atol=1e-2
+    )
+    assert np.allclose(np.concatenate(crossings["b"]), [1546, 1547, 1548])
+
+    assert np.allclose(coll.find_y_intercept(val=1550)["a"], [-1, -2, -3])
+
+    fits = coll.find_poly_fit(deg=2)
+    assert fits["a"].shape == (3, 3)
+    assert np.allclose(fits["a"][:, 0], 1) and np.allclose(
+        np.polyval(fits["a"][1], 1550), -2
+    )
+
+    fft = coll.find_fft(cols=["b"], window="hanning")
+    assert fft["b"].shape == (3, len(fft["freq"]))
+
+
+def test_resample() -> None:
+    x = np.linspace(0, 10, 11)
+    s = sweep.Sweep(traces={"x": x, "a": 2 * x, "b": x**2})
+
+    lin = s.resample(grid=[0.5, 2.25, 20])
+    assert np.allclose(lin["a"], [1, 4.5, 20]) and np.allclose(
+        lin["b"], [0.5, 5.25, 100]
+    )
+    assert np.allclose(s.resample(grid=[0.4, 2.6], method="nearest")["b"], [0, 9])
+
+    # sweeps on 2 different grids, resampled onto a common one
+    fine = np.linspace(0, 10, 101)
+    sweeps = [
+        sweep.Sweep(traces={"x": grid, "a": 2 * grid + ii, "b": grid**2})
+        for ii, grid in enumerate((x, fine, x[::-1], fine))
+    ]
+    grid = np.linspace(1, 9, 5)
+    coll = sweep.SweepCollection.from_resampled(sweeps=sweeps, grid=grid)
+    assert coll.shape == (4, 3, 5) and np.array_equal(coll["x"], grid)
+    assert np.allclose(coll["a"], 2 * grid + np.arange(4)[:, None])
+
+    half = coll.resample(grid=[2.9, 6.2], method="nearest")
+    assert np.allclose(half["b"][1], [3**2, 7**2]) and half.labels == coll.labels
+
+
+def test_decimate() -> None:
+    x = np.linspace(0, 1, 100_001)
+    y = np.sin(2 * np.pi * 5 * x)
+    y[12_345] = 5  # a single-point spike
+    y[67_890] = -5  # a single-point notch
+    s = sweep.Sweep(traces={"x": x, "y": y, "z": -y})
+
+    for method in ("minmax", "lttb"):
+        for col, (xd, yd) in s.decimate(points=1000, method=method).items():
+            assert len(xd) == 1000 and np.all(np.diff(xd) >= 0)
+            assert yd.max() == 5 and yd.min() == -5, f"{method} lost a peak of {col}"
+
+    assert len(s[:500].decimate(points=1000)["y"][0]) == 500
+
+    fig_hdlr = sweep.FigHandler()
+    fig_hdlr.plot_sweep(sweep=s, cols=["y"])
+    assert len(fig_hdlr.ax.lines[0].get_xdata()) < 5000
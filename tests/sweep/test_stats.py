@@ -0,0 +1,60 @@
+import numpy as np
+
+from autosweep import sweep
+from autosweep.data_types.metadata import PN, SN, DUTInfo
+from autosweep.exec_helpers.reporter import ResultsHold
+from autosweep.tests.abs_test import AbsTest
+
+
+class NoisyTest(AbsTest):
+    def run_acquire(self, instr_mgr, points: int = 101):
+        x = np.linspace(0, 1, points)
+        y = x + self.rng.normal(scale=0.1, size=points)
+        attrs = {"x": ("Time", "s"), "y": ("Signal", "V")}
+        self.save_data(sweeps={"s": sweep.Sweep(traces={"x": x, "y": y}, attrs=attrs)})
+
+    def run_analysis(self, report_headings: list):
+        self.load_data()
+
+
+def test_aggregate_sweeps() -> None:
+    x = np.linspace(0, 1, 5)
+    sweeps = [
+        sweep.Sweep(traces={"x": x, "a": x + ii, "b": -x * ii}) for ii in range(4)
+    ]
+    agg = sweep.aggregate_sweeps(sweeps=sweeps, percentiles=(0, 50, 100))
+
+    assert agg.y_cols == (
+        "a",
+        "b",
+        "a_std",
+        "b_std",
+        "a_p0",
+        "b_p0",
+        "a_p50",
+        "b_p50",
+        "a_p100",
+        "b_p100",
+    )
+    assert np.allclose(agg["a"], x + 1.5)
+    assert np.allclose(agg["b_std"], x * np.std(range(4), ddof=1))
+    assert np.allclose(agg["a_p0"], x) and np.allclose(agg["a_p100"], x + 3)
+    assert agg.metadata["repeats"] == 4
+
+
+def test_run_repeats(tmp_path) -> None:
+    dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN("123"))
+    t = NoisyTest(dut_info=dut, results=ResultsHold(), save_path=tmp_path)
+    t.rng = np.random.default_rng(0)
+    t.run_repeats(instr_mgr=None, count=16, points=51)
+
+    repeats = t.load_repeats()["s"]
+    assert repeats["y"].shape == (16, 51), "Every repeat should be stacked"
+    assert np.allclose(t.sweeps["s"]["y"], repeats["y"].mean(axis=0))
+    assert t.sweeps["s"].attrs["y_std"] == ("Signal std", "V")
+    assert t.metadata["repeats"] == 16
+
+    # only the aggregated data is saved as raw data
+    saved, metadata, _ = sweep.read_json(path=tmp_path / t.raw_data_fname)
+    assert np.allclose(saved["s"]["y_p95"], t.sweeps["s"]["y_p95"])
+    assert metadata["percentiles"] == [5, 95]
@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+
+from autosweep.sweep import units
+from autosweep.sweep.sweep_parser import Sweep
+
+
+def test_block_backing() -> None:
+    x = np.arange(10)
+    s = Sweep(traces={"x": list(x), "a": x / 2, "b": tuple(-x)})
+
+    assert s.data.shape == (3, 10) and s.data.flags["C_CONTIGUOUS"]
+    assert s.cols == ("x", "a", "b")
+    assert np.shares_memory(s["y1"], s.data), "The traces should be views of the block"
+    assert np.array_equal(s.to_dict()["traces"]["b"], -x)
+
+    # the int trace is promoted, so scaling works on every trace
+    s.change_unit(col="x", coeff=0.5)
+    assert np.allclose(s["x"], x / 2) and s.ranges["x"] == (0, 4.5)
+
+    part = s[2:5]
+    assert part.cols == s.cols and len(part) == 3
+    assert np.array_equal(part["b"], [-2, -3, -4])
+
+    # traces which cannot share a block without changing their values are refused
+    t = np.arange("2026-01-01T00", "2026-01-01T10", dtype="datetime64[h]")
+    with pytest.raises(ValueError, match="common type"):
+        Sweep(traces={"t": t, "a": x / 2})
+    ns = np.int64(1_767_225_600_000_000_001) + x
+    with pytest.raises(ValueError, match="Trace 't'"):
+        Sweep(traces={"t": ns, "a": x / 2})
+    assert Sweep(traces={"t": ns, "a": x}).dtype == np.int64
+
+
+def test_from_arrays() -> None:
+    data = np.arange(12.0).reshape(3, 4)
+    s = Sweep.from_arrays(
+        data=data,
+        cols=("t", "u", "v"),
+        attrs={"t": ("T", "s"), "u": ("U", "V"), "v": ("V", "V")},
+    )
+    assert s.x_col == "t" and s.y_cols == ("u", "v")
+    assert np.array_equal(s["v"], data[2])
+
+    with pytest.raises(ValueError):
+        Sweep.from_arrays(data=data, cols=("t", "u"))
+
+
+def test_views_and_lazy_ranges() -> None:
+    x = np.linspace(0, 1, 11)
+    s = Sweep(traces={"x": x, "y": x**2})
+    assert s._ranges is None, "The ranges should only be computed when needed"
+    assert s.ranges["y"] == (0, 1)
+
+    part = s.filter_range(x_min=0.2, x_max=0.6)
+    assert np.shares_memory(part.data, s.data), "filter_range should not copy"
+    assert np.allclose(part.ranges["x"], (0.2, 0.5))
+
+    # changing a view does not change the sweep it comes from
+    part.change_unit(col="y", coeff=10)
+    assert np.allclose(s["y"], x**2) and np.allclose(part["y"], 10 * x[2:6] ** 2)
+    assert np.isclose(part.ranges["y"][1], 2.5)
+
+    # changing the sweep does not change the views taken from it
+    child = s.filter_range(x_min=0.2, x_max=0.6)
+    s.change_unit(col="y", coeff=1e3)
+    assert np.allclose(s["y"], 1e3 * x**2)
+    assert np.allclose(child["y"], x[2:6] ** 2)
+
+    block = np.vstack((x, x))
+    trusted = Sweep.from_arrays(data=block, cols=("x", "y"), copy=False)
+    assert trusted.data is block
+
+
+def test_sorted_lookups() -> None:
+    x = np.linspace(0, 10, 101)
+    s = Sweep(traces={"x": x, "a": 2 * x, "b": np.sin(x)})
+    assert s.monotonic == 1
+
+    # same nearest-index semantics as the linear scan
+    for x_min, x_max in ((0.26, 3.14), (-5, 4.05), (9.99, 20)):
+        idx_min = np.abs(x - x_min).argmin()
+        idx_max = np.abs(x - x_max).argmin()
+        assert np.array_equal(s.filter_range(x_min, x_max)["x"], x[idx_min:idx_max])
+
+    vals = [0.04, 5.0, 7.77]
+    assert np.allclose(s.loc(vals)["x"], [0.0, 5.0, 7.8])
+
+    interp = s.interp_at([-1, 0.25, 3.33, 11])
+    assert np.allclose(interp["a"], [0, 0.5, 6.66, 20])
+    assert np.allclose(interp["b"], np.interp([-1, 0.25, 3.33, 11], x, np.sin(x)))
+
+    # a decreasing X trace gives the same results
+    r = Sweep(traces={"x": x[::-1], "a": 2 * x[::-1]})
+    assert r.monotonic == -1
+    assert np.allclose(r.interp_at([0.25, 3.33], cols=["a"])["a"], [0.5, 6.66])
+    assert np.allclose(r.loc([7.77])["a"], 15.6)
+
+    u = Sweep(traces={"x": [0, 2, 1], "y": [0, 1, 2]})
+    assert u.monotonic == 0 and u.loc([1.9])["y"] == 1
+    with pytest.raises(ValueError):
+        u.interp_at([0.5])
+
+
+def test_convert_unit() -> None:
+    p_w = np.array([1e-3, 1e-2, 0.0])
+    assert np.allclose(units.convert(values=p_w[:2], src="W", dst="dBm"), [0, 10])
+    assert units.convert(values=p_w, src="W", dst="dBm")[-1] == -np.inf
+    assert np.allclose(units.convert(values=[0, 10], src="dBm", dst="uW"), [1e3, 1e4])
+    assert np.isclose(units.convert(values=1550, src="nm", dst="THz"), 193.41448903)
+    with pytest.raises(ValueError):
+        units.convert(values=p_w, src="W", dst="nm")
+
+    s = Sweep(
+        traces={
+            "wvl": [1550.0, 1551.0],
+            "p1": [1.0, 2.0],
+            "v": [5, 6],
+            "p2": [0.5, 4.0],
+        },
+        attrs={
+            "wvl": ("Wavelength", "nm"),
+            "p1": ("Power", "mW"),
+            "v": ("Voltage", "V"),
+            "p2": ("Power", "mW"),
+        },
+    )
+    view = s[:]
+    view.convert_unit(cols="p1", unit="W")
+    assert np.array_equal(
+        s["p1"], [1.0, 2.0]
+    ), "Converting a view should not change the sweep"
+
+    head = s[:1]
+    s.convert_unit(cols=("p1", "p2"), unit="dBm")
+    assert np.allclose(s["p1"], 10 * np.log10([1.0, 2.0]))
+    assert np.allclose(s["p2"], 10 * np.log10([0.5, 4.0]))
+    assert np.array_equal(
+        head["p2"], [0.5]
+    ), "Converting the sweep should not change its views"
+    assert np.array_equal(s["v"], [5, 6]) and s.attrs["p2"] == ("Power", "dBm")
+
+    s.convert_unit(cols="wvl", unit="THz", desc="Frequency")
+    assert s.attrs["wvl"] == ("Frequency", "THz") and s.monotonic == -1
+    with pytest.raises(ValueError):
+        s.convert_unit(cols=("p1", "v"), unit="W")
@@ -0,0 +1,59 @@
+from autosweep.data_types.metadata import PN, SN, DUTInfo, TimeStamp
+from autosweep.exec_helpers import run_index
+from autosweep.utils import io
+
+
+def test_run_index(tmp_path) -> None:
+    runs = [
+        ("A", "1", "20260101-120000"),
+        ("A", "2", "20260102-120000"),
+        ("A", "1", "20260103-120000"),
+        ("B", "1", "20260104-120000"),
+    ]
+    for pn, sn, start in runs:
+        path = tmp_path / f"{pn}_{sn}_{start}"
+        path.mkdir()
+        dut = DUTInfo(part_num=PN(pn, 1), ser_num=SN(sn))
+        # an older status file, without the status, the steps or the specs
+        io.write_json(
+            data={"dut_info": dut, "timestamp": {"start": start, "end": start}},
+            path=path / "status.json",
+        )
+    (tmp_path / "no_status").mkdir()
+
+    index = run_index.RunIndex(path=tmp_path)
+    assert index.last_run() is None, "The index is empty until it is rebuilt"
+
+    run_index.main(["rebuild", str(tmp_path)])
+    assert index.last_run() == tmp_path / "B_1_20260104-120000"
+    assert index.last_run(part_num="A-R1", ser_num="1").name == "A_1_20260103-120000"
+
+    dut_runs = index.runs_for_dut(part_num="A-R1")
+    assert [r["ser_num"] for r in dut_runs] == ["1", "2", "1"] and dut_runs[0][
+        "steps"
+    ] is None
+
+    window = index.runs_between(
+        start="20260102-000000", end=TimeStamp("20260104-000000")
+    )
+    assert [r["start"] for r in window] == [
+        TimeStamp("20260103-120000"),
+        TimeStamp("20260102-120000"),
+    ]
+
+    index.upsert(
+        run_path=tmp_path / "A_2_20260102-120000",
+        status={
+            "dut_info": DUTInfo(part_num=PN("A", 1), ser_num=SN("2")),
+            "timestamp": {"start": TimeStamp("20260102-120000"), "end": None},
+            "status": "error",
+            "steps": ["iv"],
+            "specs": {"IV": [{"spec": "r", "unit": "ohm", "value": 1.5}]},
+        },
+    )
+    run = index.runs_for_dut(ser_num="2")[0]
+    assert (
+        len(index.runs_between()) == 4
+        and run["status"] == "error"
+        and run["specs"]["IV"][0]["value"] == 1.5
+    )
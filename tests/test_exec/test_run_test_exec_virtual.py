@@ -0,0 +1,173 @@
+import inspect
+import logging
+import pathlib
+import zipfile
+
+import numpy as np
+
+import autosweep as ap
+from autosweep.exec_helpers.reporter import ResultsHold
+from autosweep.exec_helpers.run_index import RunIndex
+from autosweep.exec_helpers.spec_store import SpecStore
+from autosweep.instruments.optical import (
+    DiConGP600,
+    Keysight8164B,
+    KeysightN777C,
+    KeysightN778C,
+    KeysightN7745C,
+)
+from autosweep.instruments.virt_optical import ring_transmission
+from autosweep.tests.wvl_sweep import WvlSweep
+from autosweep.utils import io
+
+
+def test_exec_virtual(tmp_path) -> None:
+    ap.init_logger()
+    logging.info("Running a full recipe on the virtual instruments:")
+    dirpath = pathlib.Path(__file__).parent.absolute()
+
+    dut = ap.DUTInfo(part_num=ap.PN("VIRT-0001", 1), ser_num=ap.SN("123456"))
+    recipe = ap.Recipe.read_json(path=dirpath / "recipe_virtual.json")
+
+    # the virtual station writes its data in the temporary folder
+    config = io.read_json(path=dirpath / "station_config_virtual.json")
+    config["paths"]["base"] = str(tmp_path)
+    (tmp_path / "data").mkdir()
+    station_cfg = ap.StationConfig(station_config=config)
+
+    with ap.TestExec(
+        dut_info=dut, recipe=recipe, station_config=station_cfg, gen_archive=True
+    ) as t:
+        t.run_recipe()
+
+    assert (t.run_path / "report.html").exists()
+
+    # the run is in the index of the data folder, with its status
+    status = io.read_json(path=t.run_path / "status.json")
+    assert status["status"] == "complete" and status["steps"] == [
+        "iv",
+        "wvl_sweep",
+        "pol_sweep",
+    ]
+    run = RunIndex(path=tmp_path / "data").runs_for_dut(ser_num="123456")[0]
+    assert run["path"] == t.run_path and run["recipe_hash"] == recipe.digest
+    assert run["specs"] == status["specs"]
+    assert ap.utils.find_last_run(path=tmp_path / "data") == t.run_path
+
+    # the archive is built one step at a time, with the same layout as the run folder
+    with zipfile.ZipFile(t.archiver.path) as arc:
+        infos = {i.filename.rstrip("/"): i for i in arc.infolist()}
+        assert arc.testzip() is None, "Every member should match its CRC"
+    files = {
+        p.relative_to(t.run_path.parent).as_posix(): p for p in t.run_path.rglob("*")
+    }
+    assert infos.keys() == files.keys()
+    for name, info in infos.items():
+        if name.endswith((".png", ".gz")):
+            assert info.compress_type == zipfile.ZIP_STORED
+        elif files[name].is_file():
+            assert info.compress_type == zipfile.ZIP_DEFLATED
+
+    wvl = t.test_instances["wvl_sweep"].sweeps["wvl"]
+    assert len(wvl) == 1000
+    assert np.ptp(wvl["p1"]) > 5, "The virtual ring should have deep notches (dB)"
+
+    # the station saves the raw data in the 'npy' layout, the polarization sweep as float32
+    assert (t.run_path / "wvl_sweep" / "raw_data" / "header.json").exists()
+    assert not (t.run_path / "wvl_sweep" / "raw_data.json").exists()
+    assert (t.run_path / "iv" / "raw_data.json.gz").exists()
+    assert t.test_instances["pol_sweep"].sweeps["h"].dtype == np.float32
+
+    with ap.TestExec(
+        dut_info=dut,
+        recipe=recipe,
+        station_config=station_cfg,
+        reanalyze=True,
+        path=t.run_path,
+    ) as t_re:
+        t_re.run_recipe()
+    assert t_re.test_instances["pol_sweep"].sweeps["h"].dtype == np.float32
+    assert len(t_re.test_instances["iv"].sweeps["iv"]) == 1001
+
+    specs = {s["spec"]: s["value"] for s in t.test_results.specs["Polarization Sweep"]}
+    assert specs["pdl_mean"] < specs["pdl_max"]
+    assert np.isclose(specs["pdl_max"], 0.75, atol=0.05)
+    assert np.isclose(specs["dop_min"], 1, atol=0.01)
+
+    # the specs are also in the spec store of the station
+    stored = SpecStore(path=tmp_path / "data").query(spec="pdl_max")["pdl_max"]
+    assert list(stored["value"]) == [specs["pdl_max"]]
+
+
+def test_virtual_benches() -> None:
+    dirpath = pathlib.Path(__file__).parent.absolute()
+    config = io.read_json(path=dirpath / "station_config_virtual.json")
+    config["instruments"]["laser_b"] = {"class": "VirtualLaser", "bench": "b"}
+
+    # the instruments of a station share a bench, those of another station or bench do not
+    mgrs = [
+        ap.InstrumentManager(station_config=ap.StationConfig(station_config=config))
+        for _ in range(2)
+    ]
+    for mgr in mgrs:
+        mgr.load_instruments(instr_names="all")
+    mgrs[0].instrs["laser"].source_power_state(1)
+    assert mgrs[0].instrs["opt_pm"].bench.laser_on
+    assert not mgrs[0].instrs["laser_b"].bench.laser_on
+    assert not mgrs[1].instrs["opt_pm"].bench.laser_on
+
+    # the virtual instruments have the public methods of the drivers they stand in for
+    for virt, real in (
+        (ap.instruments.VirtualLaser, Keysight8164B.Keysight8164B),
+        (ap.instruments.VirtualLaser, KeysightN777C.KeysightN777C),
+        (ap.instruments.VirtualPowerMeter, KeysightN7745C.KeysightN7745C),
+        (ap.instruments.VirtualSwitch, DiConGP600.DiConGP600X1),
+        (ap.instruments.VirtualPolarimeter, KeysightN778C.KeysightN778C),
+    ):
+        for name, method in inspect.getmembers(real, inspect.isfunction):
+            if not name.startswith("_"):
+                virt_method = getattr(virt, name)
+                assert list(inspect.signature(virt_method).parameters) == list(
+                    inspect.signature(method).parameters
+                ), f"{virt.__name__}.{name}"
+
+
+def test_read_power_to_confidence(tmp_path) -> None:
+    shared = {}
+    laser = ap.instruments.VirtualLaser(shared=shared)
+    opm = ap.instruments.VirtualPowerMeter(noise=0.3, seed=0, shared=shared)
+    laser.source_power_state(1)
+    laser.source_wavelength_nm(1555)
+
+    # the readings are averaged in linear scale, the mean of noisy dBm readings would be ~0.2 dB too low
+    trans = ring_transmission(wvl=1555, wvl_0=1550, **opm.ring)
+    p, ci, n = opm.read_power_to_confidence(1, target=0.05, max_samples=5000)
+    assert ci <= 0.05 and n > 100
+    assert np.isclose(p, 10 * np.log10(trans), atol=0.1)
+
+    # in a sweep, the weak points in the notches are averaged for longer
+    dirpath = pathlib.Path(__file__).parent.absolute()
+    config = io.read_json(path=dirpath / "station_config_virtual.json")
+    config["instruments"]["opt_pm"]["floor"] = 1e-6
+    with ap.InstrumentManager(
+        station_config=ap.StationConfig(station_config=config)
+    ) as mgr:
+        mgr.load_instruments(instr_names=["laser", "opt_pm"])
+        test = WvlSweep(
+            dut_info=ap.DUTInfo(part_num=ap.PN("VIRT-0001", 1), ser_num=ap.SN("1")),
+            results=ResultsHold(),
+            save_path=tmp_path,
+        )
+        test.run_acquire(
+            instr_mgr=mgr,
+            wvl_start=1530,
+            wvl_stop=1580,
+            dwvl=0.25,
+            settle_time=0,
+            target_ci=0.01,
+            max_samples=1000,
+        )
+    test.load_data()
+    wvl = test.sweeps["wvl"]
+    assert np.all(np.array(wvl.metadata["p1_ci"]) <= 0.01)
+    assert np.max(wvl.metadata["p1_samples"]) > np.min(wvl.metadata["p1_samples"])
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+
+from autosweep.data_types.metadata import PN, SN, DUTInfo, TimeStamp
+from autosweep.exec_helpers import spec_store
+from autosweep.exec_helpers.spec_store import SpecStore
+
+
+def test_spec_store(tmp_path) -> None:
+    store = SpecStore(path=tmp_path, compact_every=4, parts_per_tier=2)
+    assert store.query() == {}
+
+    for ii in range(10):
+        dut = DUTInfo(part_num=PN("A" if ii % 2 else "B", 1), ser_num=SN(f"{ii}"))
+        specs = {
+            "IV": [{"spec": "r", "unit": "ohm", "value": 10.0 + ii}],
+            "Wvl": [
+                {"spec": "il", "unit": "dB", "value": -ii},
+                {"spec": "ok", "unit": "", "value": ii < 8},
+            ],
+        }
+        start = TimeStamp(f"202601{ii + 10:02d}-120000")
+        store.append(
+            run_path=tmp_path / f"run_{ii}", dut_info=dut, start=start, specs=specs
+        )
+
+    # the chunks were compacted along the way, the 2 parts of tier 0 into a part of tier 1, without losing or
+    # duplicating rows
+    files = sorted(p.name[:7] for p in store.path.glob("*.npz"))
+    assert files == ["chunk_2", "chunk_2", "part_1_"]
+    data = store.read()
+    assert len(data["value"]) == 30 and len(set(data["run"])) == 10
+
+    specs = store.query()
+    assert specs.keys() == {"r", "il", "ok"}
+    assert np.array_equal(specs["r"]["value"], 10.0 + np.arange(10))
+    assert (
+        specs["ok"]["value"].mean() == 0.8
+    ), "The yield should be a single vectorized read"
+
+    part = store.query(
+        spec="r",
+        part_num="A-R1",
+        start="20260113-000000",
+        end=TimeStamp("20260118-000000"),
+    )
+    assert list(part["r"]["ser_num"]) == ["3", "5", "7"]
+    assert part["r"]["start"].dtype == np.dtype("datetime64[s]")
+
+    # a lock left by a dead process is broken once it is stale
+    lock = store.path / spec_store.LOCK_FNAME
+    lock.write_text("{}")
+    store.compact(full=True)
+    assert len(list(store.path.glob("*.npz"))) == 3
+    os.utime(lock, (0, 0))
+    store.compact(full=True)
+    assert len(list(store.path.glob("*.npz"))) == 1 and not lock.exists()
+    assert np.array_equal(store.read()["value"], data["value"])
+
+    # a file deleted by a compaction between the listing and the read is skipped by listing again
+    load, deleted = SpecStore._load, []
+
+    def racing_load(path):
+        if not deleted:
+            deleted.append(path)
+            raise FileNotFoundError(path)
+        return load(path=path)
+
+    store._load = racing_load
+    assert np.array_equal(store.read()["value"], data["value"])
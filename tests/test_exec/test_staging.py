@@ -0,0 +1,163 @@
+import os
+import pathlib
+import threading
+
+import autosweep as ap
+from autosweep.data_types.metadata import TimeStamp
+from autosweep.exec_helpers import migrator
+from autosweep.exec_helpers.run_index import RunIndex
+from autosweep.utils import generics, io
+
+
+def test_staged_sharded_run(tmp_path) -> None:
+    dirpath = pathlib.Path(__file__).parent.absolute()
+
+    dut = ap.DUTInfo(part_num=ap.PN("VIRT-0001", 1), ser_num=ap.SN("123456"))
+    recipe = ap.Recipe.read_json(path=dirpath / "recipe_virtual.json")
+
+    # a local folder stands in for the network share of the data path
+    config = io.read_json(path=dirpath / "station_config_virtual.json")
+    config["paths"].update(base=str(tmp_path), staging="staging", layout="sharded")
+    (tmp_path / "data").mkdir()
+    station_cfg = ap.StationConfig(station_config=config)
+
+    with ap.TestExec(
+        dut_info=dut, recipe=recipe, station_config=station_cfg, gen_archive=True
+    ) as t:
+        t.run_recipe()
+    assert t.migrator.wait()
+
+    month = t.timestamp["start"].timestamp.strftime("%Y%m")
+    assert t.dst_path == tmp_path / "data" / "VIRT-0001-R1" / month / t.run_path.name
+    assert (t.dst_path / "report.html").exists()
+    assert t.dst_path.with_suffix(".zip").exists()
+    assert not any((tmp_path / "staging").iterdir())
+
+    assert RunIndex(path=tmp_path / "data").last_run() == t.dst_path
+    assert ap.utils.find_last_run(path=tmp_path / "data", scan=True) == t.dst_path
+    assert RunIndex(path=tmp_path / "data").rebuild() == 1
+
+    # a run which cannot be indexed, e.g. the share is not reachable, still gets its report and is migrated
+    def unreachable(test_exec):
+        raise OSError("The network share is not reachable")
+
+    config["paths"]["base"] = str(tmp_path / "down")
+    (tmp_path / "down" / "data").mkdir(parents=True)
+    with ap.TestExec(
+        dut_info=dut,
+        recipe=recipe,
+        station_config=ap.StationConfig(station_config=config),
+    ) as t:
+        t.run_indexer = unreachable
+        t.run_recipe()
+    assert t.migrator.wait() and (t.dst_path / "report.html").exists()
+    (log,) = t.dst_path.glob("runlog_*.txt")
+    assert "'unreachable' failed" in log.read_text()
+    assert (t.dst_path / "specs.csv").exists() and (t.dst_path / "status.json").exists()
+
+
+def test_scan_during_migration(tmp_path, monkeypatch) -> None:
+    dut = ap.DUTInfo(part_num=ap.PN("A", 1), ser_num=ap.SN("1"))
+    data = tmp_path / "data"
+    runs = {}
+    for parent, start in ((data, "20260101-120000"), (tmp_path, "20260102-120000")):
+        runs[start] = parent / f"A-R1_1_{start}"
+        runs[start].mkdir(parents=True)
+        status = {"dut_info": dut, "timestamp": {"start": start}}
+        io.write_json(data=status, path=runs[start] / "status.json")
+
+    # the new run is pointed to at its final location in the flat layout, then migrated
+    new = data / runs["20260102-120000"].name
+    generics.write_last_run(
+        path=data, run_path=new, timestamp=TimeStamp("20260102-120000")
+    )
+    migrator.stage(run_path=runs["20260102-120000"], dst_path=new)
+
+    # the runs are scanned while the new run is copied, the partial copy is not a run
+    scanned = []
+    verify = migrator.Migrator._verify
+
+    def scanning_verify(src, dst):
+        scanned.append(generics.find_last_run(path=data))
+        verify(src=src, dst=dst)
+
+    monkeypatch.setattr(migrator.Migrator, "_verify", staticmethod(scanning_verify))
+    assert migrator.Migrator(delay=0).migrate(run_path=runs["20260102-120000"])
+    assert scanned == [runs["20260101-120000"]]
+
+    # the pointer was kept on the new run, which is found without a scan once migrated
+    assert io.read_json(path=data / generics.LAST_RUN_FNAME)["run"] == new.name
+    assert generics.find_last_run(path=data) == new
+
+
+def test_migrate_retry(tmp_path, monkeypatch) -> None:
+    run = tmp_path / "staging" / "run"
+    (run / "step").mkdir(parents=True)
+    (run / "step" / "data.bin").write_bytes(b"\x00" * 1000)
+    dst = tmp_path / "data" / "PN" / "202601" / "run"
+    migrator.stage(run_path=run, dst_path=dst)
+
+    # the first copy is corrupted, it is detected and the run is copied again
+    copytree = migrator.shutil.copytree
+    calls = []
+
+    def flaky_copytree(src, dst, *args, **kwargs):
+        copytree(src, dst, *args, **kwargs)
+        if str(dst).endswith(".partial"):
+            if not calls:
+                (dst / "step" / "data.bin").write_bytes(b"\x01" * 1000)
+            calls.append(dst)
+
+    monkeypatch.setattr(migrator.shutil, "copytree", flaky_copytree)
+    m = migrator.Migrator(delay=0)
+    m.migrate_pending(staging_path=tmp_path / "staging")
+    assert m.wait()
+    assert len(calls) == 2
+    assert (dst / "step" / "data.bin").read_bytes() == b"\x00" * 1000
+    assert not run.exists() and not (dst / migrator.MARKER_FNAME).exists()
+
+
+def test_concurrent_migrators(tmp_path, monkeypatch) -> None:
+    run = tmp_path / "staging" / "run"
+    run.mkdir(parents=True)
+    (run / "data.bin").write_bytes(b"\x00" * 1000)
+    dst = tmp_path / "data" / "run"
+    migrator.stage(run_path=run, dst_path=dst)
+
+    # the next run picks up the pending runs while the first migrator is still copying this one
+    copying, pending_done = threading.Event(), threading.Event()
+    verify = migrator.Migrator._verify
+
+    def blocking_verify(src, dst):
+        copying.set()
+        assert pending_done.wait(timeout=10)
+        verify(src=src, dst=dst)
+
+    monkeypatch.setattr(migrator.Migrator, "_verify", staticmethod(blocking_verify))
+    first = migrator.Migrator(delay=0)
+    first.start(run_path=run)
+    assert copying.wait(timeout=10)
+
+    second = migrator.Migrator(delay=0)
+    pending = second.migrate_pending(staging_path=tmp_path / "staging")
+    done = second.wait() and second.migrate(run_path=run)
+    pending_done.set()
+    assert not pending and done, "A run claimed by another migrator is skipped"
+
+    assert first.wait()
+    assert (dst / "data.bin").exists() and not run.exists()
+    assert not list((tmp_path / "data").glob("*.partial"))
+
+    # a run already migrated, without its marker or its folder, is done
+    assert second.migrate(run_path=run)
+
+    # the claim of a process which died is released once stale
+    run.mkdir()
+    (run / "data.bin").write_bytes(b"\x00" * 1000)
+    migrator.stage(run_path=run, dst_path=tmp_path / "data" / "run_2")
+    claim = run / migrator.CLAIM_FNAME.format(owner="dead")
+    (run / migrator.MARKER_FNAME).rename(claim)
+    assert not second.migrate_pending(staging_path=tmp_path / "staging")
+    os.utime(claim, (0, 0))
+    second.migrate_pending(staging_path=tmp_path / "staging")
+    assert second.wait() and (tmp_path / "data" / "run_2" / "data.bin").exists()
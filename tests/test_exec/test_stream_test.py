@@ -0,0 +1,55 @@
+import threading
+import time
+
+import numpy as np
+
+from autosweep import sweep
+from autosweep.data_types.metadata import PN, SN, DUTInfo
+from autosweep.exec_helpers.reporter import ResultsHold
+from autosweep.tests.stream_test import AbsStreamTest
+
+
+class RouteTest(AbsStreamTest):
+    def acquire_parts(self, instr_mgr, routes: int = 5):
+        self.acquire_metadata = {"routes": routes}
+        self.analyzed_during_acquire = 0
+
+        for route in range(routes):
+            x = np.linspace(0, 1, 11)
+            time.sleep(0.02)
+            self.analyzed_during_acquire = len(self._part_results)
+            yield f"route_{route}", sweep.Sweep(traces={"x": x, "y": route * x})
+
+    def analyze_part(self, name, sweep):
+        self.threads.add(threading.current_thread().name)
+        return np.polyfit(sweep["x"], sweep["y"], 1)[0]
+
+    def run_analysis(self, report_headings: list):
+        slopes = self.join_parts()
+        for name, slope in slopes.items():
+            self.results.add_spec(
+                report_heading=report_headings[0], spec=name, unit="", value=slope
+            )
+        self.results.add_report_entry(report_heading=report_headings[0])
+
+
+def test_stream_test(tmp_path) -> None:
+    dut = DUTInfo(part_num=PN("abc", 1), ser_num=SN("123"))
+
+    t = RouteTest(dut_info=dut, results=ResultsHold(), save_path=tmp_path, queue_size=2)
+    t.threads = set()
+    t.run_acquire(instr_mgr=None, routes=5)
+    t.run_analysis(report_headings=["routes"])
+
+    specs = t.results.specs["routes"]
+    assert [s["spec"] for s in specs] == [f"route_{ii}" for ii in range(5)]
+    assert np.allclose([s["value"] for s in specs], range(5))
+    assert t.analyzed_during_acquire > 0, "Parts should be analyzed during acquisition"
+    assert t.threads == {"RouteTest-analysis"}, "Analysis should run in the consumer"
+
+    # re-analysis runs without acquisition, from the saved data
+    t_re = RouteTest(dut_info=dut, results=ResultsHold(), save_path=tmp_path)
+    t_re.threads = set()
+    t_re.run_analysis(report_headings=["routes"])
+    assert t_re.results.specs == t.results.specs
+    assert t_re.metadata == {"routes": 5}